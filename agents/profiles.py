@@ -70,7 +70,10 @@ AGENT_CONFIGS = {
         "description": "Research and analysis expert",
         "output_parser": JsonOutputParser(),
         "temperature": 0.7,
-        "max_iterations": 5
+        "max_iterations": 5,
+        "memory": {"type": "summary", "max_token_limit": 2000},
+        "history_token_budget": 4000,
+        "llm_cache": True
     },
     "dr_milgrim": {
         "prompt": DR_MILGRIM_PROMPT,
@@ -78,7 +81,10 @@ AGENT_CONFIGS = {
         "description": "Data processing and pattern recognition specialist",
         "output_parser": JsonOutputParser(),
         "temperature": 0.5,
-        "max_iterations": 3
+        "max_iterations": 3,
+        "memory": {"type": "window", "window_size": 5},
+        "history_token_budget": 3000,
+        "llm_cache": True
     },
     "yaat": {
         "prompt": YAAT_PROMPT,
@@ -86,7 +92,10 @@ AGENT_CONFIGS = {
         "description": "Task execution and coordination assistant",
         "output_parser": JsonOutputParser(),
         "temperature": 0.3,
-        "max_iterations": 4
+        "max_iterations": 4,
+        "memory": {"type": "window", "window_size": 3},
+        "history_token_budget": 2000,
+        "llm_cache": False
     }
 }
 
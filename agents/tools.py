@@ -9,10 +9,13 @@ from langchain_community.tools.file_management import (
     WriteFileTool,
     ListDirectoryTool
 )
-import requests
+from functools import lru_cache
 import json
 import logging
 from config import settings
+from core.fake_llm import create_fake_tools
+from core.http_client import get_http_client
+from core.search_cache import cached_search
 
 # Initialize logging
 logging.basicConfig(
@@ -21,25 +24,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Search Tools
-search = DuckDuckGoSearchRun()
+# Clients are created on first use so importing the tools needs no network or API keys
+@lru_cache(maxsize=1)
+def get_search() -> DuckDuckGoSearchRun:
+    """Get the DuckDuckGo search client."""
+    return DuckDuckGoSearchRun()
+
+@lru_cache(maxsize=1)
+def get_serpapi() -> SerpAPIWrapper:
+    """Get the SerpAPI client."""
+    return SerpAPIWrapper()
+
+@lru_cache(maxsize=1)
+def get_github() -> GitHubAction:
+    """Get the GitHub client."""
+    return GitHubAction(
+        repository=settings.GITHUB_REPO,
+        access_token=settings.GITHUB_TOKEN
+    )
 
+# Search Tools
 @tool
 def web_search(query: str) -> str:
     """Search the web for information."""
     try:
-        return search.run(query)
+        return cached_search("duckduckgo", query, lambda: get_search().run(query))
     except Exception as e:
         logger.error(f"Web search error: {e}")
         return f"Error performing web search: {str(e)}"
 
-serpapi = SerpAPIWrapper()
-
 @tool
 def serpapi_search(query: str) -> str:
     """Search using SerpAPI for more detailed results."""
     try:
-        return serpapi.run(query)
+        return cached_search("serpapi", query, lambda: get_serpapi().run(query))
     except Exception as e:
         logger.error(f"SerpAPI search error: {e}")
         return f"Error performing SerpAPI search: {str(e)}"
@@ -78,16 +96,11 @@ def list_files(directory_path: str) -> str:
         return f"Error listing directory: {str(e)}"
 
 # GitHub Tools
-github = GitHubAction(
-    repository=settings.GITHUB_REPO,
-    access_token=settings.GITHUB_TOKEN
-)
-
 @tool
 def create_github_issue(title: str, body: str) -> str:
     """Create a GitHub issue."""
     try:
-        return github.run({
+        return get_github().run({
             "action": "create_issue",
             "title": title,
             "body": body
@@ -112,7 +125,7 @@ def send_to_notion(content: Dict[str, Any]) -> str:
             "properties": content
         }
         
-        response = requests.post(
+        response = get_http_client().post(
             "https://api.notion.com/v1/pages",
             headers=headers,
             json=data
@@ -128,7 +141,7 @@ def send_to_notion(content: Dict[str, Any]) -> str:
 def send_to_slack(message: str) -> str:
     """Send a message to Slack."""
     try:
-        response = requests.post(
+        response = get_http_client().post(
             settings.SLACK_WEBHOOK_URL,
             json={"text": message}
         )
@@ -162,4 +175,11 @@ TOOL_REGISTRY = {
     "professor_athena": RESEARCH_TOOLS + FILE_TOOLS,
     "dr_milgrim": RESEARCH_TOOLS + INTEGRATION_TOOLS,
     "yaat": FILE_TOOLS + INTEGRATION_TOOLS
-} 
\ No newline at end of file
+}
+
+# Offline stand-ins with the same names and arguments for load testing
+if settings.LLM_BACKEND == "fake":
+    TOOL_REGISTRY = {
+        agent_name: create_fake_tools(tools)
+        for agent_name, tools in TOOL_REGISTRY.items()
+    }
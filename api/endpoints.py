@@ -1,22 +1,44 @@
 # api/endpoints.py
-from fastapi import FastAPI, HTTPException, Depends, Header, Request, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Query, status
 from fastapi.security import APIKeyHeader
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, validator, constr
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import time
+import asyncio
 import jwt
 import os
 
 from core.state import State, create_initial_state
-from core.graph_builder import compiled_graph
-from core.database import (
+from core.workflow import workflow_manager
+from core.graph_builder import warm_graph_cache
+from core.llm_cache import get_llm_cache_stats
+from core.search_cache import get_search_cache_stats
+from core.checkpoint import has_checkpoint
+from core.retention import retention_scheduler, get_retention_stats
+from core.webhooks import webhook_dispatcher
+from core.notifications import notification_aggregator
+from core.http_client import close_http_client, close_async_http_client, get_http_stats
+from api.rate_limiter import get_rate_limiter, get_rate_limit_stats
+from integrations.streaming import (
+    workflow_events,
+    format_sse,
+    WORKFLOW_STATUS,
+    WORKFLOW_FINISHED,
+    TERMINAL_STATUSES
+)
+from core.async_database import (
     save_workflow_state,
-    get_workflow_state,
+    save_workflow_states,
+    get_workflow_state as load_workflow_state,
     update_workflow_status,
-    get_db
+    list_workflow_states,
+    fetch_workflow_states,
+    get_storage_stats,
+    run_in_db_thread,
+    check_connection,
+    shutdown_db_executor
 )
 from config import settings
 
@@ -32,9 +54,6 @@ app = FastAPI(
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
-# Rate limiting setup
-request_history: Dict[str, List[float]] = {}
-
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -61,11 +80,38 @@ class WorkflowResponse(BaseModel):
     message: str
     status: str
 
+class WorkflowBatchResponse(BaseModel):
+    state_ids: List[int]
+    message: str
+    status: str
+
 class StateResponse(BaseModel):
     messages: List[str]
+    message_count: int
     data_store: Dict[str, Any]
     status: str
 
+class WorkflowSummary(BaseModel):
+    id: int
+    workflow_type: str
+    status: str
+    agents: List[str]
+    created_at: datetime
+    updated_at: datetime
+
+class WorkflowListResponse(BaseModel):
+    items: List[WorkflowSummary]
+    next_cursor: Optional[str] = None
+
+class WorkflowFetchRequest(BaseModel):
+    ids: List[int]
+    fields: Optional[List[str]] = None
+    data_store_keys: Optional[List[str]] = None
+
+class WorkflowFetchResponse(BaseModel):
+    items: List[Dict[str, Any]]
+    missing: List[int]
+
 # Authentication middleware
 async def verify_api_key(api_key: str = Depends(api_key_header)):
     """Verify API key."""
@@ -78,26 +124,20 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
 
 # Rate limiting middleware
 async def check_rate_limit(request: Request):
-    """Check rate limiting."""
+    """Check rate limiting; the limiter (and its SQLite file) is created on the first check."""
     client_ip = request.client.host
-    now = time.time()
-    
-    if client_ip not in request_history:
-        request_history[client_ip] = []
-    
-    # Clean old requests
-    request_history[client_ip] = [
-        req_time for req_time in request_history[client_ip]
-        if now - req_time < settings.RATE_LIMIT_WINDOW
-    ]
+    rate_limiter = get_rate_limiter()
+    if rate_limiter.blocking:
+        allowed, wait = await asyncio.to_thread(rate_limiter.hit, client_ip)
+    else:
+        allowed, wait = rate_limiter.hit(client_ip)
     
-    if len(request_history[client_ip]) >= settings.MAX_REQUESTS:
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded"
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(wait)}
         )
-    
-    request_history[client_ip].append(now)
     return True
 
 # Error handler
@@ -129,7 +169,10 @@ async def start_workflow(
     api_key: str = Depends(verify_api_key),
     _: bool = Depends(check_rate_limit)
 ):
-    """Start a new workflow and return the state ID."""
+    """
+    Queue a new workflow and return its state ID immediately.
+    Execution happens on the background worker pool; poll /workflow/{state_id}/ for progress.
+    """
     try:
         # Create initial state
         initial_state = create_initial_state(
@@ -138,28 +181,28 @@ async def start_workflow(
             workflow_type=workflow_input.workflow_type
         )
         
-        # Execute workflow
-        try:
-            final_state = compiled_graph.invoke(initial_state)
-        except Exception as e:
-            final_state = initial_state
-            final_state["messages"].append(f"Workflow execution failed: {str(e)}")
-            final_state["data_store"]["status"] = "failed"
-            final_state["data_store"]["error"] = str(e)
-        
-        # Save state
-        state_id = save_workflow_state(
+        # Persist the pending workflow before handing it to a worker
+        state_id = await save_workflow_state(
             input_data=workflow_input.input_data,
-            state_data=final_state["data_store"],
-            messages=final_state["messages"],
+            state_data=initial_state["data_store"],
+            messages=initial_state["messages"],
             workflow_type=workflow_input.workflow_type,
-            status=final_state["data_store"].get("status", "completed")
+            status="pending",
+            agents=workflow_input.agents
+        )
+        
+        # Execute workflow in the background
+        workflow_manager.submit(
+            state_id=state_id,
+            input_data=workflow_input.input_data,
+            agents=workflow_input.agents,
+            workflow_type=workflow_input.workflow_type
         )
         
         return WorkflowResponse(
             state_id=state_id,
             message="Workflow started successfully",
-            status=final_state["data_store"].get("status", "completed")
+            status="pending"
         )
     except Exception as e:
         raise HTTPException(
@@ -167,15 +210,86 @@ async def start_workflow(
             detail=f"Error processing workflow: {str(e)}"
         )
 
+@app.post("/workflows/batch", response_model=WorkflowBatchResponse)
+async def start_workflow_batch(
+    workflow_inputs: List[WorkflowInput],
+    api_key: str = Depends(verify_api_key),
+    _: bool = Depends(check_rate_limit)
+):
+    """
+    Queue many workflows at once and return their state IDs in request order.
+    All pending rows are inserted in one transaction; execution is bounded by
+    the background worker pool like single submissions.
+    """
+    if not workflow_inputs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one workflow must be submitted"
+        )
+    if len(workflow_inputs) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} workflows can be submitted per batch"
+        )
+    try:
+        workflows = []
+        for workflow_input in workflow_inputs:
+            initial_state = create_initial_state(
+                input_data=workflow_input.input_data,
+                agents=workflow_input.agents,
+                workflow_type=workflow_input.workflow_type
+            )
+            workflows.append({
+                "input_data": workflow_input.input_data,
+                "state_data": initial_state["data_store"],
+                "messages": initial_state["messages"],
+                "workflow_type": workflow_input.workflow_type,
+                "status": "pending",
+                "agents": workflow_input.agents
+            })
+        
+        # Persist every pending workflow before handing any to a worker
+        state_ids = await save_workflow_states(workflows)
+        
+        for state_id, workflow_input in zip(state_ids, workflow_inputs):
+            workflow_manager.submit(
+                state_id=state_id,
+                input_data=workflow_input.input_data,
+                agents=workflow_input.agents,
+                workflow_type=workflow_input.workflow_type
+            )
+        
+        return WorkflowBatchResponse(
+            state_ids=state_ids,
+            message=f"{len(state_ids)} workflows started successfully",
+            status="pending"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing workflow batch: {str(e)}"
+        )
+
 @app.get("/workflow/{state_id}/", response_model=StateResponse)
 async def get_workflow_state(
     state_id: int,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    tail: Optional[int] = Query(None, ge=1),
     api_key: str = Depends(verify_api_key),
     _: bool = Depends(check_rate_limit)
 ):
-    """Retrieve the state of a workflow."""
+    """
+    Retrieve the state of a workflow.
+    Returns all messages by default; offset/limit select a range and tail the last messages.
+    """
     try:
-        state = get_workflow_state(state_id)
+        state = await load_workflow_state(state_id, offset=offset, limit=limit, tail=tail)
         if not state:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -184,6 +298,7 @@ async def get_workflow_state(
         
         return StateResponse(
             messages=state["messages"],
+            message_count=state["message_count"],
             data_store=state["state_data"],
             status=state.get("status", "unknown")
         )
@@ -195,14 +310,275 @@ async def get_workflow_state(
             detail=f"Error retrieving workflow state: {str(e)}"
         )
 
+@app.post("/workflow/{state_id}/resume", response_model=WorkflowResponse)
+async def resume_workflow(
+    state_id: int,
+    api_key: str = Depends(verify_api_key),
+    _: bool = Depends(check_rate_limit)
+):
+    """
+    Resume a failed workflow from its last checkpoint.
+    Nodes that finished before the failure are not run again.
+    """
+    try:
+        state = await load_workflow_state(state_id, limit=0)
+        if not state:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Workflow state {state_id} not found"
+            )
+        if state["status"] != "failed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Only failed workflows can be resumed; workflow {state_id} is {state['status']}"
+            )
+        if not await run_in_db_thread(has_checkpoint, state_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Workflow {state_id} has no checkpoint to resume from"
+            )
+        # Claim the workflow so concurrent resume requests cannot both run it
+        if not await update_workflow_status(state_id, "pending", expected_status="failed"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Workflow {state_id} is already being resumed"
+            )
+        
+        workflow_manager.submit(
+            state_id=state_id,
+            input_data=state["input_data"],
+            agents=state["state_data"]["agents"],
+            workflow_type=state["workflow_type"],
+            resume=True
+        )
+        
+        return WorkflowResponse(
+            state_id=state_id,
+            message="Workflow resumed successfully",
+            status="pending"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error resuming workflow: {str(e)}"
+        )
+
+@app.get("/workflows", response_model=WorkflowListResponse)
+async def list_workflows(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    workflow_type: Optional[str] = None,
+    agent: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.WORKFLOW_LIST_DEFAULT_LIMIT, ge=1, le=settings.WORKFLOW_LIST_MAX_LIMIT),
+    api_key: str = Depends(verify_api_key),
+    _: bool = Depends(check_rate_limit)
+):
+    """
+    List workflows newest first, filtered by status, workflow type, agent and creation time.
+    Pass the returned next_cursor as cursor to fetch the following page.
+    """
+    try:
+        items, next_cursor = await list_workflow_states(
+            status=status_filter,
+            workflow_type=workflow_type,
+            agent=agent,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit
+        )
+        return WorkflowListResponse(items=items, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing workflows: {str(e)}"
+        )
+
+@app.post("/workflows/fetch", response_model=WorkflowFetchResponse)
+async def fetch_workflows(
+    fetch_request: WorkflowFetchRequest,
+    api_key: str = Depends(verify_api_key),
+    _: bool = Depends(check_rate_limit)
+):
+    """
+    Fetch selected fields of many workflows in one query.
+    fields picks the columns to return (status, workflow type, agents and timestamps
+    by default) and data_store_keys narrows data_store to the listed keys.
+    """
+    if len(fetch_request.ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} workflows can be fetched per request"
+        )
+    try:
+        items, missing = await fetch_workflow_states(
+            fetch_request.ids,
+            fields=fetch_request.fields,
+            data_store_keys=fetch_request.data_store_keys
+        )
+        return WorkflowFetchResponse(items=items, missing=missing)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching workflows: {str(e)}"
+        )
+
+@app.get("/workflow/{state_id}/stream")
+async def stream_workflow(
+    state_id: int,
+    request: Request,
+    api_key: str = Depends(verify_api_key),
+    _: bool = Depends(check_rate_limit)
+):
+    """
+    Stream workflow progress as Server-Sent Events.
+    Emits node_started/node_finished, tool_started/tool_finished and token events
+    while the workflow runs, and a final workflow_finished event. A workflow that
+    is not running in this process (another worker's, or one lost in a restart)
+    is followed by polling its stored status; workflow_finished is only sent once
+    that status is terminal.
+    """
+    # Only the status column is read; the transcript is never loaded here
+    items, _ = await fetch_workflow_states([state_id], fields=["status"])
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workflow state {state_id} not found"
+        )
+    state = items[0]
+    
+    queue = workflow_events.subscribe(state_id)
+    if queue is None:
+        # The run may have finished between the status read and subscribing
+        items, _ = await fetch_workflow_states([state_id], fields=["status"], data_store_keys=["error"])
+        if items:
+            state = items[0]
+    
+    async def event_source():
+        nonlocal state, queue
+        # Send the current status right away so clients get the first bytes immediately
+        yield format_sse(WORKFLOW_STATUS, {"state_id": state_id, "status": state["status"]})
+        
+        while queue is None and state["status"] not in TERMINAL_STATUSES:
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+            # The run may have been queued on this process meanwhile, e.g. by a resume
+            queue = workflow_events.subscribe(state_id)
+            if queue is not None:
+                break
+            items, _ = await fetch_workflow_states([state_id], fields=["status"], data_store_keys=["error"])
+            if not items:
+                # Deleted while being followed
+                return
+            if items[0]["status"] != state["status"]:
+                yield format_sse(WORKFLOW_STATUS, {"state_id": state_id, "status": items[0]["status"]})
+            else:
+                yield ": keep-alive\n\n"
+            state = items[0]
+        
+        if queue is None:
+            # Nothing is running for this workflow; report its stored outcome
+            yield format_sse(WORKFLOW_FINISHED, {
+                "status": state["status"],
+                "error": state.get("data_store", {}).get("error")
+            })
+            return
+        
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    item = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=settings.STREAM_KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                event, data = item
+                yield format_sse(event, data)
+        finally:
+            workflow_events.unsubscribe(state_id, queue)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.on_event("startup")
+async def warm_workflow_graphs():
+    """Compile the default workflow graphs before serving requests."""
+    if settings.GRAPH_CACHE_WARMUP:
+        warm_graph_cache()
+
+@app.on_event("startup")
+async def start_retention():
+    """Schedule the archival and pruning of expired workflows."""
+    if settings.RETENTION_ENABLED:
+        retention_scheduler.start()
+
+@app.on_event("startup")
+async def start_webhook_dispatcher():
+    """Deliver queued webhooks and send due notification digests in the background."""
+    if settings.WEBHOOK_DISPATCHER_ENABLED:
+        webhook_dispatcher.start()
+    if settings.NOTIFICATION_DESTINATIONS:
+        notification_aggregator.start()
+
+@app.on_event("shutdown")
+async def shutdown_workflow_manager():
+    """Release the background workflow workers and database connections."""
+    retention_scheduler.stop()
+    # Queue the buffered digests before the dispatcher stops; they are delivered after a restart
+    await notification_aggregator.stop()
+    await webhook_dispatcher.stop()
+    await close_async_http_client()
+    close_http_client()
+    workflow_manager.shutdown(wait=False)
+    shutdown_db_executor(wait=False)
+
+@app.get("/metrics")
+async def get_metrics(api_key: str = Depends(verify_api_key)):
+    """Report runtime metrics of the workflow workers and caches."""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "workflows": {"active": workflow_manager.active_jobs()},
+        "llm_cache": get_llm_cache_stats(),
+        "search_cache": get_search_cache_stats(),
+        "rate_limit": get_rate_limit_stats(),
+        "storage": await get_storage_stats(),
+        "retention": get_retention_stats(),
+        "webhooks": await run_in_db_thread(webhook_dispatcher.stats),
+        "notifications": notification_aggregator.stats(),
+        "http": get_http_stats()
+    }
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     """Check if the API is running."""
     try:
         # Test database connection
-        with get_db() as db:
-            db.execute("SELECT 1")
+        await check_connection()
         
         return {
             "status": "healthy",
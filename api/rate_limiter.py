@@ -0,0 +1,255 @@
+# api/rate_limiter.py
+"""
+Sliding-window-counter rate limiters.
+
+Each client keeps the request counts of the current and previous fixed window;
+the rate over the last RATE_LIMIT_WINDOW seconds is estimated by weighting the
+previous count by the part of it still inside the sliding window. Every check
+is O(1) whatever MAX_REQUESTS is, and idle clients are evicted LRU-first.
+"""
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import math
+import sqlite3
+import threading
+import time
+import logging
+from config import settings
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+# (window index, requests in that window, requests in the window before it)
+WindowState = Tuple[int, int, int]
+
+def slide_window(state: Optional[WindowState], now: float, window: float) -> WindowState:
+    """Move a client's counters to the window containing now."""
+    current = int(now // window)
+    if state is None:
+        return current, 0, 0
+    index, count, previous = state
+    if index == current:
+        return state
+    if index == current - 1:
+        return current, 0, count
+    return current, 0, 0
+
+def estimate_rate(state: WindowState, now: float, window: float) -> float:
+    """Estimate the requests made during the last window seconds."""
+    index, count, previous = state
+    elapsed = now / window - index
+    return previous * (1.0 - elapsed) + count
+
+def retry_after(state: WindowState, now: float, window: float, max_requests: int) -> int:
+    """
+    Seconds until the estimated rate drops below max_requests, if no request is counted meanwhile.
+    Solves previous * (1 - elapsed / window) + count < max_requests for the time
+    elapsed in the window, or in the next one when count alone reaches the limit.
+    """
+    index, count, previous = state
+    if count < max_requests:
+        # A rejected client under the limit in this window has previous > 0
+        start = index * window
+        elapsed = window * (1.0 - (max_requests - count) / previous) if previous else 0.0
+    else:
+        # Next window: previous becomes count and nothing is counted yet
+        start = (index + 1) * window
+        elapsed = window * (1.0 - max_requests / count)
+    # The rate must fall strictly below the limit, so round past an exact boundary
+    return max(1, math.floor(start + elapsed - now) + 1)
+
+class RateLimitStats:
+    """Thread-safe counters of the decisions of a rate limiter."""
+
+    def __init__(self):
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def record(self, allowed: bool) -> None:
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+
+    def record_eviction(self, count: int = 1) -> None:
+        with self._lock:
+            self.evictions += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evictions": self.evictions
+            }
+
+class InMemoryRateLimiter:
+    """Per-process limiter keeping the counters of up to max_clients clients."""
+
+    # Checks are cheap enough to run on the event loop
+    blocking = False
+
+    def __init__(self, max_requests: int = None, window: float = None, max_clients: int = None):
+        self.max_requests = max_requests or settings.MAX_REQUESTS
+        self.window = window or settings.RATE_LIMIT_WINDOW
+        self.max_clients = max_clients or settings.RATE_LIMIT_MAX_CLIENTS
+        self.stats = RateLimitStats()
+        self._clients: "OrderedDict[str, WindowState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, now: Optional[float] = None) -> Tuple[bool, int]:
+        """
+        Count a request of a client unless it is over the limit.
+        Returns whether the request is allowed and, when it is not, the seconds to wait.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = slide_window(self._clients.get(key), now, self.window)
+            allowed = estimate_rate(state, now, self.window) < self.max_requests
+            if allowed:
+                state = (state[0], state[1] + 1, state[2])
+            self._clients[key] = state
+            self._clients.move_to_end(key)
+            evicted = 0
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                evicted += 1
+        self.stats.record(allowed)
+        if evicted:
+            self.stats.record_eviction(evicted)
+        return allowed, 0 if allowed else retry_after(state, now, self.window, self.max_requests)
+
+    def clients(self) -> int:
+        """Number of clients currently tracked."""
+        with self._lock:
+            return len(self._clients)
+
+    def clear(self) -> None:
+        """Forget every client."""
+        with self._lock:
+            self._clients.clear()
+
+class SQLiteRateLimiter:
+    """Limiter whose counters live in a SQLite file shared by every worker process."""
+
+    # Checks may wait on the SQLite lock held by another worker
+    blocking = True
+
+    def __init__(self, path: str = None, max_requests: int = None, window: float = None, max_clients: int = None):
+        self.path = path or settings.RATE_LIMIT_PATH
+        self.max_requests = max_requests or settings.MAX_REQUESTS
+        self.window = window or settings.RATE_LIMIT_WINDOW
+        self.max_clients = max_clients or settings.RATE_LIMIT_MAX_CLIENTS
+        self.stats = RateLimitStats()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        # Autocommit mode so each check runs in an explicit BEGIN IMMEDIATE transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                previous INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_last_seen ON rate_limits (last_seen)")
+
+    def hit(self, key: str, now: Optional[float] = None) -> Tuple[bool, int]:
+        """
+        Count a request of a client unless it is over the limit.
+        Returns whether the request is allowed and, when it is not, the seconds to wait.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # The write lock makes the read-modify-write atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT window, count, previous FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                state = slide_window(tuple(row) if row else None, now, self.window)
+                allowed = estimate_rate(state, now, self.window) < self.max_requests
+                if allowed:
+                    state = (state[0], state[1] + 1, state[2])
+                self._conn.execute(
+                    """
+                    INSERT INTO rate_limits (key, window, count, previous, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        window = excluded.window,
+                        count = excluded.count,
+                        previous = excluded.previous,
+                        last_seen = excluded.last_seen
+                    """,
+                    (key, *state, now)
+                )
+                evicted = self._prune(now) if now - self._last_prune >= self.window else 0
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.stats.record(allowed)
+        if evicted:
+            self.stats.record_eviction(evicted)
+        return allowed, 0 if allowed else retry_after(state, now, self.window, self.max_requests)
+
+    def _prune(self, now: float) -> int:
+        """Drop clients idle for two windows, then the least recently seen beyond max_clients."""
+        self._last_prune = now
+        evicted = self._conn.execute(
+            "DELETE FROM rate_limits WHERE last_seen < ?", (now - 2 * self.window,)
+        ).rowcount
+        evicted += self._conn.execute(
+            """
+            DELETE FROM rate_limits WHERE key IN (
+                SELECT key FROM rate_limits ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_clients,)
+        ).rowcount
+        return evicted
+
+    def clients(self) -> int:
+        """Number of clients currently tracked."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def clear(self) -> None:
+        """Forget every client."""
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_limits")
+
+_rate_limiter: Optional[Any] = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> Any:
+    """Get the process-wide rate limiter selected by RATE_LIMIT_BACKEND."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            backend = settings.RATE_LIMIT_BACKEND
+            if backend == "memory":
+                _rate_limiter = InMemoryRateLimiter()
+            elif backend == "sqlite":
+                _rate_limiter = SQLiteRateLimiter()
+            else:
+                raise ValueError(f"Unknown rate limit backend: {backend}")
+        return _rate_limiter
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Get the decision counters of the rate limiter."""
+    limiter = _rate_limiter
+    if limiter is None:
+        return {"backend": settings.RATE_LIMIT_BACKEND, "clients": 0}
+    return {"backend": settings.RATE_LIMIT_BACKEND, "clients": limiter.clients(), **limiter.stats.to_dict()}
@@ -20,6 +20,16 @@ class Settings(BaseSettings):
     )
     DB_POOL_SIZE: int = Field(default=5, description="Database connection pool size")
     DB_POOL_TIMEOUT: int = Field(default=30, description="Database connection timeout in seconds")
+    DB_JOURNAL_MODE: str = Field(default="WAL", description="SQLite journal mode")
+    DB_SYNCHRONOUS: str = Field(default="NORMAL", description="SQLite synchronous level (OFF, NORMAL, FULL)")
+    DB_MMAP_SIZE: int = Field(default=268435456, description="SQLite memory-mapped I/O size in bytes")
+    DB_CACHE_SIZE: int = Field(default=-64000, description="SQLite page cache size (negative values are KiB)")
+    DB_BUSY_TIMEOUT: int = Field(default=5000, description="SQLite busy timeout in milliseconds")
+    DB_AUTO_VACUUM: str = Field(default="INCREMENTAL", description="SQLite auto_vacuum mode of new databases (NONE, FULL, INCREMENTAL)")
+    DB_COMPRESSION_CODEC: str = Field(default="zstd", description="Codec for large stored payloads (zstd, zlib or none)")
+    DB_COMPRESSION_THRESHOLD: int = Field(default=4096, description="Minimum payload size in bytes before compressing")
+    DB_COMPRESSION_LEVEL: int = Field(default=3, description="Compression level of the payload codec")
+    DB_CREATE_TABLES: bool = Field(default=True, description="Create missing tables when the database module is imported (off while Alembic migrations run)")
     
     # Server Settings
     HOST: str = Field(default="0.0.0.0", description="Server host")
@@ -39,14 +49,40 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_WINDOW: int = Field(default=60, description="Rate limit window in seconds")
     MAX_REQUESTS: int = Field(default=100, description="Maximum requests per window")
+    RATE_LIMIT_BACKEND: str = Field(
+        default=os.getenv("RATE_LIMIT_BACKEND", "sqlite"),
+        description="Rate limit counters: memory (per process) or sqlite (shared by all workers)"
+    )
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=10000, description="Maximum number of clients tracked by the rate limiter")
+    RATE_LIMIT_PATH: str = Field(default="./rate_limit.db", description="SQLite file of the sqlite rate limit backend")
     
     # Workflow Settings
     MAX_CONCURRENT_WORKFLOWS: int = Field(default=10, description="Maximum concurrent workflows")
+    MAX_BATCH_SIZE: int = Field(default=500, description="Maximum number of workflows submitted or fetched in one batch request")
+    WORKFLOW_LIST_DEFAULT_LIMIT: int = Field(default=50, description="Default page size of the workflow listing")
+    WORKFLOW_LIST_MAX_LIMIT: int = Field(default=500, description="Maximum page size of the workflow listing")
     MAX_WORKFLOW_TIME: int = Field(default=300, description="Maximum workflow execution time in seconds")
     WORKFLOW_TYPES: List[str] = Field(
         default=["sequential", "parallel", "hybrid"],
         description="Available workflow types"
     )
+    GRAPH_CACHE_SIZE: int = Field(default=32, description="Maximum number of compiled workflow graphs kept in memory")
+    GRAPH_CACHE_WARMUP: bool = Field(default=True, description="Compile the default graph of every workflow type at startup")
+    WORKFLOW_CHECKPOINTS: bool = Field(default=True, description="Checkpoint workflow state after every node so failed workflows can be resumed")
+    STREAM_HISTORY_SIZE: int = Field(default=1000, description="Events kept per running workflow for replay to late stream subscribers")
+    STREAM_KEEPALIVE_INTERVAL: int = Field(default=15, description="Seconds between keep-alive comments on idle event streams")
+    STREAM_POLL_INTERVAL: float = Field(default=2.0, description="Seconds between status reads when streaming a workflow run by another worker")
+    
+    # Retention Settings
+    RETENTION_ENABLED: bool = Field(default=False, description="Run the retention job on a schedule inside the server")
+    RETENTION_INTERVAL: int = Field(default=3600, description="Seconds between scheduled retention runs")
+    RETENTION_TTL_DAYS: Dict[str, float] = Field(
+        default={"completed": 30, "failed": 90},
+        description="Days a workflow is kept after creation, per status; other statuses are never pruned"
+    )
+    RETENTION_ARCHIVE_DIR: str = Field(default="./archive", description="Directory of the compressed archives of pruned workflows")
+    RETENTION_BATCH_SIZE: int = Field(default=500, description="Workflows archived and deleted per write transaction")
+    RETENTION_VACUUM_PAGES: int = Field(default=2000, description="Free pages returned to the filesystem per run (0 for all)")
     
     # Agent Settings
     AVAILABLE_AGENTS: List[str] = Field(
@@ -99,6 +135,10 @@ class Settings(BaseSettings):
     )
     
     # Model Settings
+    LLM_BACKEND: str = Field(
+        default=os.getenv("LLM_BACKEND", "openai"),
+        description="LLM and tool backend: openai, or fake for offline load testing"
+    )
     MODEL_NAME: str = Field(
         default=os.getenv("MODEL_NAME", "gpt-4"),
         description="Default language model to use"
@@ -111,6 +151,35 @@ class Settings(BaseSettings):
         default=int(os.getenv("MAX_ITERATIONS", "10")),
         description="Maximum number of iterations"
     )
+    MEMORY_WINDOW_SIZE: int = Field(default=5, description="Default number of exchanges kept by windowed agent memory")
+    MEMORY_MAX_TOKENS: int = Field(default=1500, description="Default token budget of summarizing agent memory")
+    HISTORY_TOKEN_BUDGET: int = Field(default=3000, description="Default token budget of the chat history rendered into agent prompts")
+    LLM_CACHE_BACKEND: str = Field(
+        default=os.getenv("LLM_CACHE_BACKEND", "memory"),
+        description="LLM response cache backend: memory, sqlite or none"
+    )
+    LLM_CACHE_TTL: int = Field(default=3600, description="Seconds a cached LLM response stays valid")
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=1000, description="Maximum number of cached LLM responses")
+    LLM_CACHE_PATH: str = Field(default="./llm_cache.db", description="SQLite file of the sqlite LLM cache backend")
+    SEARCH_CACHE_ENABLED: bool = Field(default=True, description="Cache web and SerpAPI search results")
+    SEARCH_CACHE_TTL: int = Field(default=3600, description="Seconds a cached search result stays valid")
+    SEARCH_CACHE_MAX_ENTRIES: int = Field(default=1000, description="Maximum number of cached search results")
+    SEARCH_CACHE_PATH: str = Field(default="", description="SQLite file persisting the search cache (empty for memory only)")
+    LLM_MAX_CONNECTIONS: int = Field(default=20, description="Maximum open connections in the shared LLM HTTP pool")
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10, description="Maximum idle keep-alive connections in the shared LLM HTTP pool")
+    LLM_REQUEST_TIMEOUT: float = Field(default=60.0, description="Timeout in seconds for LLM HTTP requests")
+    
+    # Fake Backend Settings (LLM_BACKEND=fake)
+    FAKE_LLM_SCRIPT: str = Field(
+        default=os.getenv("FAKE_LLM_SCRIPT", ""),
+        description="JSON file of scripted fake LLM responses; seeded-random responses when empty"
+    )
+    FAKE_LLM_SEED: int = Field(default=int(os.getenv("FAKE_LLM_SEED", "42")), description="Seed of the fake LLM and tools")
+    FAKE_LLM_TOOL_CALL_PROBABILITY: float = Field(default=0.5, description="Probability that a random fake response calls a tool")
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = Field(default="lognormal", description="Fake latency distribution: fixed, uniform or lognormal")
+    FAKE_LLM_LATENCY_MEAN: float = Field(default=0.5, description="Mean fake LLM call latency in seconds")
+    FAKE_LLM_LATENCY_STDDEV: float = Field(default=0.2, description="Standard deviation of fake latencies in seconds")
+    FAKE_TOOL_LATENCY_MEAN: float = Field(default=0.2, description="Mean fake tool call latency in seconds")
     
     # Storage Settings
     CHROMA_PERSIST_DIRECTORY: str = Field(
@@ -166,6 +235,28 @@ class Settings(BaseSettings):
         description="Slack webhook URL"
     )
     
+    # Integration HTTP Client Settings
+    HTTP_CLIENT_MAX_CONNECTIONS: int = Field(default=100, description="Maximum open connections of the shared integration HTTP pool")
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, description="Maximum idle keep-alive connections of the shared integration HTTP pool")
+    HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST: int = Field(default=10, description="Maximum concurrent requests to one host")
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Seconds an idle connection is kept open")
+    HTTP_CLIENT_TIMEOUT: float = Field(default=10.0, description="Default timeout in seconds of integration requests")
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = Field(default=5.0, description="Timeout in seconds of opening a connection")
+    HTTP_CLIENT_HTTP2: bool = Field(default=False, description="Negotiate HTTP/2 when the h2 package is installed")
+    
+    # Webhook Outbox Settings
+    WEBHOOK_DISPATCHER_ENABLED: bool = Field(default=True, description="Deliver queued webhooks from a background task of the server")
+    WEBHOOK_POLL_INTERVAL: float = Field(default=5.0, description="Seconds between outbox polls when no delivery is queued by this process")
+    WEBHOOK_BATCH_SIZE: int = Field(default=50, description="Deliveries claimed from the outbox per poll")
+    WEBHOOK_DESTINATION_CONCURRENCY: int = Field(default=4, description="Concurrent requests per webhook destination")
+    WEBHOOK_TIMEOUT: float = Field(default=10.0, description="Timeout in seconds of a webhook request")
+    WEBHOOK_MAX_ATTEMPTS: int = Field(default=8, description="Attempts before a delivery is marked failed")
+    WEBHOOK_BACKOFF_BASE: float = Field(default=2.0, description="Seconds before the first retry, doubled after every failed attempt")
+    WEBHOOK_BACKOFF_MAX: float = Field(default=900.0, description="Maximum seconds between retries")
+    NOTIFICATION_DESTINATIONS: List[str] = Field(default=[], description="Destinations notified of finished workflows: slack, notion")
+    NOTIFICATION_DIGEST_WINDOW: float = Field(default=60.0, description="Seconds a notification waits for others to share its digest")
+    NOTIFICATION_DIGEST_MAX_EVENTS: int = Field(default=50, description="Notifications that trigger a digest before the window ends")
+    
     # Python Path
     PYTHONPATH: str = Field(
         default=os.getenv("PYTHONPATH", ""),
@@ -0,0 +1,158 @@
+# core/async_database.py
+"""
+Awaitable persistence helpers for the API handlers.
+
+Each helper runs its synchronous counterpart from core.database on a bounded
+thread pool sized to the database connections, so a slow query or a writer
+waiting on the SQLite lock never blocks the event loop.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from datetime import datetime
+import asyncio
+import contextvars
+import functools
+import threading
+import logging
+from sqlalchemy import text
+from config import settings
+from core import database
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Lazily create the pool: one thread per reader connection plus the writer."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DB_POOL_SIZE + 1,
+                thread_name_prefix="database"
+            )
+        return _executor
+
+async def run_in_db_thread(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking database call on the database thread pool."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context variables over to the worker thread
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+async def save_workflow_state(
+    input_data: Dict[str, Any],
+    state_data: Dict[str, Any],
+    messages: List[str],
+    workflow_type: str,
+    status: str = "pending",
+    agents: Optional[List[str]] = None
+) -> int:
+    """Save workflow state to database without blocking the event loop."""
+    return await run_in_db_thread(
+        database.save_workflow_state,
+        input_data=input_data,
+        state_data=state_data,
+        messages=messages,
+        workflow_type=workflow_type,
+        status=status,
+        agents=agents
+    )
+
+async def save_workflow_states(workflows: List[Dict[str, Any]]) -> List[int]:
+    """Save many workflows in one transaction without blocking the event loop."""
+    return await run_in_db_thread(database.save_workflow_states, workflows)
+
+async def get_workflow_state(
+    state_id: int,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    tail: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Get workflow state, optionally a range or tail of its messages, without blocking the event loop."""
+    return await run_in_db_thread(
+        database.get_workflow_state,
+        state_id,
+        offset=offset,
+        limit=limit,
+        tail=tail
+    )
+
+async def update_workflow_state(
+    state_id: int,
+    state_data: Dict[str, Any],
+    messages: Optional[List[str]],
+    status: str
+) -> bool:
+    """Update the stored state, messages and status of a workflow without blocking the event loop."""
+    return await run_in_db_thread(
+        database.update_workflow_state,
+        state_id=state_id,
+        state_data=state_data,
+        messages=messages,
+        status=status
+    )
+
+async def update_workflow_status(state_id: int, status: str, expected_status: Optional[str] = None) -> bool:
+    """Update workflow status without blocking the event loop."""
+    return await run_in_db_thread(database.update_workflow_status, state_id, status, expected_status)
+
+async def list_workflow_states(
+    status: Optional[str] = None,
+    workflow_type: Optional[str] = None,
+    agent: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """List workflows newest first without blocking the event loop."""
+    return await run_in_db_thread(
+        database.list_workflow_states,
+        status=status,
+        workflow_type=workflow_type,
+        agent=agent,
+        created_after=created_after,
+        created_before=created_before,
+        cursor=cursor,
+        limit=limit
+    )
+
+async def fetch_workflow_states(
+    state_ids: List[int],
+    fields: Optional[List[str]] = None,
+    data_store_keys: Optional[List[str]] = None
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Fetch selected fields of many workflows without blocking the event loop."""
+    return await run_in_db_thread(
+        database.fetch_workflow_states,
+        state_ids,
+        fields=fields,
+        data_store_keys=data_store_keys
+    )
+
+async def get_storage_stats() -> Dict[str, Any]:
+    """Get database size and payload compression metrics without blocking the event loop."""
+    return await run_in_db_thread(database.get_storage_stats)
+
+def _check_connection() -> None:
+    with database.get_db() as db:
+        db.execute(text("SELECT 1"))
+
+async def check_connection() -> None:
+    """Run a trivial query on the read pool."""
+    await run_in_db_thread(_check_connection)
+
+def shutdown_db_executor(wait: bool = False) -> None:
+    """Release the database thread pool."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
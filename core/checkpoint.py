@@ -0,0 +1,129 @@
+# core/checkpoint.py
+"""LangGraph checkpoints of workflow runs, stored in the application's SQLite database."""
+from typing import Dict, Any, Optional, Sequence, AsyncIterator
+import asyncio
+import sqlite3
+import threading
+import logging
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from config import settings
+from core.database import write_engine, apply_sqlite_pragmas, _write_lock
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+class WorkflowCheckpointSaver(SqliteSaver):
+    """
+    SqliteSaver usable from the workers' event loops.
+    Workers stream graphs with astream_events, which needs the async checkpoint
+    methods; they run the (lock-protected) sync methods on a thread instead of
+    opening an aiosqlite connection per event loop. Writes queue on the app's
+    writer lock rather than contending for the SQLite lock through busy_timeout.
+    """
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Dict[str, Any],
+        metadata: Dict[str, Any],
+        new_versions: Dict[str, Any]
+    ) -> RunnableConfig:
+        with _write_lock:
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Any],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        with _write_lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with _write_lock:
+            super().delete_thread(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Dict[str, Any],
+        metadata: Dict[str, Any],
+        new_versions: Dict[str, Any]
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Any],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+def thread_config(state_id: int) -> RunnableConfig:
+    """Run config selecting the checkpoint thread of a workflow."""
+    return {"configurable": {"thread_id": str(state_id)}}
+
+_checkpointer: Optional[WorkflowCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+def get_checkpointer() -> Optional[WorkflowCheckpointSaver]:
+    """
+    Get the process-wide checkpointer, or None when WORKFLOW_CHECKPOINTS is off
+    or the database is not a SQLite file.
+    """
+    global _checkpointer
+    if not settings.WORKFLOW_CHECKPOINTS:
+        return None
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            path = write_engine.url.database
+            if write_engine.dialect.name != "sqlite" or not path or path == ":memory:":
+                logger.warning("Workflow checkpoints need a SQLite database file; checkpointing disabled")
+                return None
+            # Own connection next to the app's writer; concurrent writes wait on busy_timeout
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=settings.DB_POOL_TIMEOUT)
+            apply_sqlite_pragmas(conn)
+            _checkpointer = WorkflowCheckpointSaver(conn)
+            _checkpointer.setup()
+        return _checkpointer
+
+def has_checkpoint(state_id: int) -> bool:
+    """Whether a workflow has a checkpoint to resume from."""
+    checkpointer = get_checkpointer()
+    return checkpointer is not None and checkpointer.get_tuple(thread_config(state_id)) is not None
+
+def delete_checkpoints(state_id: int) -> None:
+    """Drop every checkpoint of a workflow."""
+    checkpointer = get_checkpointer()
+    if checkpointer is not None:
+        checkpointer.delete_thread(str(state_id))
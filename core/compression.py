@@ -0,0 +1,117 @@
+# core/compression.py
+"""Compression of large stored payloads, with process-wide ratio metrics."""
+from typing import Dict, Any, Optional
+import threading
+import zlib
+import logging
+from config import settings
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# One-byte tags prefixed to compressed payloads
+ZLIB_TAG = b"z"
+ZSTD_TAG = b"s"
+
+_local = threading.local()
+
+def get_codec() -> str:
+    """Get the configured codec, falling back to zlib when zstandard is not installed."""
+    codec = settings.DB_COMPRESSION_CODEC
+    if codec == "zstd" and zstandard is None:
+        return "zlib"
+    return codec
+
+def _zstd_compressor() -> Any:
+    # zstandard compressors are not safe to share between threads
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=settings.DB_COMPRESSION_LEVEL)
+    return compressor
+
+def _zstd_decompressor() -> Any:
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+class CompressionStats:
+    """Thread-safe counters of the payloads encoded by this process."""
+
+    def __init__(self):
+        self.values = 0
+        self.compressed_values = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, raw_size: int, stored_size: int, compressed: bool) -> None:
+        with self._lock:
+            self.values += 1
+            self.raw_bytes += raw_size
+            self.stored_bytes += stored_size
+            if compressed:
+                self.compressed_values += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "codec": get_codec(),
+                "threshold_bytes": settings.DB_COMPRESSION_THRESHOLD,
+                "values": self.values,
+                "compressed_values": self.compressed_values,
+                "raw_bytes": self.raw_bytes,
+                "stored_bytes": self.stored_bytes,
+                "compression_ratio": self.raw_bytes / self.stored_bytes if self.stored_bytes else 1.0
+            }
+
+# Shared counters reported by /metrics
+compression_stats = CompressionStats()
+
+def compress(data: str, codec: Optional[str] = None, threshold: Optional[int] = None) -> Any:
+    """
+    Compress a text payload when it is at least threshold bytes long.
+    Returns the text unchanged below the threshold (or when compression does not
+    help), otherwise tagged compressed bytes.
+    """
+    codec = codec or get_codec()
+    threshold = settings.DB_COMPRESSION_THRESHOLD if threshold is None else threshold
+    raw = data.encode("utf-8")
+
+    stored: Any = data
+    if codec != "none" and len(raw) >= threshold:
+        if codec == "zstd":
+            packed = ZSTD_TAG + _zstd_compressor().compress(raw)
+        elif codec == "zlib":
+            packed = ZLIB_TAG + zlib.compress(raw, settings.DB_COMPRESSION_LEVEL)
+        else:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        if len(packed) < len(raw):
+            stored = packed
+
+    compressed = isinstance(stored, bytes)
+    compression_stats.record(len(raw), len(stored) if compressed else len(raw), compressed)
+    return stored
+
+def decompress(value: Any) -> str:
+    """Restore the text of a payload written by compress."""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    tag, body = value[:1], value[1:]
+    if tag == ZSTD_TAG:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed payloads")
+        return _zstd_decompressor().decompress(body).decode("utf-8")
+    if tag == ZLIB_TAG:
+        return zlib.decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown compressed payload tag: {tag!r}")
@@ -1,14 +1,22 @@
 # core/database.py
-from sqlalchemy import create_engine, Column, Integer, String, Text, JSON, event
+from sqlalchemy import (
+    create_engine, Column, Integer, String, Text, JSON, DateTime, ForeignKey,
+    Index, event, and_, or_, update, insert, func, text
+)
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker, Session, deferred, undefer_group
+from sqlalchemy.exc import SQLAlchemyError, StatementError
 import json
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+import base64
+import binascii
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, timedelta, timezone
 import logging
+import threading
 from contextlib import contextmanager
 from config import settings
+from core.compression import compress, decompress, compression_stats
 
 # Initialize logging
 logging.basicConfig(
@@ -17,16 +25,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_serializer(value: Any) -> str:
+    """Encode a JSON column value; orjson when installed, compact json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def json_deserializer(value: str) -> Any:
+    """Decode a JSON column value."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON column that compresses documents of at least DB_COMPRESSION_THRESHOLD bytes.
+    Small documents stay plain JSON text; large ones are stored as tagged
+    compressed blobs, which SQLite keeps side by side in the same column.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        return compress(json_serializer(value))
+
+    def process_result_value(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        return json_deserializer(decompress(value))
+
 # Initialize SQLite Database
+# Readers share a pool of read-only connections; all writes go through a single
+# writer connection so concurrent writers queue instead of failing with
+# "database is locked". With WAL journaling readers never block on the writer.
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={
         "check_same_thread": False,
         "timeout": settings.DB_POOL_TIMEOUT
     },
-    pool_size=settings.DB_POOL_SIZE
+    pool_size=settings.DB_POOL_SIZE,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer
+)
+write_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": settings.DB_POOL_TIMEOUT
+    },
+    pool_size=1,
+    max_overflow=0,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+
+# Serializes writers within this process; other processes wait on busy_timeout
+_write_lock = threading.Lock()
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """Apply the tuned SQLite profile to a new connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            # Only takes effect on a new database, before journal_mode writes its header
+            cursor.execute(f"PRAGMA auto_vacuum={settings.DB_AUTO_VACUUM}")
+        cursor.execute(f"PRAGMA journal_mode={settings.DB_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.DB_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.DB_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT)}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def configure_reader(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+    @event.listens_for(write_engine, "connect")
+    def configure_writer(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+        # Let SQLAlchemy emit BEGIN itself (see begin_immediate)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine, "begin")
+    def begin_immediate(conn):
+        # Take the write lock when the transaction starts rather than upgrading a
+        # read lock later, which fails immediately instead of waiting on busy_timeout
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
 
 Base = declarative_base()
 
@@ -35,33 +134,109 @@ class WorkflowState(Base):
     __tablename__ = "workflow_states"
 
     id = Column(Integer, primary_key=True, index=True)
-    input_data = Column(Text, nullable=False)
-    state_data = Column(JSON, nullable=False)
-    messages = Column(JSON, nullable=False)
+    # Payload columns are encoded once by the JSON codec (large state and messages
+    # are also compressed) and only loaded by queries asking for the "payload" group
+    input_data = deferred(Column(JSON, nullable=False), group="payload")
+    state_data = deferred(Column(CompressedJSON, nullable=False), group="payload")
+    messages = deferred(Column(CompressedJSON, nullable=False), group="payload")
     workflow_type = Column(String, nullable=False)
     status = Column(String, nullable=False, default="pending")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Listing filters on one of these columns and pages by (created_at, id);
+    # SQLite appends the rowid (id) to every index, so each one covers the sort
+    __table_args__ = (
+        Index("ix_workflow_states_created_at", "created_at"),
+        Index("ix_workflow_states_status_created_at", "status", "created_at"),
+        Index("ix_workflow_states_workflow_type_created_at", "workflow_type", "created_at"),
+    )
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert DB record to dictionary."""
-        try:
-            return {
-                "id": self.id,
-                "input_data": json.loads(self.input_data) if isinstance(self.input_data, str) else self.input_data,
-                "state_data": json.loads(self.state_data) if isinstance(self.state_data, str) else self.state_data,
-                "messages": json.loads(self.messages) if isinstance(self.messages, str) else self.messages,
-                "workflow_type": self.workflow_type,
-                "status": self.status
-            }
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in to_dict: {e}")
-            raise ValueError(f"Invalid JSON data in workflow state: {e}")
-        except Exception as e:
-            logger.error(f"Error in to_dict: {e}")
-            raise
+        return {
+            "id": self.id,
+            "input_data": self.input_data,
+            "state_data": self.state_data,
+            "messages": self.messages,
+            "workflow_type": self.workflow_type,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+def _is_encode_error(error: StatementError) -> bool:
+    """Whether a statement failed while encoding a JSON parameter."""
+    return isinstance(error.orig, (TypeError, ValueError))
+
+class WorkflowStateAgent(Base):
+    """Agents taking part in a workflow, indexed for listing workflows by agent."""
+    __tablename__ = "workflow_state_agents"
+
+    state_id = Column(Integer, ForeignKey("workflow_states.id", ondelete="CASCADE"), primary_key=True)
+    agent = Column(String, primary_key=True)
+    # Copy of the workflow's created_at so agent listings page through one index
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_workflow_state_agents_agent_created_at", "agent", "created_at", "state_id"),
+    )
+
+class WorkflowEvent(Base):
+    """
+    Append-only transcript of a workflow run, one row per message.
+    seq numbers a workflow's messages 0, 1, 2, ... so ranges and tails are index lookups.
+    """
+    __tablename__ = "workflow_events"
+
+    id = Column(Integer, primary_key=True)
+    state_id = Column(Integer, ForeignKey("workflow_states.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    node = Column(String, nullable=True)
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    ts = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_workflow_events_state_id_seq", "state_id", "seq", unique=True),
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert DB record to dictionary."""
+        return {
+            "seq": self.seq,
+            "node": self.node,
+            "role": self.role,
+            "content": self.content,
+            "ts": self.ts.isoformat() if self.ts else None
+        }
+
+class WebhookOutbox(Base):
+    """
+    Outgoing webhook deliveries waiting for the dispatcher.
+    A row stays pending until its request succeeds, when it is deleted, or it
+    runs out of attempts and is kept as failed. Claimed rows are leased by
+    moving next_attempt_at forward, so a crashed dispatcher's rows are retried.
+    """
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True)
+    destination = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_webhook_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
 
 @contextmanager
 def get_db():
-    """Database session context manager with error handling."""
+    """Read-only database session context manager with error handling."""
     db = SessionLocal()
     try:
         yield db
@@ -72,30 +247,61 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def get_write_db():
+    """Database session on the single writer connection, held exclusively until closed."""
+    with _write_lock:
+        db = WriteSessionLocal()
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
 def save_workflow_state(
     input_data: Dict[str, Any],
     state_data: Dict[str, Any],
     messages: List[str],
     workflow_type: str,
-    status: str = "pending"
+    status: str = "pending",
+    agents: Optional[List[str]] = None
 ) -> int:
-    """Save workflow state to database with error handling."""
+    """
+    Save workflow state to database with error handling.
+    agents defaults to the "agents" entry of state_data.
+    """
     try:
-        with get_db() as db:
+        with get_write_db() as db:
+            created_at = datetime.utcnow()
             workflow_state = WorkflowState(
-                input_data=json.dumps(input_data),
-                state_data=json.dumps(state_data),
-                messages=json.dumps(messages),
+                input_data=input_data,
+                state_data=state_data,
+                messages=messages,
                 workflow_type=workflow_type,
-                status=status
+                status=status,
+                created_at=created_at,
+                updated_at=created_at
             )
             db.add(workflow_state)
+            db.flush()
+            if agents is None:
+                agents = state_data.get("agents") or []
+            db.add_all([
+                WorkflowStateAgent(state_id=workflow_state.id, agent=agent, created_at=created_at)
+                for agent in dict.fromkeys(agents)
+            ])
+            state_id = workflow_state.id
             db.commit()
-            db.refresh(workflow_state)
-            return workflow_state.id
-    except json.JSONDecodeError as e:
+            return state_id
+    except StatementError as e:
+        if not _is_encode_error(e):
+            logger.error(f"Database error in save_workflow_state: {e}")
+            raise
         logger.error(f"JSON encode error in save_workflow_state: {e}")
-        raise ValueError(f"Invalid data for workflow state: {e}")
+        raise ValueError(f"Invalid data for workflow state: {e.orig}")
     except SQLAlchemyError as e:
         logger.error(f"Database error in save_workflow_state: {e}")
         raise
@@ -103,14 +309,113 @@ def save_workflow_state(
         logger.error(f"Unexpected error in save_workflow_state: {e}")
         raise
 
-def get_workflow_state(state_id: int) -> Optional[Dict[str, Any]]:
-    """Get workflow state from database with error handling."""
+def save_workflow_states(workflows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Save many workflows in one transaction with bulk inserts.
+    Each entry takes the arguments of save_workflow_state. Returns the new ids
+    in input order; nothing is saved if any entry fails.
+    """
+    if not workflows:
+        return []
+    try:
+        with get_write_db() as db:
+            created_at = datetime.utcnow()
+            state_ids = db.execute(
+                insert(WorkflowState).returning(WorkflowState.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "input_data": workflow["input_data"],
+                        "state_data": workflow["state_data"],
+                        "messages": workflow.get("messages", []),
+                        "workflow_type": workflow["workflow_type"],
+                        "status": workflow.get("status", "pending"),
+                        "created_at": created_at,
+                        "updated_at": created_at
+                    }
+                    for workflow in workflows
+                ]
+            ).scalars().all()
+            agent_rows = [
+                {"state_id": state_id, "agent": agent, "created_at": created_at}
+                for state_id, workflow in zip(state_ids, workflows)
+                for agent in dict.fromkeys(
+                    workflow.get("agents") or workflow["state_data"].get("agents") or []
+                )
+            ]
+            if agent_rows:
+                db.execute(insert(WorkflowStateAgent), agent_rows)
+            db.commit()
+            return list(state_ids)
+    except StatementError as e:
+        if not _is_encode_error(e):
+            logger.error(f"Database error in save_workflow_states: {e}")
+            raise
+        logger.error(f"JSON encode error in save_workflow_states: {e}")
+        raise ValueError(f"Invalid data for workflow state: {e.orig}")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in save_workflow_states: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in save_workflow_states: {e}")
+        raise
+
+def _message_range(
+    count: int,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    tail: Optional[int] = None
+) -> Tuple[int, int]:
+    """Resolve offset/limit or tail to the [start, stop) positions of a transcript of count messages."""
+    if tail is not None:
+        return max(count - tail, 0), count
+    start = min(offset or 0, count)
+    stop = count if limit is None else min(start + limit, count)
+    return start, stop
+
+def get_workflow_state(
+    state_id: int,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    tail: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Get workflow state from database with error handling.
+    Messages are rebuilt from the workflow's event rows (the stored messages
+    column for workflows without events). Pass offset/limit for a range of the
+    transcript or tail for its last messages; message_count is the full length.
+    """
     try:
         with get_db() as db:
-            workflow_state = db.query(WorkflowState).filter(WorkflowState.id == state_id).first()
-            if workflow_state:
-                return workflow_state.to_dict()
-            return None
+            workflow_state = (
+                db.query(WorkflowState)
+                .options(undefer_group("payload"))
+                .filter(WorkflowState.id == state_id)
+                .first()
+            )
+            if not workflow_state:
+                return None
+            result = workflow_state.to_dict()
+
+            # seq is contiguous from 0, so the count and any range come straight off the index
+            last_seq = db.query(func.max(WorkflowEvent.seq)).filter(WorkflowEvent.state_id == state_id).scalar()
+            if last_seq is None:
+                messages = result["messages"] or []
+                start, stop = _message_range(len(messages), offset, limit, tail)
+                result["messages"] = messages[start:stop]
+                result["message_count"] = len(messages)
+            else:
+                start, stop = _message_range(last_seq + 1, offset, limit, tail)
+                result["messages"] = [
+                    content for (content,) in db.query(WorkflowEvent.content)
+                    .filter(
+                        WorkflowEvent.state_id == state_id,
+                        WorkflowEvent.seq >= start,
+                        WorkflowEvent.seq < stop
+                    )
+                    .order_by(WorkflowEvent.seq)
+                ]
+                result["message_count"] = last_seq + 1
+            return result
     except SQLAlchemyError as e:
         logger.error(f"Database error in get_workflow_state: {e}")
         raise
@@ -118,16 +423,91 @@ def get_workflow_state(state_id: int) -> Optional[Dict[str, Any]]:
         logger.error(f"Unexpected error in get_workflow_state: {e}")
         raise
 
-def update_workflow_status(state_id: int, status: str) -> bool:
-    """Update workflow status with error handling."""
+def append_workflow_events(state_id: int, events: List[Dict[str, Any]]) -> int:
+    """
+    Append messages to a workflow's transcript in one transaction.
+    Each event has "role" and "content" and optionally "node". Appending costs
+    the same however long the transcript already is. Returns the new message count.
+    """
+    if not events:
+        return 0
     try:
-        with get_db() as db:
-            workflow_state = db.query(WorkflowState).filter(WorkflowState.id == state_id).first()
-            if workflow_state:
-                workflow_state.status = status
-                db.commit()
-                return True
-            return False
+        with get_write_db() as db:
+            # Writes are serialized, so max(seq) + 1 cannot race with another append
+            last_seq = db.query(func.max(WorkflowEvent.seq)).filter(WorkflowEvent.state_id == state_id).scalar()
+            first_seq = 0 if last_seq is None else last_seq + 1
+            ts = datetime.utcnow()
+            db.execute(insert(WorkflowEvent), [
+                {
+                    "state_id": state_id,
+                    "seq": first_seq + i,
+                    "node": event.get("node"),
+                    "role": event["role"],
+                    "content": event["content"],
+                    "ts": ts
+                }
+                for i, event in enumerate(events)
+            ])
+            db.commit()
+            return first_seq + len(events)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in append_workflow_events: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in append_workflow_events: {e}")
+        raise
+
+def update_workflow_state(
+    state_id: int,
+    state_data: Dict[str, Any],
+    messages: Optional[List[str]],
+    status: str
+) -> bool:
+    """
+    Update the stored state, messages and status of an existing workflow.
+    Pass messages=None to leave the messages column alone, e.g. for workflows
+    whose transcript is kept as event rows.
+    """
+    values = {"state_data": state_data, "status": status, "updated_at": datetime.utcnow()}
+    if messages is not None:
+        values["messages"] = messages
+    try:
+        with get_write_db() as db:
+            result = db.execute(
+                update(WorkflowState)
+                .where(WorkflowState.id == state_id)
+                .values(**values)
+            )
+            db.commit()
+            return result.rowcount > 0
+    except StatementError as e:
+        if not _is_encode_error(e):
+            logger.error(f"Database error in update_workflow_state: {e}")
+            raise
+        logger.error(f"JSON encode error in update_workflow_state: {e}")
+        raise ValueError(f"Invalid data for workflow state: {e.orig}")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in update_workflow_state: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in update_workflow_state: {e}")
+        raise
+
+def update_workflow_status(state_id: int, status: str, expected_status: Optional[str] = None) -> bool:
+    """
+    Update workflow status with error handling.
+    With expected_status, only a workflow currently in that status is updated,
+    so concurrent callers cannot both claim the same transition.
+    """
+    try:
+        with get_write_db() as db:
+            # Update in place without loading (and decoding) the payload columns
+            statement = update(WorkflowState).where(WorkflowState.id == state_id)
+            if expected_status is not None:
+                statement = statement.where(WorkflowState.status == expected_status)
+            result = db.execute(statement.values(status=status, updated_at=datetime.utcnow()))
+            db.commit()
+            return result.rowcount > 0
     except SQLAlchemyError as e:
         logger.error(f"Database error in update_workflow_status: {e}")
         raise
@@ -135,11 +515,308 @@ def update_workflow_status(state_id: int, status: str) -> bool:
         logger.error(f"Unexpected error in update_workflow_status: {e}")
         raise
 
+def enqueue_webhooks(deliveries: List[Dict[str, Any]]) -> List[int]:
+    """
+    Queue webhook deliveries in one transaction.
+    Each delivery has "destination", "url" and "payload". Returns the new outbox ids.
+    """
+    if not deliveries:
+        return []
+    try:
+        with get_write_db() as db:
+            now = datetime.utcnow()
+            outbox_ids = db.execute(
+                insert(WebhookOutbox).returning(WebhookOutbox.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "destination": delivery["destination"],
+                        "url": delivery["url"],
+                        "payload": delivery["payload"],
+                        "status": "pending",
+                        "attempts": 0,
+                        "next_attempt_at": now,
+                        "created_at": now
+                    }
+                    for delivery in deliveries
+                ]
+            ).scalars().all()
+            db.commit()
+            return list(outbox_ids)
+    except StatementError as e:
+        if not _is_encode_error(e):
+            logger.error(f"Database error in enqueue_webhooks: {e}")
+            raise
+        logger.error(f"JSON encode error in enqueue_webhooks: {e}")
+        raise ValueError(f"Invalid webhook payload: {e.orig}")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in enqueue_webhooks: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in enqueue_webhooks: {e}")
+        raise
+
+def claim_webhooks(limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Claim up to limit due deliveries, oldest first, and count the attempt.
+    Claimed rows are not due again for lease_seconds, the time the caller has
+    to complete or reschedule them.
+    """
+    try:
+        with get_write_db() as db:
+            now = datetime.utcnow()
+            due = (
+                db.query(WebhookOutbox.id)
+                .filter(WebhookOutbox.status == "pending", WebhookOutbox.next_attempt_at <= now)
+                .order_by(WebhookOutbox.next_attempt_at)
+                .limit(limit)
+                .scalar_subquery()
+            )
+            rows = db.execute(
+                update(WebhookOutbox)
+                .where(WebhookOutbox.id.in_(due))
+                .values(
+                    attempts=WebhookOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=lease_seconds)
+                )
+                .returning(
+                    WebhookOutbox.id,
+                    WebhookOutbox.destination,
+                    WebhookOutbox.url,
+                    WebhookOutbox.payload,
+                    WebhookOutbox.attempts
+                )
+            ).mappings().all()
+            db.commit()
+            return sorted((dict(row) for row in rows), key=lambda row: row["id"])
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in claim_webhooks: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in claim_webhooks: {e}")
+        raise
+
+def complete_webhook(outbox_id: int) -> None:
+    """Remove a delivered webhook from the outbox."""
+    try:
+        with get_write_db() as db:
+            db.query(WebhookOutbox).filter(WebhookOutbox.id == outbox_id).delete()
+            db.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in complete_webhook: {e}")
+        raise
+
+def reschedule_webhook(outbox_id: int, error: str, next_attempt_at: Optional[datetime]) -> None:
+    """Record a failed attempt; retry at next_attempt_at, or give up when it is None."""
+    values: Dict[str, Any] = {"last_error": error}
+    if next_attempt_at is None:
+        values["status"] = "failed"
+    else:
+        values["next_attempt_at"] = next_attempt_at
+    try:
+        with get_write_db() as db:
+            db.execute(update(WebhookOutbox).where(WebhookOutbox.id == outbox_id).values(**values))
+            db.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in reschedule_webhook: {e}")
+        raise
+
+def get_webhook_outbox_counts() -> Dict[str, int]:
+    """Count the outbox rows of each status."""
+    with get_db() as db:
+        return dict(
+            db.query(WebhookOutbox.status, func.count()).group_by(WebhookOutbox.status).all()
+        )
+
+def get_storage_stats() -> Dict[str, Any]:
+    """Get the on-disk size of the database and the payload compression counters."""
+    stats = compression_stats.to_dict()
+    if engine.dialect.name == "sqlite":
+        with get_db() as db:
+            page_size = db.execute(text("PRAGMA page_size")).scalar()
+            page_count = db.execute(text("PRAGMA page_count")).scalar()
+            freelist_count = db.execute(text("PRAGMA freelist_count")).scalar()
+        stats["database_bytes"] = page_size * page_count
+        stats["free_bytes"] = page_size * freelist_count
+    return stats
+
+# Fields that fetch_workflow_states can project, and their columns
+FETCH_FIELDS = {
+    "status": WorkflowState.status,
+    "workflow_type": WorkflowState.workflow_type,
+    "created_at": WorkflowState.created_at,
+    "updated_at": WorkflowState.updated_at,
+    "input_data": WorkflowState.input_data,
+    "data_store": WorkflowState.state_data,
+    "agents": None
+}
+DEFAULT_FETCH_FIELDS = ("status", "workflow_type", "agents", "created_at", "updated_at")
+
+def fetch_workflow_states(
+    state_ids: List[int],
+    fields: Optional[List[str]] = None,
+    data_store_keys: Optional[List[str]] = None
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Fetch selected fields of many workflows with one IN query.
+    Only the requested columns are read and decoded; data_store_keys narrows
+    data_store to those keys. Returns the found workflows in request order and
+    the ids that do not exist. Raises ValueError for unknown fields.
+    """
+    fields = list(dict.fromkeys(fields or DEFAULT_FETCH_FIELDS))
+    if data_store_keys is not None and "data_store" not in fields:
+        fields.append("data_store")
+    unknown = [field for field in fields if field not in FETCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}; expected any of {', '.join(FETCH_FIELDS)}")
+    state_ids = list(dict.fromkeys(state_ids))
+    columns = [field for field in fields if FETCH_FIELDS[field] is not None]
+
+    try:
+        with get_db() as db:
+            rows = db.query(
+                WorkflowState.id, *(FETCH_FIELDS[field].label(field) for field in columns)
+            ).filter(WorkflowState.id.in_(state_ids)).all()
+            found: Dict[int, Dict[str, Any]] = {}
+            for row in rows:
+                item = {"id": row.id}
+                for field in columns:
+                    value = getattr(row, field)
+                    if isinstance(value, datetime):
+                        value = value.isoformat()
+                    elif field == "data_store" and data_store_keys is not None:
+                        value = {key: value[key] for key in data_store_keys if key in value}
+                    item[field] = value
+                found[row.id] = item
+
+            if "agents" in fields and found:
+                for item in found.values():
+                    item["agents"] = []
+                for state_id, agent in db.query(
+                    WorkflowStateAgent.state_id, WorkflowStateAgent.agent
+                ).filter(WorkflowStateAgent.state_id.in_(list(found))):
+                    found[state_id]["agents"].append(agent)
+
+            items = [found[state_id] for state_id in state_ids if state_id in found]
+            missing = [state_id for state_id in state_ids if state_id not in found]
+            return items, missing
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in fetch_workflow_states: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in fetch_workflow_states: {e}")
+        raise
+
+def encode_cursor(created_at: datetime, state_id: int) -> str:
+    """Encode the position after a listed workflow as an opaque page cursor."""
+    raw = json.dumps([created_at.isoformat(), state_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a page cursor; raises ValueError when it is malformed."""
+    try:
+        created_at, state_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(state_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC stored in the timestamp columns."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def list_workflow_states(
+    status: Optional[str] = None,
+    workflow_type: Optional[str] = None,
+    agent: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    List workflows newest first, without their state payloads.
+    Pages by keyset on (created_at, id): pass the returned cursor to get the next
+    page, which is None after the last one. Every filter is served by an index,
+    so a page costs the same at any depth.
+    """
+    created_after, created_before = _as_naive_utc(created_after), _as_naive_utc(created_before)
+    try:
+        with get_db() as db:
+            query = db.query(
+                WorkflowState.id,
+                WorkflowState.workflow_type,
+                WorkflowState.status,
+                WorkflowState.created_at,
+                WorkflowState.updated_at
+            )
+            if agent is not None:
+                # Sort on the association's columns so the scan is driven by its
+                # (agent, created_at, state_id) index rather than a status index
+                sort_key, id_key = WorkflowStateAgent.created_at, WorkflowStateAgent.state_id
+                query = query.join(
+                    WorkflowStateAgent,
+                    and_(WorkflowStateAgent.state_id == WorkflowState.id, WorkflowStateAgent.agent == agent)
+                )
+            else:
+                sort_key, id_key = WorkflowState.created_at, WorkflowState.id
+            if status is not None:
+                query = query.filter(WorkflowState.status == status)
+            if workflow_type is not None:
+                query = query.filter(WorkflowState.workflow_type == workflow_type)
+            if created_after is not None:
+                query = query.filter(sort_key >= created_after)
+            if created_before is not None:
+                query = query.filter(sort_key < created_before)
+            if cursor is not None:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+                query = query.filter(or_(
+                    sort_key < cursor_created_at,
+                    and_(sort_key == cursor_created_at, id_key < cursor_id)
+                ))
+
+            rows = query.order_by(sort_key.desc(), id_key.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            agents: Dict[int, List[str]] = {row.id: [] for row in rows}
+            if rows:
+                for state_id, agent_name in db.query(
+                    WorkflowStateAgent.state_id, WorkflowStateAgent.agent
+                ).filter(WorkflowStateAgent.state_id.in_(list(agents))):
+                    agents[state_id].append(agent_name)
+
+            items = [
+                {
+                    "id": row.id,
+                    "workflow_type": row.workflow_type,
+                    "status": row.status,
+                    "agents": agents[row.id],
+                    "created_at": row.created_at.isoformat(),
+                    "updated_at": row.updated_at.isoformat()
+                }
+                for row in rows
+            ]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+            return items, next_cursor
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in list_workflow_states: {e}")
+        raise
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in list_workflow_states: {e}")
+        raise
+
 # SQLAlchemy event listeners for debugging
 @event.listens_for(engine, "connect")
 def connect(dbapi_connection, connection_record):
     logger.info("Database connection established")
 
+@event.listens_for(write_engine, "connect")
+def connect_writer(dbapi_connection, connection_record):
+    logger.info("Database writer connection established")
+
 @event.listens_for(engine, "checkout")
 def checkout(dbapi_connection, connection_record, connection_proxy):
     logger.debug("Database connection checked out")
@@ -148,5 +825,13 @@ def checkout(dbapi_connection, connection_record, connection_proxy):
 def checkin(dbapi_connection, connection_record):
     logger.debug("Database connection checked in")
 
+def init_db() -> None:
+    """
+    Create any missing tables.
+    Existing tables are left as they are; their schema is upgraded by the Alembic migrations.
+    """
+    Base.metadata.create_all(bind=write_engine)
+
 # Create tables
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+if settings.DB_CREATE_TABLES:
+    init_db()
@@ -0,0 +1,245 @@
+"""Offline fake LLM and tool backend for load testing without network access."""
+from typing import Dict, Any, List, Optional, Iterator
+import json
+import math
+import random
+import threading
+import time
+import logging
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    FunctionMessage
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+from config import settings
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+class LatencyModel:
+    """
+    Samples simulated call latencies in seconds.
+    distribution is "fixed" (always mean), "uniform" (mean ± stddev) or
+    "lognormal" (long-tailed with the given mean and stddev).
+    """
+
+    def __init__(self, distribution: str = "fixed", mean: float = 0.0, stddev: float = 0.0, seed: Any = None):
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.mean = mean
+        self.stddev = stddev
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draw one latency."""
+        if self.mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.distribution == "uniform":
+                return max(0.0, self._rng.uniform(self.mean - self.stddev, self.mean + self.stddev))
+            if self.distribution == "lognormal" and self.stddev > 0:
+                sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+                mu = math.log(self.mean) - sigma2 / 2
+                return self._rng.lognormvariate(mu, math.sqrt(sigma2))
+            return self.mean
+
+    def sleep(self) -> None:
+        """Block for one sampled latency."""
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+def get_latency_model(mean: float = None, seed: Any = None) -> LatencyModel:
+    """Build a latency model from the FAKE_LLM_LATENCY_* settings."""
+    return LatencyModel(
+        distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+        mean=settings.FAKE_LLM_LATENCY_MEAN if mean is None else mean,
+        stddev=settings.FAKE_LLM_LATENCY_STDDEV,
+        seed=settings.FAKE_LLM_SEED if seed is None else seed
+    )
+
+def load_script(path: str) -> List[Dict[str, Any]]:
+    """
+    Load scripted responses from a JSON file.
+    Each entry is {"content": "..."} or {"function_call": {"name": "...", "arguments": {...}}}.
+    """
+    with open(path) as f:
+        script = json.load(f)
+    if not isinstance(script, list) or not script:
+        raise ValueError(f"LLM script {path} must be a non-empty JSON list")
+    return script
+
+def _fake_arguments(function: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Build arguments matching a function's JSON schema."""
+    arguments = {}
+    properties = function.get("parameters", {}).get("properties", {})
+    for name, schema in properties.items():
+        kind = schema.get("type", "string")
+        if kind == "integer":
+            arguments[name] = rng.randint(1, 10)
+        elif kind == "number":
+            arguments[name] = round(rng.random(), 3)
+        elif kind == "boolean":
+            arguments[name] = rng.random() < 0.5
+        elif kind == "object":
+            arguments[name] = {}
+        elif kind == "array":
+            arguments[name] = []
+        else:
+            arguments[name] = f"fake {name} {rng.randint(1, 1000)}"
+    return arguments
+
+class ResponseSource:
+    """
+    Produces fake responses: the scripted entries in order (cycling), or
+    seeded-random final answers and function calls when there is no script.
+    """
+
+    def __init__(self, script: List[Dict[str, Any]] = None, seed: Any = 0, tool_call_probability: float = 0.5):
+        self.script = script or []
+        self.tool_call_probability = tool_call_probability
+        self._rng = random.Random(seed)
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def next_response(self, messages: List[BaseMessage], functions: List[Dict[str, Any]], model_name: str) -> AIMessage:
+        """Produce the next response to a conversation."""
+        with self._lock:
+            if self.script:
+                entry = self.script[self._position % len(self.script)]
+            else:
+                entry = self._random_entry(messages, functions)
+            self._position += 1
+            position = self._position
+
+        function_call = entry.get("function_call")
+        if function_call:
+            return AIMessage(
+                content="",
+                additional_kwargs={"function_call": {
+                    "name": function_call["name"],
+                    "arguments": json.dumps(function_call.get("arguments", {}))
+                }}
+            )
+        return AIMessage(content=entry.get("content", f"Fake response #{position} from {model_name}"))
+
+    def _random_entry(self, messages: List[BaseMessage], functions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Draw a random response; only call a tool before any tool result came back."""
+        called_tool = any(isinstance(message, FunctionMessage) for message in messages)
+        if functions and not called_tool and self._rng.random() < self.tool_call_probability:
+            function = self._rng.choice(functions)
+            return {"function_call": {
+                "name": function["name"],
+                "arguments": _fake_arguments(function, self._rng)
+            }}
+        words = " ".join(f"insight{self._rng.randint(1, 999)}" for _ in range(self._rng.randint(5, 20)))
+        return {"content": f"Fake analysis: {words}"}
+
+class FakeFunctionCallingChatModel(BaseChatModel):
+    """
+    Chat model returning scripted or seeded-random OpenAI function-calling outputs.
+    It honours the functions bound by create_openai_functions_agent, so the agent
+    executor, tools and graph run exactly as with a real model.
+    """
+
+    model_name: str = "fake"
+    temperature: float = 0.0
+    source: Any = None
+    latency: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-function-calling"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature}
+
+    def get_num_tokens(self, text: str) -> int:
+        """Estimate tokens without tiktoken, whose encodings need a download."""
+        return len(text) // 4 + 1
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> AIMessage:
+        """Wait for one simulated latency and produce the next response."""
+        if self.latency is not None:
+            self.latency.sleep()
+        source = self.source or ResponseSource()
+        return source.next_response(messages, kwargs.get("functions", []), self.model_name)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        message = self._respond(messages, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, **kwargs)
+        if message.additional_kwargs:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                additional_kwargs=message.additional_kwargs
+            ))
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            token = word if i == 0 else f" {word}"
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+def create_fake_llm(temperature: float, model_name: str, cache: Any = None) -> FakeFunctionCallingChatModel:
+    """Create a fake chat model configured by the FAKE_LLM_* settings."""
+    return FakeFunctionCallingChatModel(
+        model_name=model_name,
+        temperature=temperature,
+        source=ResponseSource(
+            script=load_script(settings.FAKE_LLM_SCRIPT) if settings.FAKE_LLM_SCRIPT else None,
+            # Distinct but reproducible sequence per model client
+            seed=f"{settings.FAKE_LLM_SEED}:{model_name}:{temperature}",
+            tool_call_probability=settings.FAKE_LLM_TOOL_CALL_PROBABILITY
+        ),
+        latency=get_latency_model(seed=f"{settings.FAKE_LLM_SEED}:{model_name}:{temperature}"),
+        cache=cache
+    )
+
+def create_fake_tool(tool: BaseTool, latency: LatencyModel) -> BaseTool:
+    """Create an offline stand-in with the same name, description and arguments as a tool."""
+    def run_fake_tool(**kwargs: Any) -> str:
+        latency.sleep()
+        return f"Fake {tool.name} result for {json.dumps(kwargs, default=str)}"
+
+    return StructuredTool.from_function(
+        func=run_fake_tool,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema
+    )
+
+def create_fake_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    """Swap a list of tools for offline stand-ins."""
+    latency = get_latency_model(
+        mean=settings.FAKE_TOOL_LATENCY_MEAN,
+        seed=f"{settings.FAKE_LLM_SEED}:tools"
+    )
+    return [create_fake_tool(tool, latency) for tool in tools]
@@ -1,19 +1,23 @@
 # core/graph_builder.py
-from typing import Dict, Any, List, Annotated, TypedDict, Sequence
-from langchain_core.messages import BaseMessage
+from typing import Dict, Any, List, Annotated, TypedDict, Sequence, Tuple
+from collections import OrderedDict
+from langchain_core.messages import BaseMessage, AIMessage
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
 from langchain_core.tools import BaseTool
+from langchain_core.runnables import RunnableConfig
 import operator
+import copy
 from functools import partial
+import threading
 import logging
 from config import settings
 from core.langchain_setup import (
     get_llm,
     create_agent_executor,
-    create_memory,
     format_chat_history
 )
+from core.memory import run_memories, create_agent_memory, create_history_builder
 from agents.profiles import (
     get_agent_config,
     get_agent_prompt,
@@ -33,34 +37,78 @@ class AgentState(TypedDict):
     next: str
     data_store: Dict[str, Any]
 
+class ParallelAgentState(AgentState):
+    """Agent state for parallel workflows; agents report data_store deltas instead of writing it."""
+    agent_deltas: Annotated[List[Dict[str, Any]], operator.add]
+
+# Node names used by the parallel workflow
+FAN_OUT_NODE = "fan_out"
+MERGE_NODE = "merge"
+
+# Agent executors shared by every graph variant, keyed by (agent, prompt, tool names)
+ExecutorKey = Tuple[str, str, Tuple[str, ...]]
+_executor_cache: Dict[ExecutorKey, Any] = {}
+_executor_cache_lock = threading.Lock()
+
+def get_agent_executor(
+    name: str,
+    tools: List[BaseTool],
+    system_prompt: str
+) -> Any:
+    """
+    Get the agent executor for an agent profile.
+    Executors are built once per profile and reused by every graph that contains the agent.
+    """
+    key = (name, system_prompt, tuple(tool.name for tool in tools))
+    with _executor_cache_lock:
+        agent = _executor_cache.get(key)
+        if agent is None:
+            # Get agent configuration
+            agent_config = get_agent_config(name)
+            
+            # Create agent executor with agent-specific settings
+            agent = create_agent_executor(
+                tools=tools,
+                system_prompt=system_prompt,
+                memory=None,
+                temperature=agent_config["temperature"],
+                max_iterations=agent_config["max_iterations"],
+                cache=agent_config.get("llm_cache", False)
+            )
+            _executor_cache[key] = agent
+        return agent
+
 def create_agent_node(
     name: str,
     tools: List[BaseTool],
     system_prompt: str
 ) -> Any:
     """Create an agent node for the workflow graph."""
-    # Get agent configuration
-    agent_config = get_agent_config(name)
-    memory = create_memory()
-    
-    # Create agent executor with agent-specific settings
-    agent = create_agent_executor(
-        tools=tools,
-        system_prompt=system_prompt,
-        memory=memory,
-        temperature=agent_config["temperature"],
-        max_iterations=agent_config["max_iterations"]
-    )
+    agent = get_agent_executor(name, tools, system_prompt)
     
-    def agent_node(state: AgentState) -> AgentState:
-        """Agent node function for the graph."""
+    def agent_node(state: AgentState, config: RunnableConfig = None) -> Dict[str, Any]:
+        """
+        Agent node function for the graph.
+        The run config is forwarded to the executor so streamed tokens and tool
+        calls reach the graph's event stream. Conversation memory is scoped to the
+        workflow run identified by data_store["run_id"].
+        """
         messages = state["messages"]
-        data_store = state["data_store"]
+        data_store = dict(state["data_store"])
+        
+        # Runs without an id get a throwaway memory and history builder
+        run_id = data_store.get("run_id")
+        if run_id is not None:
+            memory = run_memories.get(run_id, name)
+            history = run_memories.history(run_id, name)
+        else:
+            memory = create_agent_memory(name)
+            history = create_history_builder(name)
         
         # Format prompt with current context
         objective = data_store.get("input_data", {}).get("query", "")
         tool_names = [tool.name for tool in tools]
-        chat_history = "\n".join([f"{m.type}: {m.content}" for m in messages[:-1]])
+        chat_history = history.render(messages[:-1])
         
         prompt = get_agent_prompt(
             agent_name=name,
@@ -69,26 +117,30 @@ def create_agent_node(
             chat_history=chat_history
         )
         
+        agent_input = messages[-1].content
+        
         # Run the agent
         result = agent.invoke({
-            "input": messages[-1].content,
-            "chat_history": messages[:-1],
+            "input": agent_input,
+            "chat_history": memory.load_memory_variables({})[memory.memory_key],
             "data_store": data_store,
             "system_prompt": prompt
-        })
+        }, config=config)
+        memory.save_context({"input": agent_input}, {"output": result["output"]})
         
         # Update state
-        state["messages"].append(result.messages[-1])
+        update = {"messages": [AIMessage(content=result["output"], name=name)]}
         if "data_store" in result:
-            state["data_store"].update(result["data_store"])
+            data_store.update(result["data_store"])
+        update["data_store"] = data_store
         
         # Determine next node
         if "next" in result:
-            state["next"] = result["next"]
+            update["next"] = result["next"]
         elif "final_answer" in result:
-            state["next"] = END
+            update["next"] = END
         
-        return state
+        return update
     
     return agent_node
 
@@ -137,17 +189,115 @@ def build_sequential_graph(
         if i > 0:
             workflow.add_edge(agents[i-1], agent_name)
     
-    # Add edges from last agent to end
+    # Start with the first agent and end after the last one
+    workflow.set_entry_point(agents[0])
     workflow.add_edge(agents[-1], END)
     
     return workflow.compile()
 
+def create_parallel_agent_node(name: str, agent_node: Any) -> Any:
+    """
+    Wrap an agent node so it can run concurrently with its siblings.
+    The agent works on a private copy of the data_store and returns its messages
+    and the data_store keys it changed; the merge node applies those deltas.
+    """
+    def parallel_agent_node(state: ParallelAgentState, config: RunnableConfig = None) -> Dict[str, Any]:
+        """Parallel agent node function for the graph."""
+        baseline = state["data_store"]
+        local_state = {
+            "messages": list(state["messages"]),
+            "next": state.get("next", ""),
+            "data_store": copy.deepcopy(baseline)
+        }
+        
+        result = agent_node(local_state, config)
+        
+        delta = {
+            key: value
+            for key, value in result["data_store"].items()
+            if key not in baseline or baseline[key] != value
+        }
+        return {
+            "messages": list(result.get("messages", [])),
+            "agent_deltas": [{"agent": name, "data_store": delta}]
+        }
+    
+    return parallel_agent_node
+
+def merge_agent_deltas(
+    data_store: Dict[str, Any],
+    deltas: List[Dict[str, Any]],
+    agents: List[str]
+) -> Dict[str, Any]:
+    """
+    Merge the data_store deltas of parallel agents.
+    
+    Conflict policy:
+    - deltas are applied in the order the agents were requested, so when several
+      agents write the same key the agent listed last wins
+    - a "failed" status from any agent wins over every other status
+    - every agent's own delta is kept under data_store["agent_results"][agent] and
+      overwritten keys are listed in data_store["merge_conflicts"]
+    """
+    merged = dict(data_store)
+    agent_results = dict(merged.get("agent_results", {}))
+    conflicts: Dict[str, List[str]] = {}
+    written_by: Dict[str, str] = {}
+    
+    ordered = sorted(
+        deltas,
+        key=lambda d: agents.index(d["agent"]) if d["agent"] in agents else len(agents)
+    )
+    for delta in ordered:
+        agent = delta["agent"]
+        agent_results[agent] = delta["data_store"]
+        for key, value in delta["data_store"].items():
+            if key in written_by and merged[key] != value:
+                conflicts.setdefault(key, [written_by[key]]).append(agent)
+            merged[key] = value
+            written_by[key] = agent
+    
+    statuses = [d["data_store"].get("status") for d in ordered]
+    if "failed" in statuses:
+        merged["status"] = "failed"
+    
+    merged["agent_results"] = agent_results
+    merged["completed_agents"] = [d["agent"] for d in ordered]
+    if conflicts:
+        merged["merge_conflicts"] = conflicts
+    return merged
+
 def build_parallel_graph(
     agents: List[str],
     tools: List[BaseTool] = None
 ) -> StateGraph:
-    """Build a parallel workflow graph."""
-    workflow = StateGraph(AgentState)
+    """
+    Build a parallel workflow graph.
+    
+    All agents fan out from a start node and belong to the same superstep, so
+    LangGraph runs them concurrently (on its thread pool for invoke, as tasks for
+    ainvoke). A merge node then combines their data_store deltas, keeping the
+    wall-clock time close to that of the slowest agent.
+    """
+    workflow = StateGraph(ParallelAgentState)
+    
+    def fan_out(state: ParallelAgentState) -> Dict[str, Any]:
+        """Start node that every agent branches from."""
+        return {}
+    
+    def merge(state: ParallelAgentState) -> Dict[str, Any]:
+        """Reducer node combining the agents' data_store deltas."""
+        return {
+            "data_store": merge_agent_deltas(
+                state["data_store"],
+                state.get("agent_deltas", []),
+                agents
+            )
+        }
+    
+    workflow.add_node(FAN_OUT_NODE, fan_out)
+    workflow.add_node(MERGE_NODE, merge)
+    workflow.set_entry_point(FAN_OUT_NODE)
     
     # Add nodes for each agent
     for agent_name in agents:
@@ -160,10 +310,13 @@ def build_parallel_graph(
             tools=agent_tools,
             system_prompt=agent_config["prompt"]
         )
-        workflow.add_node(agent_name, node)
+        workflow.add_node(agent_name, create_parallel_agent_node(agent_name, node))
         
-        # Connect each agent directly to end
-        workflow.add_edge(agent_name, END)
+        # Branch from the start node and join at the merge node
+        workflow.add_edge(FAN_OUT_NODE, agent_name)
+        workflow.add_edge(agent_name, MERGE_NODE)
+    
+    workflow.add_edge(MERGE_NODE, END)
     
     return workflow.compile()
 
@@ -171,12 +324,37 @@ def build_hybrid_graph(
     agents: List[str],
     tools: List[BaseTool] = None
 ) -> StateGraph:
-    """Build a hybrid workflow graph with conditional branching."""
+    """
+    Build a hybrid workflow graph with conditional branching.
+    An agent can hand over to any requested agent (or END) by setting "next";
+    otherwise the run moves on to the agent listed after it and ends after the last.
+    """
     workflow = StateGraph(AgentState)
+    destinations = {agent: agent for agent in agents} | {END: END}
+    
+    def create_router(agent_name: str) -> Any:
+        """Create the router of an agent node."""
+        position = agents.index(agent_name)
+        default = agents[position + 1] if position + 1 < len(agents) else END
+        
+        def router(state: AgentState) -> str:
+            """Route to the agent chosen by the node, else to the next requested agent."""
+            chosen = state.get("next")
+            if chosen and chosen not in destinations:
+                logger.warning(f"Agent {agent_name} chose unknown next node {chosen}")
+                chosen = None
+            return chosen or default
+        
+        return router
     
-    def router(state: AgentState) -> str:
-        """Route to next node based on state."""
-        return state.get("next", END)
+    def create_hybrid_agent_node(agent_node: Any) -> Any:
+        """Wrap an agent node so a choice of next node only applies to the step after it."""
+        def hybrid_agent_node(state: AgentState, config: RunnableConfig = None) -> Dict[str, Any]:
+            update = agent_node(state, config)
+            update.setdefault("next", "")
+            return update
+        
+        return hybrid_agent_node
     
     # Add nodes for each agent
     for agent_name in agents:
@@ -189,15 +367,18 @@ def build_hybrid_graph(
             tools=agent_tools,
             system_prompt=agent_config["prompt"]
         )
-        workflow.add_node(agent_name, node)
+        workflow.add_node(agent_name, create_hybrid_agent_node(node))
         
         # Add conditional edges
         workflow.add_conditional_edges(
             agent_name,
-            router,
-            {agent: agent for agent in agents} | {END: END}
+            create_router(agent_name),
+            destinations
         )
     
+    # Start with the first requested agent
+    workflow.set_entry_point(agents[0])
+    
     return workflow.compile()
 
 def get_workflow_builder(workflow_type: str):
@@ -212,9 +393,13 @@ def get_workflow_builder(workflow_type: str):
 def create_initial_state(
     input_data: Dict[str, Any],
     agents: List[str],
-    workflow_type: str
+    workflow_type: str,
+    run_id: Any = None
 ) -> AgentState:
-    """Create initial state for the workflow."""
+    """
+    Create initial state for the workflow.
+    run_id scopes the agents' conversation memory to this run.
+    """
     return {
         "messages": format_chat_history([{
             "role": "human",
@@ -225,19 +410,57 @@ def create_initial_state(
             "input_data": input_data,
             "agents": agents,
             "workflow_type": workflow_type,
-            "status": "running"
+            "status": "running",
+            "run_id": run_id
         }
     }
 
-# Get compiled graph based on workflow type
+# Compiled graph cache keyed by (workflow_type, agents)
+GraphKey = Tuple[str, Tuple[str, ...]]
+_graph_cache: "OrderedDict[GraphKey, Any]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
+
 def get_compiled_graph(workflow_type: str, agents: List[str]) -> Any:
-    """Get compiled workflow graph for specified type and agents."""
+    """
+    Get compiled workflow graph for specified type and agents.
+    Graphs are compiled once per (workflow_type, agents) and kept in an LRU cache.
+    """
+    key = (workflow_type, tuple(agents))
+    with _graph_cache_lock:
+        graph = _graph_cache.get(key)
+        if graph is not None:
+            _graph_cache.move_to_end(key)
+            return graph
+    
     builder = get_workflow_builder(workflow_type)
     if not builder:
         raise ValueError(f"Invalid workflow type: {workflow_type}")
-    return builder(agents)
+    graph = builder(list(agents))
+    
+    with _graph_cache_lock:
+        # Keep the first graph if another thread compiled the same key meanwhile
+        graph = _graph_cache.setdefault(key, graph)
+        _graph_cache.move_to_end(key)
+        while len(_graph_cache) > settings.GRAPH_CACHE_SIZE:
+            evicted_key, _ = _graph_cache.popitem(last=False)
+            logger.debug(f"Evicted compiled graph {evicted_key}")
+    return graph
+
+def warm_graph_cache() -> int:
+    """
+    Compile the default graph of every workflow type ahead of the first request.
+    Returns the number of graphs compiled successfully.
+    """
+    warmed = 0
+    for workflow_type in settings.WORKFLOW_TYPES:
+        try:
+            get_compiled_graph(workflow_type, settings.AVAILABLE_AGENTS)
+            warmed += 1
+        except Exception as e:
+            logger.warning(f"Could not warm {workflow_type} graph: {e}")
+    return warmed
 
-# Compile default graph
-compiled_graph = build_sequential_graph(
-    settings.AVAILABLE_AGENTS
-)
\ No newline at end of file
+def clear_graph_cache() -> None:
+    """Drop all cached compiled graphs."""
+    with _graph_cache_lock:
+        _graph_cache.clear()
@@ -0,0 +1,280 @@
+# core/http_client.py
+"""
+Shared HTTP clients of the outbound integrations.
+
+Every integration call goes through one keep-alive connection pool, so repeated
+calls to the same host reuse an open TCP/TLS connection instead of handshaking
+again. The pool caps connections per host as well as in total, applies default
+timeouts, optionally speaks HTTP/2 and records latency per host for /metrics.
+"""
+from typing import Dict, Any, Optional, Iterator, AsyncIterator
+from collections import deque
+import asyncio
+import threading
+import time
+import weakref
+import logging
+import httpx
+from config import settings
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# Latency samples kept per host for the percentiles
+LATENCY_SAMPLES = 256
+
+class HostLatencyStats:
+    """Thread-safe request counts and latencies per host."""
+
+    def __init__(self):
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float, error: bool) -> None:
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                stats = self._hosts[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "samples": deque(maxlen=LATENCY_SAMPLES)
+                }
+            stats["requests"] += 1
+            stats["errors"] += error
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["samples"].append(seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {}
+            for host, stats in self._hosts.items():
+                samples = sorted(stats["samples"])
+                hosts[host] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "avg_ms": 1000 * stats["total_seconds"] / stats["requests"],
+                    "p50_ms": 1000 * samples[len(samples) // 2],
+                    "p95_ms": 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                    "max_ms": 1000 * stats["max_seconds"]
+                }
+            return hosts
+
+# Shared latency counters reported by /metrics
+http_stats = HostLatencyStats()
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees its host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async response body that frees its host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+def _pool_timeout(request: httpx.Request) -> Optional[float]:
+    """Seconds a request may wait for a free slot: its pool timeout (None waits indefinitely)."""
+    return request.extensions.get("timeout", {}).get("pool")
+
+def _once(release):
+    """Wrap a release callback so closing a body twice frees one slot."""
+    released = False
+
+    def wrapper():
+        nonlocal released
+        if not released:
+            released = True
+            release()
+    return wrapper
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """
+    Transport holding at most max_per_host requests per host at a time.
+    A slot is held until the response body is closed, since the connection is
+    busy until then; latency is measured to the response headers. Waiting for a
+    slot is bounded by the request's pool timeout and raises httpx.PoolTimeout.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_per_host: int, stats: HostLatencyStats = http_stats):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._stats = stats
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self._max_per_host)
+            return semaphore
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphore(host)
+        if not semaphore.acquire(timeout=_pool_timeout(request)):
+            raise httpx.PoolTimeout(f"No free connection slot for {host}", request=request)
+        start = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            semaphore.release()
+            self._stats.record(host, time.perf_counter() - start, error=True)
+            raise
+        self._stats.record(host, time.perf_counter() - start, error=response.status_code >= 500)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, _once(semaphore.release)),
+            extensions=response.extensions
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+class AsyncHostLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of HostLimitedTransport, bound to one event loop."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int, stats: HostLatencyStats = http_stats):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._stats = stats
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), _pool_timeout(request))
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"No free connection slot for {host}", request=request) from None
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            self._stats.record(host, time.perf_counter() - start, error=True)
+            raise
+        self._stats.record(host, time.perf_counter() - start, error=response.status_code >= 500)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_AsyncReleasingStream(response.stream, _once(semaphore.release)),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+def _http2_enabled() -> bool:
+    if settings.HTTP_CLIENT_HTTP2 and h2 is None:
+        logger.warning("HTTP_CLIENT_HTTP2 needs the h2 package (pip install httpx[http2]); using HTTP/1.1")
+    return settings.HTTP_CLIENT_HTTP2 and h2 is not None
+
+def _limits(max_connections: Optional[int]) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections or settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+    )
+
+def _timeout(timeout: Optional[float]) -> httpx.Timeout:
+    return httpx.Timeout(timeout or settings.HTTP_CLIENT_TIMEOUT, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT)
+
+def create_http_client(max_connections: Optional[int] = None, timeout: Optional[float] = None) -> httpx.Client:
+    """Create a pooled client with the per-host limit and latency metrics of the shared layer."""
+    transport = httpx.HTTPTransport(limits=_limits(max_connections), http2=_http2_enabled())
+    return httpx.Client(
+        transport=HostLimitedTransport(transport, settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST),
+        timeout=_timeout(timeout)
+    )
+
+def create_async_http_client(max_connections: Optional[int] = None, timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """Create a pooled async client with the per-host limit and latency metrics of the shared layer."""
+    transport = httpx.AsyncHTTPTransport(limits=_limits(max_connections), http2=_http2_enabled())
+    return httpx.AsyncClient(
+        transport=AsyncHostLimitedTransport(transport, settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST),
+        timeout=_timeout(timeout)
+    )
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+# Async pools cannot move between event loops, so each loop gets its own
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide client of the integrations."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = create_http_client()
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the integrations' async client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _http_client_lock:
+        client = _async_http_clients.get(loop)
+        if client is None:
+            client = _async_http_clients[loop] = create_async_http_client()
+        return client
+
+async def close_async_http_client() -> None:
+    """Close the async client of the running event loop."""
+    with _http_client_lock:
+        client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def close_http_client() -> None:
+    """Close the process-wide client."""
+    global _http_client
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+
+def get_http_stats() -> Dict[str, Any]:
+    """Get the pool settings and per-host latency of outbound requests."""
+    return {
+        "http2": settings.HTTP_CLIENT_HTTP2 and h2 is not None,
+        "max_connections_per_host": settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+        "hosts": http_stats.to_dict()
+    }
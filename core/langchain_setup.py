@@ -1,5 +1,5 @@
 """LangChain setup and configurations."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_openai import ChatOpenAI
@@ -8,10 +8,20 @@ from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain_core.tools import Tool
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import (
+    ConversationBufferMemory,
+    ConversationBufferWindowMemory,
+    ConversationSummaryBufferMemory
+)
+from langchain.memory.chat_memory import BaseChatMemory
 from langsmith import Client
+from functools import lru_cache
+import httpx
+import threading
 import logging
 from config import settings
+from core.llm_cache import get_llm_cache
+from core.fake_llm import create_fake_llm
 
 # Initialize logging
 logging.basicConfig(
@@ -20,27 +30,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize LangSmith client for monitoring
-langsmith_client = Client(
-    api_url=settings.LANGSMITH_API_URL,
-    api_key=settings.LANGSMITH_API_KEY,
-    project_name=settings.LANGSMITH_PROJECT
-)
-
-def get_llm(temperature: float = None, model_name: str = None) -> ChatOpenAI:
-    """Get LLM instance with specified or default settings."""
-    return ChatOpenAI(
-        temperature=temperature or float(settings.TEMPERATURE),
-        model_name=model_name or settings.MODEL_NAME,
-        streaming=True,
-        callbacks=[langsmith_client.callback_handler()]
+@lru_cache(maxsize=1)
+def get_langsmith_client() -> Client:
+    """Get the LangSmith client for monitoring, created on first use."""
+    return Client(
+        api_url=settings.LANGSMITH_API_URL,
+        api_key=settings.LANGSMITH_API_KEY,
+        project_name=settings.LANGSMITH_PROJECT
     )
 
+# Process-wide LLM clients keyed by (model_name, temperature, cached)
+_llm_registry: Dict[Tuple[str, float, bool], ChatOpenAI] = {}
+_llm_registry_lock = threading.Lock()
+_llm_http_client: Optional[httpx.Client] = None
+_callback_handler = None
+
+def get_llm_http_client() -> httpx.Client:
+    """
+    Get the HTTP client shared by all LLM clients.
+    Its connection pool keeps TCP/TLS connections alive across requests.
+    """
+    global _llm_http_client
+    with _llm_registry_lock:
+        if _llm_http_client is None:
+            _llm_http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=settings.LLM_REQUEST_TIMEOUT
+            )
+        return _llm_http_client
+
+def get_callbacks() -> List[Any]:
+    """
+    Get the shared callback handlers for LLMs and executors.
+    LangSmith tracing is skipped when disabled or when running on the offline fake backend.
+    """
+    global _callback_handler
+    if not settings.LANGSMITH_TRACING_ENABLED or settings.LLM_BACKEND == "fake":
+        return []
+    if _callback_handler is None:
+        _callback_handler = get_langsmith_client().callback_handler()
+    return [_callback_handler]
+
+def get_llm(temperature: float = None, model_name: str = None, cache: bool = False) -> ChatOpenAI:
+    """
+    Get LLM instance with specified or default settings.
+    Instances are shared per (model_name, temperature) and reuse one HTTP connection pool.
+    With cache=True responses go through the LLM response cache (see core.llm_cache).
+    """
+    temperature = float(settings.TEMPERATURE) if temperature is None else float(temperature)
+    model_name = model_name or settings.MODEL_NAME
+    llm_cache = get_llm_cache() if cache else None
+    key = (model_name, temperature, llm_cache is not None)
+    
+    llm = _llm_registry.get(key)
+    if llm is not None:
+        return llm
+    
+    if settings.LLM_BACKEND == "fake":
+        with _llm_registry_lock:
+            return _llm_registry.setdefault(
+                key,
+                create_fake_llm(temperature=temperature, model_name=model_name, cache=llm_cache)
+            )
+    
+    http_client = get_llm_http_client()
+    with _llm_registry_lock:
+        if key not in _llm_registry:
+            _llm_registry[key] = ChatOpenAI(
+                temperature=temperature,
+                model_name=model_name,
+                streaming=True,
+                http_client=http_client,
+                cache=llm_cache,
+                callbacks=get_callbacks()
+            )
+        return _llm_registry[key]
+
+def clear_llm_registry() -> None:
+    """Drop all cached LLM clients and close the shared HTTP client."""
+    global _llm_http_client
+    with _llm_registry_lock:
+        _llm_registry.clear()
+        if _llm_http_client is not None:
+            _llm_http_client.close()
+            _llm_http_client = None
+
 def get_embeddings() -> OpenAIEmbeddings:
     """Get embeddings model instance."""
     return OpenAIEmbeddings(
         model=settings.EMBEDDING_MODEL,
-        callbacks=[langsmith_client.callback_handler()]
+        callbacks=get_callbacks()
     )
 
 def get_vectorstore() -> Chroma:
@@ -55,17 +137,22 @@ def create_agent_executor(
     system_prompt: str,
     memory: ConversationBufferMemory = None,
     temperature: float = None,
-    max_iterations: int = None
+    max_iterations: int = None,
+    cache: bool = False
 ) -> AgentExecutor:
-    """Create an agent executor with specified tools and prompt."""
+    """
+    Create an agent executor with specified tools and prompt.
+    system_prompt is the default system message; callers may pass an already
+    formatted "system_prompt" input per invocation to override it.
+    """
     prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        ("system", "{system_prompt}"),
         MessagesPlaceholder(variable_name="chat_history"),
         ("human", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
-    ])
+    ]).partial(system_prompt=system_prompt)
 
-    llm = get_llm(temperature=temperature)
+    llm = get_llm(temperature=temperature, cache=cache)
     agent = create_openai_functions_agent(llm, tools, prompt)
     
     return AgentExecutor(
@@ -74,11 +161,35 @@ def create_agent_executor(
         memory=memory,
         verbose=settings.DEBUG,
         max_iterations=max_iterations or settings.MAX_ITERATIONS,
-        callbacks=[langsmith_client.callback_handler()]
+        callbacks=get_callbacks()
     )
 
-def create_memory(memory_key: str = "chat_history") -> ConversationBufferMemory:
-    """Create a conversation memory instance."""
+def create_memory(
+    memory_key: str = "chat_history",
+    memory_type: str = "buffer",
+    window_size: int = None,
+    max_token_limit: int = None
+) -> BaseChatMemory:
+    """
+    Create a conversation memory instance.
+    memory_type is "buffer" (unbounded), "window" (last window_size exchanges)
+    or "summary" (older exchanges summarized beyond max_token_limit tokens).
+    """
+    if memory_type == "window":
+        return ConversationBufferWindowMemory(
+            memory_key=memory_key,
+            k=window_size or settings.MEMORY_WINDOW_SIZE,
+            return_messages=True,
+            output_key="output"
+        )
+    if memory_type == "summary":
+        return ConversationSummaryBufferMemory(
+            llm=get_llm(temperature=0),
+            memory_key=memory_key,
+            max_token_limit=max_token_limit or settings.MEMORY_MAX_TOKENS,
+            return_messages=True,
+            output_key="output"
+        )
     return ConversationBufferMemory(
         memory_key=memory_key,
         return_messages=True,
@@ -103,7 +214,7 @@ def trace_chain(name: str):
     """Decorator to trace a chain using LangSmith."""
     def decorator(func):
         def wrapper(*args, **kwargs):
-            with langsmith_client.trace(
+            with get_langsmith_client().trace(
                 name=name,
                 project_name=settings.LANGSMITH_PROJECT
             ) as trace:
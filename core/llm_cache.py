@@ -0,0 +1,220 @@
+"""LLM response caches keyed by normalized prompt, model, temperature and tool schema."""
+from typing import Dict, Any, Optional, Sequence
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+from langchain_core.caches import BaseCache
+from langchain_core.outputs import Generation
+from langchain_core.load import dumps, loads
+from config import settings
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+RETURN_VAL_TYPE = Sequence[Generation]
+
+def _collapse_whitespace(value: Any) -> Any:
+    """Collapse the whitespace of every string in a JSON value."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_collapse_whitespace(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _collapse_whitespace(item) for key, item in value.items()}
+    return value
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapse whitespace so prompts differing only in formatting share an entry.
+    Chat models pass the cache their messages serialized as JSON, where line breaks
+    in the contents are escaped, so those are parsed and their strings collapsed.
+    """
+    if prompt.startswith("["):
+        try:
+            messages = json.loads(prompt)
+        except ValueError:
+            pass
+        else:
+            return json.dumps(_collapse_whitespace(messages))
+    return " ".join(prompt.split())
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Build the cache key of a prompt.
+    llm_string is LangChain's serialized model configuration, which includes the
+    model name, temperature and any bound function/tool schemas.
+    """
+    raw = f"{normalize_prompt(prompt)}\0{llm_string}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class CacheStats:
+    """Thread-safe hit/miss counters of a cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_eviction(self, count: int = 1) -> None:
+        with self._lock:
+            self.evictions += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class InMemoryLLMCache(BaseCache):
+    """LRU cache of LLM generations with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = None, ttl: int = None):
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up the cached generations of a prompt."""
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self.stats.record(entry is not None)
+        return entry[1] if entry is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the generations of a prompt."""
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, return_val)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.record_eviction(evicted)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop all cached generations."""
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteLLMCache(BaseCache):
+    """On-disk SQLite cache of LLM generations with a TTL, shared across workers."""
+
+    def __init__(self, path: str = None, max_entries: int = None, ttl: int = None):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                value TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at)")
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up the cached generations of a prompt."""
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        self.stats.record(row is not None)
+        if row is None:
+            return None
+        try:
+            return [loads(generation) for generation in json.loads(row[0])]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable LLM cache entry: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the generations of a prompt and prune expired or surplus entries."""
+        key = make_cache_key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, created_at, value) VALUES (?, ?, ?)",
+                (key, now, value)
+            )
+            pruned = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,)
+            ).rowcount
+            pruned += self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        if pruned:
+            self.stats.record_eviction(pruned)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop all cached generations."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+_llm_cache: Optional[BaseCache] = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[BaseCache]:
+    """Get the process-wide LLM response cache selected by LLM_CACHE_BACKEND, or None when disabled."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            backend = settings.LLM_CACHE_BACKEND
+            if backend == "memory":
+                _llm_cache = InMemoryLLMCache()
+            elif backend == "sqlite":
+                _llm_cache = SQLiteLLMCache()
+            elif backend != "none":
+                raise ValueError(f"Unknown LLM cache backend: {backend}")
+        return _llm_cache
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss metrics of the LLM response cache."""
+    cache = _llm_cache
+    if cache is None:
+        return {"backend": settings.LLM_CACHE_BACKEND, "enabled": False}
+    return {"backend": settings.LLM_CACHE_BACKEND, "enabled": True, **cache.stats.to_dict()}
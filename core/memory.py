@@ -0,0 +1,155 @@
+"""Run-scoped conversation memory and chat history for agent nodes."""
+from typing import Dict, Any, List, Tuple, Hashable, Optional
+from collections import deque
+from functools import lru_cache
+import threading
+import logging
+from config import settings
+from core.langchain_setup import create_memory
+from agents.profiles import get_agent_config
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> Any:
+    """
+    Get the tiktoken encoding for a model.
+    Returns None when tiktoken is not installed or its encoding files cannot be loaded.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails without network access
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+
+def count_tokens(text: str, model_name: str = None) -> int:
+    """Count the tokens of a text, estimating four characters per token without tiktoken."""
+    encoding = _get_encoding(model_name or settings.MODEL_NAME)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+class ChatHistoryBuilder:
+    """
+    Renders a run's messages into the chat_history prompt text within a token budget.
+    Messages are rendered and counted once; later calls only append the new ones and
+    drop the oldest lines while the history exceeds the budget.
+    """
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget everything rendered so far."""
+        self._lines: deque = deque()
+        self._tokens = 0
+        self._consumed = 0
+        self._omitted = 0
+        self._rendered: Optional[str] = None
+
+    def render(self, messages: List[Any]) -> str:
+        """Render the messages, reusing the work done for the messages seen before."""
+        if len(messages) < self._consumed:
+            # A different (shorter) history; start over
+            self._reset()
+
+        for message in messages[self._consumed:]:
+            line = f"{message.type}: {message.content}"
+            tokens = count_tokens(line)
+            self._lines.append((line, tokens))
+            self._tokens += tokens
+            self._rendered = None
+        self._consumed = len(messages)
+
+        # Keep at least the latest line even when it alone exceeds the budget
+        while self._tokens > self.token_budget and len(self._lines) > 1:
+            _, tokens = self._lines.popleft()
+            self._tokens -= tokens
+            self._omitted += 1
+
+        if self._rendered is None:
+            lines = [line for line, _ in self._lines]
+            if self._omitted:
+                lines.insert(0, f"[{self._omitted} earlier messages omitted]")
+            self._rendered = "\n".join(lines)
+        return self._rendered
+
+    @property
+    def token_count(self) -> int:
+        """Tokens currently held in the rendered history."""
+        return self._tokens
+
+class RunMemoryStore:
+    """
+    Holds one conversation memory and chat history builder per (workflow run, agent).
+    They live only as long as their run, so context never leaks between
+    requests and prompt size does not grow with server uptime.
+    """
+
+    def __init__(self):
+        self._memories: Dict[Tuple[Hashable, str], Any] = {}
+        self._histories: Dict[Tuple[Hashable, str], ChatHistoryBuilder] = {}
+        self._lock = threading.Lock()
+
+    def get(self, run_id: Hashable, agent_name: str) -> Any:
+        """Get (or create) the memory of an agent within a run."""
+        key = (run_id, agent_name)
+        with self._lock:
+            memory = self._memories.get(key)
+            if memory is None:
+                memory = self._memories[key] = create_agent_memory(agent_name)
+            return memory
+
+    def history(self, run_id: Hashable, agent_name: str) -> ChatHistoryBuilder:
+        """Get (or create) the chat history builder of an agent within a run."""
+        key = (run_id, agent_name)
+        with self._lock:
+            builder = self._histories.get(key)
+            if builder is None:
+                builder = self._histories[key] = create_history_builder(agent_name)
+            return builder
+
+    def release(self, run_id: Hashable) -> None:
+        """Drop every memory and history builder belonging to a finished run."""
+        with self._lock:
+            for store in (self._memories, self._histories):
+                for key in [key for key in store if key[0] == run_id]:
+                    del store[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memories)
+
+def create_agent_memory(agent_name: str) -> Any:
+    """Create a bounded memory following the agent's "memory" configuration."""
+    memory_config = get_agent_config(agent_name).get("memory", {})
+    return create_memory(
+        memory_type=memory_config.get("type", "window"),
+        window_size=memory_config.get("window_size"),
+        max_token_limit=memory_config.get("max_token_limit")
+    )
+
+def create_history_builder(agent_name: str) -> ChatHistoryBuilder:
+    """Create a chat history builder using the agent's "history_token_budget"."""
+    token_budget = get_agent_config(agent_name).get(
+        "history_token_budget",
+        settings.HISTORY_TOKEN_BUDGET
+    )
+    return ChatHistoryBuilder(token_budget)
+
+# Shared store used by agent nodes
+run_memories = RunMemoryStore()
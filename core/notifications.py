@@ -0,0 +1,201 @@
+# core/notifications.py
+"""
+Digest notifications of finished workflows.
+
+Instead of one Slack message and one Notion page per workflow, finished
+workflows are buffered per destination and sent as a single digest once
+NOTIFICATION_DIGEST_MAX_EVENTS have accumulated or the oldest has waited
+NOTIFICATION_DIGEST_WINDOW seconds. Digests go through the webhook outbox.
+"""
+from typing import Dict, List, Any, Optional, Callable
+import asyncio
+import json
+import threading
+import time
+import logging
+from config import settings
+from core.webhooks import send_slack_notification, send_notion_page
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+# Characters of a workflow's last message quoted in a Slack digest line
+SLACK_SUMMARY_LENGTH = 200
+
+# Digests per destination kept for another attempt after failed sends
+MAX_RETAINED_DIGESTS = 10
+
+def slack_digest(events: List[Dict[str, Any]]) -> bool:
+    """Send one Slack message summarizing finished workflows."""
+    failed = sum(1 for event in events if event["status"] == "failed")
+    lines = [f"{len(events)} workflows finished ({len(events) - failed} completed, {failed} failed)"]
+    for event in events:
+        summary = " ".join(event["summary"].split())
+        if len(summary) > SLACK_SUMMARY_LENGTH:
+            summary = summary[:SLACK_SUMMARY_LENGTH - 1] + "…"
+        lines.append(f"• #{event['state_id']} {event['status']}: {summary}")
+    return send_slack_notification("\n".join(lines))
+
+def notion_digest(events: List[Dict[str, Any]]) -> bool:
+    """Insert one Notion page covering finished workflows."""
+    failed = any(event["status"] == "failed" for event in events)
+    title = ", ".join(str(event["state_id"]) for event in events)
+    messages = "\n\n".join(
+        f"#{event['state_id']} ({event['status']})\n" + "\n".join(event["messages"])
+        for event in events
+    )
+    data_store = json.dumps({str(event["state_id"]): event["data_store"] for event in events}, indent=2)
+    return send_notion_page(title, "Failed" if failed else "Completed", messages, data_store)
+
+# Digest senders of the supported destinations
+DIGEST_SENDERS: Dict[str, Callable[[List[Dict[str, Any]]], bool]] = {
+    "slack": slack_digest,
+    "notion": notion_digest
+}
+
+class NotificationAggregator:
+    """Buffers workflow notifications per destination and sends them as digests."""
+
+    def __init__(self, window: Optional[float] = None, max_events: Optional[int] = None):
+        self.window = window or settings.NOTIFICATION_DIGEST_WINDOW
+        self.max_events = max_events or settings.NOTIFICATION_DIGEST_MAX_EVENTS
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._first_at: Dict[str, float] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.events = 0
+        self.digests = 0
+        self.dropped = 0
+
+    def add(self, destination: str, event: Dict[str, Any]) -> None:
+        """Buffer an event, sending the destination's digest when it is full or due."""
+        if destination not in DIGEST_SENDERS:
+            raise ValueError(f"Unknown notification destination: {destination}")
+        with self._lock:
+            self._buffers.setdefault(destination, []).append(event)
+            self._first_at.setdefault(destination, time.monotonic())
+            self.events += 1
+        self.flush()
+
+    def workflow_finished(
+        self,
+        state_id: int,
+        status: str,
+        messages: List[str],
+        data_store: Dict[str, Any]
+    ) -> None:
+        """Notify NOTIFICATION_DESTINATIONS that a workflow finished."""
+        event = {
+            "state_id": state_id,
+            "status": status,
+            "summary": messages[-1] if messages else "",
+            "messages": messages,
+            "data_store": data_store
+        }
+        for destination in settings.NOTIFICATION_DESTINATIONS:
+            self.add(destination, event)
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Send the digests that are full or past the window (all with force). Returns the digests sent.
+        The events of a failed digest go back to the front of the buffer and are
+        sent again after another window; a forced flush drops them instead.
+        """
+        now = time.monotonic()
+        due = {}
+        with self._lock:
+            for destination, events in list(self._buffers.items()):
+                if not force and now < self._retry_at.get(destination, 0):
+                    continue
+                if force or len(events) >= self.max_events or now - self._first_at[destination] >= self.window:
+                    due[destination] = events[:self.max_events]
+                    rest = events[self.max_events:]
+                    if rest:
+                        self._buffers[destination] = rest
+                        self._first_at[destination] = now
+                    else:
+                        del self._buffers[destination]
+                        del self._first_at[destination]
+
+        sent = 0
+        failed = {}
+        for destination, events in due.items():
+            try:
+                if DIGEST_SENDERS[destination](events):
+                    sent += 1
+                    with self._lock:
+                        self._retry_at.pop(destination, None)
+                    continue
+                logger.warning(f"{destination} digest of {len(events)} notifications was not sent")
+            except Exception as e:
+                logger.error(f"Error sending {destination} digest of {len(events)} notifications: {e}")
+            failed[destination] = events
+
+        dropped = {}
+        with self._lock:
+            self.digests += sent
+            for destination, events in failed.items():
+                if force:
+                    dropped[destination] = len(events)
+                    continue
+                buffered = events + self._buffers.get(destination, [])
+                self._first_at.setdefault(destination, now)
+                self._retry_at[destination] = now + self.window
+                # Bound what an unreachable destination can hold, dropping the oldest
+                overflow = len(buffered) - self.max_events * MAX_RETAINED_DIGESTS
+                if overflow > 0:
+                    dropped[destination] = overflow
+                    buffered = buffered[overflow:]
+                self._buffers[destination] = buffered
+            self.dropped += sum(dropped.values())
+        for destination, count in dropped.items():
+            logger.error(f"Dropped {count} {destination} notifications after failed digests")
+        if force and self.pending():
+            sent += self.flush(force=True)
+        return sent
+
+    def pending(self) -> int:
+        """Number of buffered notifications."""
+        with self._lock:
+            return sum(len(events) for events in self._buffers.values())
+
+    def start(self) -> None:
+        """Send due digests from the running event loop even when no new event arrives."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.window, 1.0))
+            if self.pending():
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error(f"Notification digest flush failed: {e}")
+
+    async def stop(self) -> None:
+        """Stop the schedule and send whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.flush, True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of buffered notifications and digests sent."""
+        with self._lock:
+            buffered = {destination: len(events) for destination, events in self._buffers.items()}
+            return {
+                "destinations": settings.NOTIFICATION_DESTINATIONS,
+                "events": self.events,
+                "digests": self.digests,
+                "dropped": self.dropped,
+                "buffered": buffered
+            }
+
+# Shared aggregator fed by the workflow workers
+notification_aggregator = NotificationAggregator()
@@ -0,0 +1,269 @@
+# core/retention.py
+"""
+Retention of finished workflows.
+
+Workflows older than the TTL of their status are written to compressed JSONL
+archives and deleted in batches of RETENTION_BATCH_SIZE, each batch in its own
+short write transaction so API writers are never blocked for long. Freed pages
+are then handed back to the filesystem with an incremental vacuum.
+"""
+from typing import Dict, Any, Optional, List, Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+import asyncio
+import gzip
+import io
+import os
+import threading
+import logging
+from sqlalchemy import delete, text
+from sqlalchemy.orm import undefer_group
+from config import settings
+from core.database import (
+    WorkflowState,
+    WorkflowStateAgent,
+    WorkflowEvent,
+    get_db,
+    get_write_db,
+    json_serializer,
+    json_deserializer
+)
+from core.checkpoint import delete_checkpoints
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class WorkflowArchive:
+    """
+    Compressed JSONL archive of pruned workflows, one line per workflow.
+    Each batch is appended as a complete zstd frame (gzip member without
+    zstandard) and synced to disk before the batch is deleted.
+    """
+
+    def __init__(self, directory: str, started_at: datetime):
+        self.extension = ".jsonl.zst" if zstandard is not None else ".jsonl.gz"
+        self.path = Path(directory) / f"workflow_states-{started_at:%Y%m%dT%H%M%S}{self.extension}"
+        self.records = 0
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch of records and sync it to disk."""
+        data = b"".join(json_serializer(record).encode("utf-8") + b"\n" for record in records)
+        if zstandard is not None:
+            data = zstandard.ZstdCompressor(level=settings.DB_COMPRESSION_LEVEL).compress(data)
+        else:
+            data = gzip.compress(data)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += len(records)
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the workflows stored in an archive file."""
+    with open(path, "rb") as f:
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst archives")
+            stream = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        else:
+            stream = gzip.GzipFile(fileobj=f)
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            if line.strip():
+                yield json_deserializer(line)
+
+def _load_records(state_ids: List[int]) -> List[Dict[str, Any]]:
+    """Load the full records of workflows, with their agents and transcript events."""
+    with get_db() as db:
+        states = (
+            db.query(WorkflowState)
+            .options(undefer_group("payload"))
+            .filter(WorkflowState.id.in_(state_ids))
+            .order_by(WorkflowState.id)
+            .all()
+        )
+        records = {state.id: {**state.to_dict(), "agents": [], "events": []} for state in states}
+        for state_id, agent in db.query(
+            WorkflowStateAgent.state_id, WorkflowStateAgent.agent
+        ).filter(WorkflowStateAgent.state_id.in_(state_ids)):
+            records[state_id]["agents"].append(agent)
+        for event in (
+            db.query(WorkflowEvent)
+            .filter(WorkflowEvent.state_id.in_(state_ids))
+            .order_by(WorkflowEvent.state_id, WorkflowEvent.seq)
+        ):
+            records[event.state_id]["events"].append(event.to_dict())
+        return list(records.values())
+
+def _expired_ids(status: str, cutoff: datetime, limit: int) -> List[int]:
+    """Oldest workflows of a status created before cutoff (served by the status/created_at index)."""
+    with get_db() as db:
+        return [
+            state_id for (state_id,) in db.query(WorkflowState.id)
+            .filter(WorkflowState.status == status, WorkflowState.created_at < cutoff)
+            .order_by(WorkflowState.created_at)
+            .limit(limit)
+        ]
+
+def _count_expired(status: str, cutoff: datetime) -> int:
+    with get_db() as db:
+        return (
+            db.query(WorkflowState.id)
+            .filter(WorkflowState.status == status, WorkflowState.created_at < cutoff)
+            .count()
+        )
+
+def incremental_vacuum(max_pages: Optional[int] = None) -> int:
+    """
+    Return up to max_pages free pages to the filesystem (all when 0).
+    Needs auto_vacuum=INCREMENTAL: set by DB_AUTO_VACUUM on new databases, or
+    by enable_incremental_vacuum on existing ones. Returns the pages freed.
+    """
+    max_pages = settings.RETENTION_VACUUM_PAGES if max_pages is None else max_pages
+    with get_write_db() as db:
+        if db.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+            logger.info("auto_vacuum is not INCREMENTAL; free pages are reused but not returned")
+            return 0
+        before = db.execute(text("PRAGMA freelist_count")).scalar()
+        # sqlite3 steps a statement without result rows only once, which frees a
+        # single page; executescript runs the pragma to completion
+        db.connection().connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(max_pages)});"
+        )
+        after = db.execute(text("PRAGMA freelist_count")).scalar()
+        db.commit()
+        return before - after
+
+def enable_incremental_vacuum() -> None:
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL.
+    This rebuilds the whole file with VACUUM, blocking writers meanwhile, so run
+    it once during maintenance rather than on a schedule.
+    """
+    with get_write_db() as db:
+        # executescript commits the session's open transaction first; VACUUM cannot run inside one
+        db.connection().connection.driver_connection.executescript(
+            "PRAGMA auto_vacuum=INCREMENTAL; VACUUM;"
+        )
+
+# Outcome of the last retention run in this process, reported by /metrics
+_last_run: Dict[str, Any] = {}
+_run_lock = threading.Lock()
+
+def run_retention(
+    ttl_days: Optional[Dict[str, float]] = None,
+    archive_dir: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    vacuum_pages: Optional[int] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Archive and delete the workflows whose status TTL expired, then vacuum.
+    With dry_run only counts the expired workflows. Returns the run's statistics.
+    """
+    ttl_days = settings.RETENTION_TTL_DAYS if ttl_days is None else ttl_days
+    archive_dir = archive_dir or settings.RETENTION_ARCHIVE_DIR
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    now = now or datetime.utcnow()
+
+    with _run_lock:
+        result: Dict[str, Any] = {
+            "started_at": now.isoformat(),
+            "dry_run": dry_run,
+            "expired": {},
+            "archived": 0,
+            "deleted": 0,
+            "archive": None,
+            "vacuumed_pages": 0
+        }
+        archive = WorkflowArchive(archive_dir, now)
+        try:
+            for status, days in ttl_days.items():
+                cutoff = now - timedelta(days=days)
+                if dry_run:
+                    result["expired"][status] = _count_expired(status, cutoff)
+                    continue
+
+                result["expired"][status] = 0
+                while True:
+                    state_ids = _expired_ids(status, cutoff, batch_size)
+                    if not state_ids:
+                        break
+                    # Archive before deleting so a crash never loses a workflow
+                    archive.append(_load_records(state_ids))
+                    with get_write_db() as db:
+                        # Agents and events go with their workflow (ON DELETE CASCADE)
+                        deleted = db.execute(
+                            delete(WorkflowState).where(WorkflowState.id.in_(state_ids))
+                        ).rowcount
+                        db.commit()
+                    for state_id in state_ids:
+                        delete_checkpoints(state_id)
+                    result["expired"][status] += len(state_ids)
+                    result["deleted"] += deleted
+
+            if not dry_run:
+                result["archived"] = archive.records
+                result["archive"] = str(archive.path) if archive.records else None
+                result["vacuumed_pages"] = incremental_vacuum(vacuum_pages)
+            logger.info(
+                f"Retention run archived {result['archived']} and deleted {result['deleted']} workflows"
+            )
+        except Exception as e:
+            logger.error(f"Retention run failed: {e}")
+            result["error"] = str(e)
+            raise
+        finally:
+            result["finished_at"] = datetime.utcnow().isoformat()
+            if not dry_run:
+                _last_run.clear()
+                _last_run.update(result)
+        return result
+
+def get_retention_stats() -> Dict[str, Any]:
+    """Get the retention settings and the outcome of the last run in this process."""
+    return {
+        "enabled": settings.RETENTION_ENABLED,
+        "ttl_days": settings.RETENTION_TTL_DAYS,
+        "last_run": dict(_last_run) or None
+    }
+
+class RetentionScheduler:
+    """Runs the retention job every RETENTION_INTERVAL seconds on the server's event loop."""
+
+    def __init__(self, interval: Optional[int] = None):
+        self.interval = interval or settings.RETENTION_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the schedule on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Off the event loop and off the database pool used by the handlers
+                await asyncio.to_thread(run_retention)
+            except Exception as e:
+                logger.error(f"Scheduled retention run failed: {e}")
+
+    def stop(self) -> None:
+        """Cancel the schedule."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Shared retention schedule started by the API when RETENTION_ENABLED is set
+retention_scheduler = RetentionScheduler()
@@ -0,0 +1,200 @@
+# core/search_cache.py
+"""
+Shared cache of web search results.
+
+Results are keyed by search engine and normalized query, kept for
+SEARCH_CACHE_TTL seconds in a size-bounded LRU and, with SEARCH_CACHE_PATH, in a
+SQLite file that outlives the process. Concurrent searches for the same query
+wait for the first one instead of calling the engine again.
+"""
+from typing import Dict, Any, Optional, Callable
+from collections import OrderedDict
+from concurrent.futures import Future
+import sqlite3
+import threading
+import time
+import logging
+from config import settings
+from core.llm_cache import CacheStats
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so equivalent queries share an entry."""
+    return " ".join(query.split()).casefold()
+
+def make_search_key(engine: str, query: str) -> str:
+    """Build the cache key of a query on a search engine."""
+    return f"{engine}\0{normalize_query(query)}"
+
+class SearchCache:
+    """LRU cache of search results with a TTL, optional SQLite persistence and in-flight de-duplication."""
+
+    def __init__(self, max_entries: int = None, ttl: int = None, path: Optional[str] = None):
+        self.max_entries = max_entries or settings.SEARCH_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.SEARCH_CACHE_TTL
+        self.path = path
+        self.stats = CacheStats()
+        self.deduplicated = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_lock = threading.Lock()
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_search_cache_created_at ON search_cache (created_at)")
+            self._conn.commit()
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        """Look up the LRU; the caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time() - self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _memory_put(self, key: str, result: str, created_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (created_at, result)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.record_eviction(evicted)
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        if self._conn is None:
+            return None
+        with self._disk_lock:
+            return self._conn.execute(
+                "SELECT created_at, value FROM search_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+
+    def _disk_put(self, key: str, result: str, created_at: float) -> None:
+        if self._conn is None:
+            return
+        with self._disk_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, created_at, value) VALUES (?, ?, ?)",
+                (key, created_at, result)
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE created_at <= ?", (created_at - self.ttl,))
+            self._conn.execute(
+                """
+                DELETE FROM search_cache WHERE key IN (
+                    SELECT key FROM search_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def get_or_search(self, engine: str, query: str, search: Callable[[], str]) -> str:
+        """
+        Get the cached result of a query, or run search and cache its result.
+        Callers asking for a query already being searched wait for that search;
+        errors propagate to all of them and are not cached.
+        """
+        key = make_search_key(engine, query)
+        with self._lock:
+            result = self._memory_get(key)
+            if result is not None:
+                leader = None
+            else:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = Future()
+        if leader is None:
+            self.stats.record(hit=True)
+            return result
+        if not leader:
+            with self._lock:
+                self.deduplicated += 1
+            return future.result()
+
+        try:
+            row = self._disk_get(key)
+            if row is not None:
+                created_at, result = row
+                self.stats.record(hit=True)
+            else:
+                self.stats.record(hit=False)
+                result = search()
+                created_at = time.time()
+                self._disk_put(key, result, created_at)
+            self._memory_put(key, result, created_at)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+        if self._conn is not None:
+            with self._disk_lock:
+                self._conn.execute("DELETE FROM search_cache")
+                self._conn.commit()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, deduplicated = len(self._entries), self.deduplicated
+        return {
+            "persistent": self._conn is not None,
+            "entries": entries,
+            "deduplicated": deduplicated,
+            **self.stats.to_dict()
+        }
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Get the process-wide search cache, or None when SEARCH_CACHE_ENABLED is off."""
+    global _search_cache
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(path=settings.SEARCH_CACHE_PATH or None)
+        return _search_cache
+
+def cached_search(engine: str, query: str, search: Callable[[], str]) -> str:
+    """Run a search through the shared cache, or directly when it is disabled."""
+    cache = get_search_cache()
+    if cache is None:
+        return search()
+    return cache.get_or_search(engine, query, search)
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss metrics of the search cache."""
+    cache = _search_cache
+    if cache is None:
+        return {"enabled": settings.SEARCH_CACHE_ENABLED}
+    return {"enabled": True, **cache.to_dict()}
@@ -1,7 +1,6 @@
 # core/state.py
 from typing import TypedDict, List, Dict, Any, Optional
-from core.database import SessionLocal, WorkflowState
-import json
+from core.database import save_workflow_state, get_workflow_state
 
 class State(TypedDict):
     """Shared state used in the multi-agent framework."""
@@ -10,30 +9,21 @@ class State(TypedDict):
 
 def save_state(input_data: Dict[str, Any], state: State, workflow_type: str) -> int:
     """
-    Save the current state to the database.
+    Save the current state to the database, with its agents for the workflow listing.
     Returns the state ID.
     """
     try:
-        db = SessionLocal()
-        db_state = WorkflowState(
-            input_data=json.dumps(input_data),
-            state_data=json.dumps(state["data_store"]),
-            messages=json.dumps(state["messages"]),
+        return save_workflow_state(
+            input_data=input_data,
+            state_data=state["data_store"],
+            messages=state["messages"],
             workflow_type=workflow_type,
-            status="completed"
+            status="completed",
+            agents=state["data_store"].get("agents", [])
         )
-        db.add(db_state)
-        db.commit()
-        db.refresh(db_state)
-        return db_state.id
     except Exception as e:
         print(f"Error saving state: {e}")
-        if db:
-            db.rollback()
         raise
-    finally:
-        if db:
-            db.close()
 
 def load_state(state_id: int) -> Optional[Dict[str, Any]]:
     """
@@ -41,12 +31,10 @@ def load_state(state_id: int) -> Optional[Dict[str, Any]]:
     Returns None if the state is not found.
     """
     try:
-        db = SessionLocal()
-        state = db.query(WorkflowState).filter(WorkflowState.id == state_id).first()
-        if not state:
+        state_dict = get_workflow_state(state_id)
+        if not state_dict:
             return None
             
-        state_dict = state.to_dict()
         return {
             "messages": state_dict["messages"],
             "data_store": state_dict["state_data"],
@@ -56,8 +44,6 @@ def load_state(state_id: int) -> Optional[Dict[str, Any]]:
     except Exception as e:
         print(f"Error loading state: {e}")
         return None
-    finally:
-        db.close()
 
 def create_initial_state(input_data: Dict[str, Any], agents: List[str], workflow_type: str) -> State:
     """
@@ -1,128 +1,300 @@
 # core/webhooks.py
-import requests
-import logging
-from config import WEBHOOK_URLS, NOTION_API_KEY, NOTION_DATABASE_ID, GITHUB_ACCESS_TOKEN, GITHUB_REPO_OWNER, GITHUB_REPO_NAME, SLACK_CHANNEL
-import os
+"""
+Outgoing notifications to webhooks, Notion, GitHub, Zapier and Slack.
+
+The send functions only queue a delivery in the webhook_outbox table, so callers
+never wait on a third-party endpoint. The WebhookDispatcher running on the
+server's event loop delivers the queue over the shared async HTTP pool, with a
+concurrency limit per destination and exponential backoff with jitter between
+attempts.
+"""
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta
+import asyncio
 import json
-from typing import Dict, List, Any
+import random
+import threading
+import logging
+import httpx
+from config import (
+    settings,
+    WEBHOOK_URLS,
+    NOTION_API_KEY,
+    NOTION_DATABASE_ID,
+    GITHUB_ACCESS_TOKEN,
+    GITHUB_REPO_OWNER,
+    GITHUB_REPO_NAME,
+    SLACK_CHANNEL
+)
+from core.database import (
+    enqueue_webhooks,
+    claim_webhooks,
+    complete_webhook,
+    reschedule_webhook,
+    get_webhook_outbox_counts
+)
+from core.http_client import get_async_http_client
 
-logging.basicConfig(level=logging.INFO)
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
 
-def send_webhook(event: str, payload: dict):
-    """Send webhook notifications based on the event type."""
-    url = WEBHOOK_URLS.get(event)
-    if not url:
-        logging.warning(f"No webhook URL configured for event: {event}")
-        return
-    
+# Client errors worth retrying; other 4xx responses will not succeed on a retry
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429}
+
+# Notion caps each rich text object at 2000 characters and a property at 100 objects
+NOTION_TEXT_LIMIT = 2000
+NOTION_RICH_TEXT_MAX_ITEMS = 100
+
+def enqueue(destination: str, url: str, payload: Dict[str, Any]) -> bool:
+    """Queue a delivery for the dispatcher. Returns True once it is stored."""
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        logging.info(f"Webhook {event} sent successfully: {response.status_code}")
+        enqueue_webhooks([{"destination": destination, "url": url, "payload": payload}])
     except Exception as e:
-        logging.error(f"Error sending {event} webhook: {e}")
+        logger.error(f"Error queueing {destination} webhook: {e}")
+        return False
+    webhook_dispatcher.notify()
+    return True
 
-def send_notion_update(state_id: str, messages: List[str], data_store: Dict[str, Any]) -> bool:
+def destination_headers(destination: str) -> Dict[str, str]:
     """
-    Update Notion database with workflow state information.
-    Returns True if successful, False otherwise.
+    Request headers of a destination.
+    Credentials are added at delivery time rather than stored in the outbox.
     """
-    if not NOTION_API_KEY or not NOTION_DATABASE_ID:
-        print("Notion credentials not configured")
-        return False
-
-    try:
-        headers = {
+    if destination == "notion":
+        return {
             "Authorization": f"Bearer {NOTION_API_KEY}",
-            "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
-
-        data = {
-            "parent": {"database_id": NOTION_DATABASE_ID},
-            "properties": {
-                "State ID": {"title": [{"text": {"content": str(state_id)}}]},
-                "Status": {"select": {"name": "Completed"}},
-                "Messages": {"rich_text": [{"text": {"content": "\n".join(messages)}}]},
-                "Data Store": {"rich_text": [{"text": {"content": json.dumps(data_store, indent=2)}}]}
-            }
+    if destination == "github":
+        return {
+            "Authorization": f"Bearer {GITHUB_ACCESS_TOKEN}",
+            "Accept": "application/vnd.github.v3+json"
         }
+    return {}
 
-        response = requests.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=data
-        )
-        response.raise_for_status()
-        return True
-
-    except Exception as e:
-        print(f"Error updating Notion: {str(e)}")
+def send_webhook(event: str, payload: dict) -> bool:
+    """Queue a webhook notification for the event type."""
+    url = WEBHOOK_URLS.get(event)
+    if not url:
+        logger.warning(f"No webhook URL configured for event: {event}")
         return False
+    return enqueue(event, url, payload)
 
-def create_github_issue(error_message: str) -> bool:
+def chunk_text(text: str, limit: int = NOTION_TEXT_LIMIT) -> List[str]:
+    """Split text into chunks of at most limit characters, at line breaks where possible."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit) + 1 or limit
+        chunks.append(text[:cut])
+        text = text[cut:]
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+def notion_rich_text(text: str) -> List[Dict[str, Any]]:
+    """Rich text property value of a long text, cut to Notion's limits."""
+    chunks = chunk_text(text)
+    if len(chunks) > NOTION_RICH_TEXT_MAX_ITEMS:
+        logger.warning(f"Truncating Notion text of {len(text)} characters")
+        chunks = chunks[:NOTION_RICH_TEXT_MAX_ITEMS]
+    return [{"text": {"content": chunk}} for chunk in chunks]
+
+def send_notion_page(title: str, status: str, messages: str, data_store: str) -> bool:
     """
-    Create a GitHub issue for workflow errors.
-    Returns True if successful, False otherwise.
+    Queue a page in the Notion database.
+    Returns True if queued, False otherwise.
     """
-    if not GITHUB_ACCESS_TOKEN or not GITHUB_REPO_OWNER or not GITHUB_REPO_NAME:
-        print("GitHub credentials not configured")
+    if not NOTION_API_KEY or not NOTION_DATABASE_ID:
+        logger.warning("Notion credentials not configured")
         return False
 
-    try:
-        url = WEBHOOK_URLS["github"].format(owner=GITHUB_REPO_OWNER, repo=GITHUB_REPO_NAME)
-        headers = {
-            "Authorization": f"Bearer {GITHUB_ACCESS_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
+    data = {
+        "parent": {"database_id": NOTION_DATABASE_ID},
+        "properties": {
+            "State ID": {"title": notion_rich_text(title)},
+            "Status": {"select": {"name": status}},
+            "Messages": {"rich_text": notion_rich_text(messages)},
+            "Data Store": {"rich_text": notion_rich_text(data_store)}
         }
-        
-        data = {
-            "title": "Workflow Error Detected",
-            "body": f"An error occurred in the workflow:\n\n```\n{error_message}\n```\n\nPlease investigate and resolve.",
-            "labels": ["bug", "workflow-error"]
-        }
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        return True
+    }
+    return enqueue("notion", WEBHOOK_URLS["notion"], data)
 
-    except Exception as e:
-        print(f"Error creating GitHub issue: {str(e)}")
-        return False
+def send_notion_update(state_id: str, messages: List[str], data_store: Dict[str, Any]) -> bool:
+    """
+    Queue a Notion page with workflow state information.
+    Returns True if queued, False otherwise.
+    """
+    return send_notion_page(str(state_id), "Completed", "\n".join(messages), json.dumps(data_store, indent=2))
 
-def trigger_zapier_workflow(payload: Dict[str, Any]) -> bool:
+def create_github_issue(error_message: str) -> bool:
     """
-    Trigger a Zapier workflow with the provided payload.
-    Returns True if successful, False otherwise.
+    Queue a GitHub issue for workflow errors.
+    Returns True if queued, False otherwise.
     """
-    if not WEBHOOK_URLS["zapier"]:
-        print("Zapier webhook URL not configured")
+    if not GITHUB_ACCESS_TOKEN or not GITHUB_REPO_OWNER or not GITHUB_REPO_NAME:
+        logger.warning("GitHub credentials not configured")
         return False
 
-    try:
-        response = requests.post(WEBHOOK_URLS["zapier"], json=payload)
-        response.raise_for_status()
-        return True
+    url = WEBHOOK_URLS["github"].format(owner=GITHUB_REPO_OWNER, repo=GITHUB_REPO_NAME)
+    data = {
+        "title": "Workflow Error Detected",
+        "body": f"An error occurred in the workflow:\n\n```\n{error_message}\n```\n\nPlease investigate and resolve.",
+        "labels": ["bug", "workflow-error"]
+    }
+    return enqueue("github", url, data)
 
-    except Exception as e:
-        print(f"Error triggering Zapier workflow: {str(e)}")
+def trigger_zapier_workflow(payload: Dict[str, Any]) -> bool:
+    """
+    Queue a Zapier workflow trigger with the provided payload.
+    Returns True if queued, False otherwise.
+    """
+    if not WEBHOOK_URLS["zapier"]:
+        logger.warning("Zapier webhook URL not configured")
         return False
+    return enqueue("zapier", WEBHOOK_URLS["zapier"], payload)
 
 def send_slack_notification(message: str) -> bool:
     """
-    Send a notification to Slack.
-    Returns True if successful, False otherwise.
+    Queue a notification to Slack.
+    Returns True if queued, False otherwise.
     """
     if not SLACK_CHANNEL:
-        print("Slack channel not configured")
+        logger.warning("Slack channel not configured")
         return False
+    return enqueue("slack", WEBHOOK_URLS["slack"], {"text": message, "channel": SLACK_CHANNEL})
 
-    try:
-        payload = {"text": message, "channel": SLACK_CHANNEL}
-        response = requests.post(WEBHOOK_URLS["slack"], json=payload)
-        response.raise_for_status()
-        return True
+def backoff_delay(attempts: int) -> float:
+    """
+    Seconds to wait after a delivery's attempts-th failure.
+    The delay doubles per attempt up to WEBHOOK_BACKOFF_MAX, and half of it is
+    random so deliveries that failed together do not retry together.
+    """
+    delay = min(settings.WEBHOOK_BACKOFF_MAX, settings.WEBHOOK_BACKOFF_BASE * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)
 
-    except Exception as e:
-        print(f"Error sending Slack notification: {str(e)}")
-        return False
\ No newline at end of file
+class WebhookDispatcher:
+    """Delivers the webhook outbox from a task on the server's event loop."""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._counters = {"delivered": 0, "retried": 0, "failed": 0}
+        self._counters_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start delivering on the running event loop."""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop delivering; unfinished deliveries stay queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """Wake the dispatcher after a delivery was queued; safe from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self._client or get_async_http_client()
+
+    def _semaphore(self, destination: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(destination)
+        if semaphore is None:
+            semaphore = self._semaphores[destination] = asyncio.Semaphore(settings.WEBHOOK_DESTINATION_CONCURRENCY)
+        return semaphore
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delivered = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Webhook dispatch failed: {e}")
+                delivered = 0
+            if delivered < settings.WEBHOOK_BATCH_SIZE:
+                # The outbox is drained: sleep until the next poll or a new delivery
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.WEBHOOK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def dispatch_once(self) -> int:
+        """Claim one batch of due deliveries and attempt them. Returns the number claimed."""
+        # A claimed row must outlive the wait behind its destination's semaphore
+        lease = settings.WEBHOOK_TIMEOUT * (
+            settings.WEBHOOK_BATCH_SIZE // settings.WEBHOOK_DESTINATION_CONCURRENCY + 2
+        )
+        deliveries = await asyncio.to_thread(claim_webhooks, settings.WEBHOOK_BATCH_SIZE, lease)
+        if deliveries:
+            await asyncio.gather(*(self._deliver(delivery) for delivery in deliveries))
+        return len(deliveries)
+
+    async def _deliver(self, delivery: Dict[str, Any]) -> None:
+        """Send one delivery and record the outcome in the outbox."""
+        destination = delivery["destination"]
+        error = None
+        retryable = True
+        async with self._semaphore(destination):
+            try:
+                response = await self._get_client().post(
+                    delivery["url"],
+                    json=delivery["payload"],
+                    headers=destination_headers(destination),
+                    timeout=settings.WEBHOOK_TIMEOUT
+                )
+                if response.status_code >= 400:
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+
+        if error is None:
+            await asyncio.to_thread(complete_webhook, delivery["id"])
+            self._count("delivered")
+            logger.info(f"Webhook {destination} delivered")
+            return
+
+        if retryable and delivery["attempts"] < settings.WEBHOOK_MAX_ATTEMPTS:
+            next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_delay(delivery["attempts"]))
+            self._count("retried")
+            logger.warning(f"Webhook {destination} attempt {delivery['attempts']} failed, retrying: {error}")
+        else:
+            next_attempt_at = None
+            self._count("failed")
+            logger.error(f"Webhook {destination} failed after {delivery['attempts']} attempts: {error}")
+        await asyncio.to_thread(reschedule_webhook, delivery["id"], error, next_attempt_at)
+
+    def _count(self, outcome: str) -> None:
+        with self._counters_lock:
+            self._counters[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery outcomes in this process and the outbox rows by status."""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            **counters,
+            "outbox": get_webhook_outbox_counts()
+        }
+
+# Shared dispatcher started by the API when WEBHOOK_DISPATCHER_ENABLED is set
+webhook_dispatcher = WebhookDispatcher()
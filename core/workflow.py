@@ -1,20 +1,223 @@
-from typing import Dict, Any
-from core.state import State
-from core.graph_builder import compiled_graph
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+import asyncio
+import threading
+import logging
+from config import settings
+from core.graph_builder import create_initial_state, get_compiled_graph
+from core.database import update_workflow_state, update_workflow_status, append_workflow_events
+from core.memory import run_memories
+from core.checkpoint import get_checkpointer, thread_config
+from core.notifications import notification_aggregator
+from integrations.streaming import (
+    workflow_events,
+    translate_graph_event,
+    WORKFLOW_STATUS,
+    WORKFLOW_FINISHED
+)
+
+# Initialize logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+def serialize_messages(messages: List[Any]) -> List[str]:
+    """Convert graph messages into the plain strings stored with a workflow."""
+    return [getattr(message, "content", message) for message in messages]
+
+def message_events(messages: List[Any], node: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Convert graph messages into workflow event rows; plain strings are system messages."""
+    return [
+        {"node": node, "role": getattr(message, "type", "system"), "content": content}
+        for message, content in zip(messages, serialize_messages(messages))
+    ]
 
 class WorkflowManager:
     """Manages the execution of the agent workflow."""
-    
-    def __init__(self):
-        self.graph = compiled_graph
-    
-    def execute(self, initial_state: Dict[str, Any]) -> State:
-        """Execute the workflow with the given initial state."""
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or settings.MAX_CONCURRENT_WORKFLOWS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the bounded worker pool shared by all queued workflows."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="workflow"
+                )
+            return self._executor
+
+    def submit(
+        self,
+        state_id: int,
+        input_data: Dict[str, Any],
+        agents: List[str],
+        workflow_type: str,
+        resume: bool = False
+    ) -> Future:
+        """
+        Queue a persisted workflow for background execution.
+        At most max_workers workflows run at once; the rest wait in the pool queue.
+        With resume=True the run continues from the workflow's last checkpoint.
+        """
+        workflow_events.open(state_id)
+        future = self._get_executor().submit(
+            self._run_job, state_id, input_data, agents, workflow_type, resume
+        )
+        with self._lock:
+            self._jobs[state_id] = future
+        future.add_done_callback(lambda _: self._forget(state_id))
+        return future
+
+    def _forget(self, state_id: int) -> None:
+        """Drop a finished job from the active job table."""
+        with self._lock:
+            self._jobs.pop(state_id, None)
+
+    def active_jobs(self) -> int:
+        """Number of workflows currently queued or running."""
+        with self._lock:
+            return len(self._jobs)
+
+    def _run_job(
+        self,
+        state_id: int,
+        input_data: Dict[str, Any],
+        agents: List[str],
+        workflow_type: str,
+        resume: bool = False
+    ) -> None:
+        """
+        Run a queued workflow and persist its final state.
+        The transcript is appended to the workflow's events as each node finishes,
+        so the final update only rewrites the state and status. When checkpointing
+        is on, the graph state is saved after every node; a failed run keeps its
+        checkpoints so a resumed run skips the nodes that already finished.
+        """
+        update_workflow_status(state_id, "running")
+        workflow_events.publish(state_id, WORKFLOW_STATUS, {"status": "running"})
+        initial_state = create_initial_state(
+            input_data=input_data,
+            agents=agents,
+            workflow_type=workflow_type,
+            run_id=state_id
+        )
+
+        failure_events: List[Dict[str, Any]] = []
+        checkpointer = get_checkpointer()
+        graph_finished = False
         try:
-            state = State(**initial_state)
-            return self.graph.invoke(state)
+            graph = get_compiled_graph(workflow_type, agents)
+            config = None
+            if checkpointer is not None:
+                graph = graph.copy(update={"checkpointer": checkpointer})
+                config = thread_config(state_id)
+            if resume:
+                # No input: LangGraph continues from the thread's last checkpoint
+                graph_input = None
+            else:
+                if checkpointer is not None:
+                    # A fresh run must not build on checkpoints left under a reused id
+                    checkpointer.delete_thread(str(state_id))
+                append_workflow_events(state_id, message_events(initial_state["messages"]))
+                graph_input = initial_state
+            final_state = asyncio.run(self._stream_graph(state_id, graph, graph_input, config))
+            graph_finished = True
+            data_store = final_state["data_store"]
+            if data_store.get("status") in (None, "pending", "running"):
+                data_store["status"] = "completed"
         except Exception as e:
-            return State(
-                messages=[f"Workflow error: {str(e)}"],
-                data_store={'error': str(e)}
-            ) 
\ No newline at end of file
+            logger.error(f"Workflow {state_id} execution failed: {e}")
+            final_state = initial_state
+            final_state["messages"].append(f"Workflow execution failed: {str(e)}")
+            failure_events = message_events(final_state["messages"][-1:])
+            final_state["data_store"]["status"] = "failed"
+            final_state["data_store"]["error"] = str(e)
+
+        try:
+            append_workflow_events(state_id, failure_events)
+            update_workflow_state(
+                state_id=state_id,
+                state_data=final_state["data_store"],
+                messages=None,
+                status=final_state["data_store"]["status"]
+            )
+            if checkpointer is not None and graph_finished:
+                # Checkpoints only matter for resuming an interrupted run
+                checkpointer.delete_thread(str(state_id))
+        except Exception as e:
+            logger.error(f"Failed to persist workflow {state_id}: {e}")
+            update_workflow_status(state_id, "failed")
+        finally:
+            try:
+                # Buffered into digests; nothing is sent to the destinations from here
+                notification_aggregator.workflow_finished(
+                    state_id,
+                    final_state["data_store"]["status"],
+                    serialize_messages(final_state["messages"]),
+                    final_state["data_store"]
+                )
+            except Exception as e:
+                logger.error(f"Failed to notify the end of workflow {state_id}: {e}")
+            run_memories.release(state_id)
+            workflow_events.publish(state_id, WORKFLOW_FINISHED, {
+                "status": final_state["data_store"]["status"],
+                "error": final_state["data_store"].get("error")
+            })
+            workflow_events.close(state_id)
+
+    async def _stream_graph(
+        self,
+        state_id: int,
+        graph: Any,
+        graph_input: Optional[Dict[str, Any]],
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a graph through astream_events, publishing node, tool and token events
+        to the workflow's stream subscribers and appending each node's new messages
+        to the workflow's events. Returns the final graph state.
+        """
+        node_names = set(getattr(graph, "nodes", {}))
+        root_run_id = None
+        final_state = None
+
+        async for event in graph.astream_events(graph_input, config, version="v2"):
+            if root_run_id is None and event["event"] == "on_chain_start":
+                root_run_id = event["run_id"]
+                continue
+            if event["event"] == "on_chain_end" and event["run_id"] == root_run_id:
+                final_state = event["data"].get("output")
+                continue
+            if (
+                event["event"] == "on_chain_end"
+                and event["name"] in node_names
+                and event.get("metadata", {}).get("langgraph_node") == event["name"]
+            ):
+                output = event["data"].get("output")
+                if isinstance(output, dict) and output.get("messages"):
+                    append_workflow_events(state_id, message_events(output["messages"], event["name"]))
+
+            translated = translate_graph_event(event, node_names)
+            if translated:
+                workflow_events.publish(state_id, *translated)
+
+        if final_state is None:
+            raise RuntimeError("Workflow finished without producing a final state")
+        return final_state
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting new workflows and release the worker pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+# Shared workflow manager used by the API
+workflow_manager = WorkflowManager()
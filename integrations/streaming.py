@@ -1,5 +1,26 @@
 # integrations/streaming.py
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import deque
+import asyncio
+import threading
+import json
+import logging
 from core.state import State
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Event names sent to stream subscribers
+NODE_STARTED = "node_started"
+NODE_FINISHED = "node_finished"
+TOOL_STARTED = "tool_started"
+TOOL_FINISHED = "tool_finished"
+TOKEN = "token"
+WORKFLOW_STATUS = "workflow_status"
+WORKFLOW_FINISHED = "workflow_finished"
+
+# Workflow statuses after which a workflow no longer changes
+TERMINAL_STATUSES = ("completed", "failed")
 
 def stream_output(state: State) -> State:
     """Stream the processed output."""
@@ -8,4 +29,116 @@ def stream_output(state: State) -> State:
     print("\nStreaming Output:")
     print(f"Final processed result: {state['data_store'].get('b_processed', '')}")
     state['messages'].append("Streaming complete.")
-    return state
\ No newline at end of file
+    return state
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format an event as a Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def translate_graph_event(event: Dict[str, Any], node_names: Set[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Translate a LangChain astream_events event into a stream event.
+    Returns None for events that are not forwarded to clients.
+    """
+    kind = event.get("event")
+    name = event.get("name")
+    data = event.get("data", {})
+    node = event.get("metadata", {}).get("langgraph_node", name)
+
+    if kind == "on_chain_start" and name in node_names:
+        return NODE_STARTED, {"node": name}
+    if kind == "on_chain_end" and name in node_names:
+        return NODE_FINISHED, {"node": name}
+    if kind == "on_tool_start":
+        return TOOL_STARTED, {"node": node, "tool": name, "input": data.get("input")}
+    if kind == "on_tool_end":
+        return TOOL_FINISHED, {"node": node, "tool": name, "output": str(data.get("output", ""))}
+    if kind == "on_chat_model_stream":
+        content = getattr(data.get("chunk"), "content", "")
+        if content:
+            return TOKEN, {"node": node, "content": content}
+    return None
+
+class _Channel:
+    """Live event channel of a single workflow."""
+
+    def __init__(self, history_size: int):
+        self.history: deque = deque(maxlen=history_size)
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.closed = False
+
+class WorkflowEventBroker:
+    """
+    Fans out workflow progress events from worker threads to SSE subscribers.
+    Each open workflow keeps a bounded history so late subscribers get replayed
+    events; the channel is dropped once the workflow finishes.
+    """
+
+    def __init__(self, history_size: int = None):
+        self.history_size = history_size or settings.STREAM_HISTORY_SIZE
+        self._channels: Dict[int, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def open(self, state_id: int) -> None:
+        """Open the channel of a queued workflow."""
+        with self._lock:
+            self._channels.setdefault(state_id, _Channel(self.history_size))
+
+    def publish(self, state_id: int, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event to every subscriber of a workflow. Safe to call from any thread."""
+        item = (event, data)
+        with self._lock:
+            channel = self._channels.get(state_id)
+            if channel is None or channel.closed:
+                return
+            channel.history.append(item)
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            self._deliver(loop, queue, item)
+
+    def close(self, state_id: int) -> None:
+        """Signal end of stream to subscribers and drop the channel."""
+        with self._lock:
+            channel = self._channels.pop(state_id, None)
+            if channel is None:
+                return
+            channel.closed = True
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            self._deliver(loop, queue, None)
+
+    def subscribe(self, state_id: int) -> Optional[asyncio.Queue]:
+        """
+        Subscribe the running event loop to a workflow's events.
+        Returns None when the workflow has no open channel (it already finished).
+        The queue yields (event, data) tuples and None at end of stream.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            channel = self._channels.get(state_id)
+            if channel is None:
+                return None
+            for item in channel.history:
+                queue.put_nowait(item)
+            channel.subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, state_id: int, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        with self._lock:
+            channel = self._channels.get(state_id)
+            if channel is not None:
+                channel.subscribers = [s for s in channel.subscribers if s[1] is not queue]
+
+    @staticmethod
+    def _deliver(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, item: Any) -> None:
+        """Hand an item to a subscriber queue on its own event loop."""
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Subscriber loop already closed
+            logger.debug("Dropped stream event for closed event loop")
+
+# Shared broker used by the workflow manager and the API
+workflow_events = WorkflowEventBroker()
@@ -5,7 +5,11 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from core.database import Base
+from config import settings
+
+# The migrations own the schema: importing the models must not create their tables
+settings.DB_CREATE_TABLES = False
+from core.database import Base  # noqa: E402
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
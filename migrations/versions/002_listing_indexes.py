@@ -0,0 +1,82 @@
+"""Workflow timestamps, agent association table and listing indexes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite cannot add NOT NULL columns without a constant default, so add
+    # them nullable, backfill, then tighten them in a batch (table copy)
+    with op.batch_alter_table('workflow_states') as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE workflow_states SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"
+    )
+    op.execute(
+        "UPDATE workflow_states SET updated_at = created_at WHERE updated_at IS NULL"
+    )
+    with op.batch_alter_table('workflow_states') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_workflow_states_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_workflow_states_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index(
+            'ix_workflow_states_workflow_type_created_at', ['workflow_type', 'created_at'], unique=False
+        )
+
+    op.create_table(
+        'workflow_state_agents',
+        sa.Column('state_id', sa.Integer(), nullable=False),
+        sa.Column('agent', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['state_id'], ['workflow_states.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('state_id', 'agent')
+    )
+    op.create_index(
+        'ix_workflow_state_agents_agent_created_at',
+        'workflow_state_agents',
+        ['agent', 'created_at', 'state_id'],
+        unique=False
+    )
+
+    # Backfill agents from state_data["agents"]; older rows hold the JSON
+    # document double-encoded as a JSON string, so unwrap those first
+    op.execute("""
+        INSERT OR IGNORE INTO workflow_state_agents (state_id, agent, created_at)
+        SELECT ws.id, agents.value, ws.created_at
+        FROM workflow_states AS ws,
+             json_each(
+                 CASE WHEN json_type(ws.state_data) = 'text'
+                      THEN json_extract(ws.state_data, '$')
+                      ELSE ws.state_data END,
+                 '$.agents'
+             ) AS agents
+        WHERE json_valid(ws.state_data)
+          AND json_valid(CASE WHEN json_type(ws.state_data) = 'text'
+                              THEN json_extract(ws.state_data, '$')
+                              ELSE ws.state_data END)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflow_state_agents_agent_created_at', table_name='workflow_state_agents')
+    op.drop_table('workflow_state_agents')
+    with op.batch_alter_table('workflow_states') as batch_op:
+        batch_op.drop_index('ix_workflow_states_workflow_type_created_at')
+        batch_op.drop_index('ix_workflow_states_status_created_at')
+        batch_op.drop_index('ix_workflow_states_created_at')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,43 @@
+"""Store workflow payloads as single-encoded JSON
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+PAYLOAD_COLUMNS = ('state_data', 'messages')
+
+
+def upgrade() -> None:
+    # Rows written before this revision hold the JSON document encoded a second
+    # time as a JSON string; json_extract(..., '$') returns the inner document
+    for column in PAYLOAD_COLUMNS:
+        op.execute(f"""
+            UPDATE workflow_states
+            SET {column} = json_extract({column}, '$')
+            WHERE json_valid({column})
+              AND json_type({column}) = 'text'
+              AND json_valid(json_extract({column}, '$'))
+        """)
+
+    # input_data already held single-encoded JSON text; only its declared type changes
+    with op.batch_alter_table('workflow_states') as batch_op:
+        batch_op.alter_column('input_data', existing_type=sa.Text(), type_=sa.JSON(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('workflow_states') as batch_op:
+        batch_op.alter_column('input_data', existing_type=sa.JSON(), type_=sa.Text(), existing_nullable=False)
+
+    for column in PAYLOAD_COLUMNS:
+        op.execute(f"UPDATE workflow_states SET {column} = json_quote({column})")
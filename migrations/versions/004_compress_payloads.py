@@ -0,0 +1,80 @@
+"""Compress large workflow state and message payloads
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from core.compression import compress, decompress
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+PAYLOAD_COLUMNS = ('state_data', 'messages')
+BATCH_SIZE = 500
+
+
+def _rewrite(convert) -> None:
+    """Rewrite the payload columns of every row in id order, one batch at a time."""
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, state_data, messages FROM workflow_states "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            values = {column: convert(getattr(row, column)) for column in PAYLOAD_COLUMNS}
+            changed = {column: value for column, value in values.items() if value is not None}
+            if changed:
+                assignments = ", ".join(f"{column} = :{column}" for column in changed)
+                connection.execute(
+                    sa.text(f"UPDATE workflow_states SET {assignments} WHERE id = :id"),
+                    {"id": row.id, **changed}
+                )
+        last_id = rows[-1].id
+
+
+def _compress_text(value):
+    """Compressed form of a plain JSON text value, or None to leave it as is."""
+    if not isinstance(value, str):
+        return None
+    stored = compress(value)
+    return stored if isinstance(stored, bytes) else None
+
+
+def _decompress_blob(value):
+    """Plain JSON text of a compressed value, or None to leave it as is."""
+    if isinstance(value, str) or value is None:
+        return None
+    return decompress(value)
+
+
+def _vacuum() -> None:
+    """Return the pages freed by the rewrite to the filesystem."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # VACUUM cannot run inside a transaction; this commits the rewrite first
+    with op.get_context().autocommit_block():
+        op.execute('VACUUM')
+
+
+def upgrade() -> None:
+    _rewrite(_compress_text)
+    _vacuum()
+
+
+def downgrade() -> None:
+    _rewrite(_decompress_blob)
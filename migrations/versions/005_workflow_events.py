@@ -0,0 +1,63 @@
+"""Append-only workflow event table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.compression import compress
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing workflows keep their transcript in workflow_states.messages,
+    # which get_workflow_state falls back to when a workflow has no events
+    op.create_table(
+        'workflow_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('state_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('node', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('ts', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['state_id'], ['workflow_states.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_workflow_events_state_id_seq',
+        'workflow_events',
+        ['state_id', 'seq'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    # Fold transcripts recorded as events back into the messages column
+    connection = op.get_bind()
+    state_ids = connection.execute(
+        sa.text("SELECT DISTINCT state_id FROM workflow_events ORDER BY state_id")
+    ).scalars().all()
+    for state_id in state_ids:
+        messages = connection.execute(
+            sa.text("SELECT content FROM workflow_events WHERE state_id = :state_id ORDER BY seq"),
+            {"state_id": state_id}
+        ).scalars().all()
+        connection.execute(
+            sa.text("UPDATE workflow_states SET messages = :messages WHERE id = :id"),
+            {"id": state_id, "messages": compress(json.dumps(messages, separators=(",", ":"), ensure_ascii=False))}
+        )
+
+    op.drop_index('ix_workflow_events_state_id_seq', table_name='workflow_events')
+    op.drop_table('workflow_events')
@@ -0,0 +1,42 @@
+"""Webhook outbox table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('destination', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_webhook_outbox_status_next_attempt_at',
+        'webhook_outbox',
+        ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_webhook_outbox_status_next_attempt_at', table_name='webhook_outbox')
+    op.drop_table('webhook_outbox')
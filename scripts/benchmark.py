@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the workflow API.
+
+Drives /workflow/start/ and /workflow/{id}/ at a configurable concurrency against the
+in-process FastAPI app, using the offline fake LLM backend, and reports throughput,
+p50/p95/p99 latency and database time per request.
+
+Usage:
+    python scripts/benchmark.py --workflows 200 --concurrency 20 --output results.json
+    python scripts/benchmark.py --baseline results.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# Benchmark defaults; must be in place before the app reads its settings
+BENCHMARK_ENVIRONMENT = {
+    "LLM_BACKEND": "fake",
+    "LANGSMITH_TRACING_ENABLED": "false",
+    "DATABASE_URL": f"sqlite:///{Path(tempfile.gettempdir()) / 'langchain_agents_benchmark.db'}",
+    "API_KEY": "benchmark_api_key",
+    "MAX_REQUESTS": "1000000000",
+    "LOG_LEVEL": "WARNING",
+}
+
+TERMINAL_STATUSES = {"completed", "failed", "error"}
+PERCENTILES = (50, 95, 99)
+
+# Database time of the request being handled, shared with the SQLAlchemy listeners
+_request_db_time: ContextVar[Optional[List[float]]] = ContextVar("request_db_time", default=None)
+
+class DatabaseTimer:
+    """Accumulates the time spent in SQL statements, per request and for background workers."""
+
+    def __init__(self):
+        self.background_seconds = 0.0
+        self.background_queries = 0
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        """Listen to cursor executions of every SQLAlchemy engine."""
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._before)
+        event.listen(Engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("benchmark_query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["benchmark_query_start"].pop()
+        accumulator = _request_db_time.get()
+        if accumulator is not None:
+            accumulator[0] += elapsed
+            accumulator[1] += 1
+        else:
+            with self._lock:
+                self.background_seconds += elapsed
+                self.background_queries += 1
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def summarize(samples: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Summarize request samples into throughput, latency and database time figures (milliseconds)."""
+    latencies = [sample["latency"] * 1000 for sample in samples]
+    db_times = [sample["db_time"] * 1000 for sample in samples]
+    summary = {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["error"]),
+        "throughput_rps": len(samples) / duration if duration else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) if latencies else 0.0,
+            "max": max(latencies, default=0.0),
+        },
+        "db_time_ms": {
+            "mean": statistics.fmean(db_times) if db_times else 0.0,
+        },
+        "db_queries_per_request": (
+            statistics.fmean(sample["db_queries"] for sample in samples) if samples else 0.0
+        ),
+    }
+    for pct in PERCENTILES:
+        summary["latency_ms"][f"p{pct}"] = percentile(latencies, pct)
+        summary["db_time_ms"][f"p{pct}"] = percentile(db_times, pct)
+    return summary
+
+class Benchmark:
+    """Runs concurrent workflows through the API and records every request."""
+
+    def __init__(self, client: Any, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.headers = {"X-API-Key": os.environ["API_KEY"]}
+        self.samples: Dict[str, List[Dict[str, Any]]] = {"start": [], "get": []}
+        self.workflow_times: List[float] = []
+        self.workflow_statuses: Dict[str, int] = {}
+        self._remaining = 0
+        self._recording = False
+        self._started = 0
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs: Any) -> Any:
+        """Send one request, recording its latency and database time."""
+        accumulator = [0.0, 0]
+        token = _request_db_time.set(accumulator)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        finally:
+            latency = time.perf_counter() - started
+            _request_db_time.reset(token)
+            if self._recording:
+                self.samples[endpoint].append({
+                    "latency": latency,
+                    "db_time": accumulator[0],
+                    "db_queries": accumulator[1],
+                    "error": response is None or response.status_code >= 400,
+                })
+        return response
+
+    async def _run_workflow(self) -> None:
+        """Start one workflow and poll it until it reaches a terminal status."""
+        self._started += 1
+        started = time.perf_counter()
+        response = await self._request("start", "POST", "/workflow/start/", json={
+            "input_data": {"query": f"benchmark query {self._started}"},
+            "agents": self.args.agents,
+            "workflow_type": self.args.workflow_type,
+        })
+        if response.status_code != 200:
+            self._record_status(f"http_{response.status_code}")
+            return
+
+        state_id = response.json()["state_id"]
+        deadline = started + self.args.timeout
+        while True:
+            await asyncio.sleep(self.args.poll_interval)
+            response = await self._request("get", "GET", f"/workflow/{state_id}/")
+            status = response.json().get("status") if response.status_code == 200 else f"http_{response.status_code}"
+            if status in TERMINAL_STATUSES or response.status_code != 200:
+                break
+            if time.perf_counter() > deadline:
+                status = "timeout"
+                break
+
+        if self._recording:
+            self.workflow_times.append(time.perf_counter() - started)
+        self._record_status(status)
+
+    def _record_status(self, status: str) -> None:
+        if self._recording:
+            self.workflow_statuses[status] = self.workflow_statuses.get(status, 0) + 1
+
+    async def _worker(self) -> None:
+        """Run workflows back to back until the shared quota is used up."""
+        while self._remaining > 0:
+            self._remaining -= 1
+            await self._run_workflow()
+
+    async def _run(self, workflows: int, recording: bool) -> float:
+        """Run a number of workflows at the configured concurrency and return the elapsed time."""
+        self._remaining = workflows
+        self._recording = recording
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker() for _ in range(min(self.args.concurrency, workflows))))
+        return time.perf_counter() - started
+
+    async def run(self) -> float:
+        """Warm up, then run the measured workflows."""
+        if self.args.warmup:
+            await self._run(self.args.warmup, recording=False)
+        return await self._run(self.args.workflows, recording=True)
+
+def git_revision() -> Optional[str]:
+    """Get the checked-out git commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe the relative change of the headline figures against a baseline run."""
+    lines = []
+    for endpoint, summary in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        figures = [("throughput_rps", summary["throughput_rps"], previous["throughput_rps"])]
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            figures.append((f"latency {key}", summary["latency_ms"][key], previous["latency_ms"][key]))
+        figures.append(("db_time mean", summary["db_time_ms"]["mean"], previous["db_time_ms"]["mean"]))
+        for name, current, before in figures:
+            change = (current - before) / before * 100 if before else 0.0
+            lines.append(f"  {endpoint:<6} {name:<16} {before:10.2f} -> {current:10.2f} ({change:+.1f}%)")
+    return lines
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print a human readable summary of the results."""
+    params = results["parameters"]
+    print(f"\n{params['workflows']} workflows, concurrency {params['concurrency']}, "
+          f"{params['workflow_type']} {','.join(params['agents'])} in {results['duration_s']:.2f}s")
+    print(f"Workflows: {results['workflows']['throughput_per_s']:.2f}/s, "
+          f"statuses {results['workflows']['statuses']}")
+    header = f"{'endpoint':<8}{'reqs':>7}{'errors':>8}{'req/s':>10}" + "".join(
+        f"{f'p{pct} ms':>11}" for pct in PERCENTILES
+    ) + f"{'db ms':>9}{'queries':>9}"
+    print(header)
+    for endpoint, summary in results["endpoints"].items():
+        print(f"{endpoint:<8}{summary['requests']:>7}{summary['errors']:>8}{summary['throughput_rps']:>10.1f}" + "".join(
+            f"{summary['latency_ms'][f'p{pct}']:>11.2f}" for pct in PERCENTILES
+        ) + f"{summary['db_time_ms']['mean']:>9.2f}{summary['db_queries_per_request']:>9.1f}")
+    background = results["background_db"]
+    print(f"Background DB time: {background['seconds']:.3f}s over {background['queries']} queries")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the workflow API in-process")
+    parser.add_argument("--workflows", type=int, default=100, help="Number of measured workflows")
+    parser.add_argument("--concurrency", type=int, default=10, help="Workflows driven at once")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured workflows run first")
+    parser.add_argument("--workflow-type", default="sequential", help="Workflow type to start")
+    parser.add_argument("--agents", default=None, help="Comma separated agents (default: all)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between status polls")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a workflow counts as timed out")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous JSON results file")
+    return parser.parse_args()
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the benchmark against the in-process app and collect the results."""
+    import httpx
+    from config import settings
+    from api.endpoints import app
+    from core.workflow import workflow_manager
+
+    args.agents = args.agents.split(",") if args.agents else list(settings.AVAILABLE_AGENTS)
+    timer = DatabaseTimer()
+    timer.install()
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            benchmark = Benchmark(client, args)
+            duration = await benchmark.run()
+    finally:
+        workflow_manager.shutdown(wait=True)
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "version": settings.API_VERSION,
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {
+            "workflows": args.workflows,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "workflow_type": args.workflow_type,
+            "agents": args.agents,
+            "poll_interval": args.poll_interval,
+            "max_concurrent_workflows": settings.MAX_CONCURRENT_WORKFLOWS,
+            "database_url": settings.DATABASE_URL,
+            "fake_llm_latency_mean": settings.FAKE_LLM_LATENCY_MEAN,
+            "fake_tool_latency_mean": settings.FAKE_TOOL_LATENCY_MEAN,
+        },
+        "duration_s": duration,
+        "workflows": {
+            "throughput_per_s": len(benchmark.workflow_times) / duration if duration else 0.0,
+            "statuses": benchmark.workflow_statuses,
+            "latency_ms": {
+                f"p{pct}": percentile([t * 1000 for t in benchmark.workflow_times], pct)
+                for pct in PERCENTILES
+            },
+        },
+        "endpoints": {
+            endpoint: summarize(samples, duration)
+            for endpoint, samples in benchmark.samples.items()
+        },
+        "background_db": {
+            "seconds": timer.background_seconds,
+            "queries": timer.background_queries,
+        },
+    }
+
+def main() -> int:
+    """Main execution function."""
+    args = parse_args()
+    for name, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst baseline {baseline.get('git_revision')} ({baseline.get('timestamp')}):")
+        print("\n".join(compare(results, baseline)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    failed = sum(count for status, count in results["workflows"]["statuses"].items() if status != "completed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
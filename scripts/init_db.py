@@ -82,12 +82,28 @@ def verify_database():
         columns = {row[1] for row in cursor.fetchall()}
         required_columns = {
             "id", "input_data", "state_data", "messages",
-            "workflow_type", "status"
+            "workflow_type", "status", "created_at", "updated_at"
         }
         missing_columns = required_columns - columns
         if missing_columns:
             raise Exception(f"Missing columns: {missing_columns}")
         
+        # Check workflow_events table
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name='workflow_events';
+        """)
+        if not cursor.fetchone():
+            raise Exception("workflow_events table not found")
+        
+        # Check webhook_outbox table
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name='webhook_outbox';
+        """)
+        if not cursor.fetchone():
+            raise Exception("webhook_outbox table not found")
+        
         logger.info("Database verification successful")
     except Exception as e:
         logger.error(f"Database verification failed: {e}")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Archive and prune expired workflows.
+
+Workflows older than the TTL of their status are written to compressed JSONL
+archives, deleted in small batches and their pages returned with an
+incremental vacuum. The server runs the same job on a schedule when
+RETENTION_ENABLED is set.
+
+Usage:
+    python scripts/retention.py --dry-run
+    python scripts/retention.py --ttl completed=7 --ttl failed=30
+    python scripts/retention.py --enable-incremental-vacuum
+"""
+
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from core.retention import run_retention, enable_incremental_vacuum
+
+# Setup logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
+    format=settings.LOG_FORMAT
+)
+logger = logging.getLogger(__name__)
+
+def parse_ttl(values) -> Dict[str, float]:
+    """Parse repeated status=days options."""
+    ttl_days = {}
+    for value in values:
+        status, _, days = value.partition("=")
+        if not status or not days:
+            raise argparse.ArgumentTypeError(f"Expected status=days, got {value}")
+        ttl_days[status] = float(days)
+    return ttl_days
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archive and prune expired workflows")
+    parser.add_argument("--ttl", action="append", default=[], metavar="STATUS=DAYS",
+                        help="TTL of a status in days (repeatable); defaults to RETENTION_TTL_DAYS")
+    parser.add_argument("--archive-dir", default=settings.RETENTION_ARCHIVE_DIR,
+                        help="Directory of the archive files")
+    parser.add_argument("--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE,
+                        help="Workflows archived and deleted per transaction")
+    parser.add_argument("--vacuum-pages", type=int, default=settings.RETENTION_VACUUM_PAGES,
+                        help="Free pages to return to the filesystem (0 for all)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count the expired workflows")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="Switch an existing database to incremental vacuum (rebuilds the file) and exit")
+    return parser.parse_args()
+
+def main() -> int:
+    """Main execution function."""
+    args = parse_args()
+    try:
+        if args.enable_incremental_vacuum:
+            logger.info("Rebuilding the database with auto_vacuum=INCREMENTAL")
+            enable_incremental_vacuum()
+            return 0
+
+        result = run_retention(
+            ttl_days=parse_ttl(args.ttl) or None,
+            archive_dir=args.archive_dir,
+            batch_size=args.batch_size,
+            vacuum_pages=args.vacuum_pages,
+            dry_run=args.dry_run
+        )
+        print(json.dumps(result, indent=2))
+        return 0
+    except Exception as e:
+        logger.error(f"Retention failed: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Shared test setup: every test run gets its own database and state files."""
+import os
+import pytest
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    """
+    Point the settings at a temporary directory before any test module imports config.
+    Tests run on the offline fake LLM backend, with short fake latencies unless set otherwise.
+    """
+    data_dir = config._tmp_path_factory.mktemp("data")
+    os.environ["DATABASE_URL"] = f"sqlite:///{data_dir / 'multi_agent.db'}"
+    os.environ["RATE_LIMIT_PATH"] = str(data_dir / "rate_limit.db")
+    os.environ["LLM_CACHE_PATH"] = str(data_dir / "llm_cache.db")
+    os.environ["RETENTION_ARCHIVE_DIR"] = str(data_dir / "archive")
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ.setdefault("FAKE_LLM_LATENCY_MEAN", "0.02")
+    os.environ.setdefault("FAKE_TOOL_LATENCY_MEAN", "0.01")
@@ -4,10 +4,13 @@ from fastapi.testclient import TestClient
 from unittest.mock import patch
 import os
 import json
+import time
 from datetime import datetime
 from config import settings
 
 from api.endpoints import app
+from api.rate_limiter import get_rate_limiter
+from core.database import fetch_workflow_states
 
 client = TestClient(app)
 
@@ -28,12 +31,36 @@ INVALID_WORKFLOW_INPUT = {
     "workflow_type": "invalid_type"
 }
 
+TERMINAL_STATUSES = {"completed", "failed", "error"}
+
+def wait_for_workflow(state_id: int, headers: dict, timeout: float = 30.0) -> dict:
+    """
+    Wait for a queued workflow to reach a terminal status, then fetch it through the API.
+    The status is polled in the database so waiting does not count against the rate limit.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        items, _ = fetch_workflow_states([state_id], fields=["status"])
+        if items and items[0]["status"] in TERMINAL_STATUSES:
+            break
+        time.sleep(0.05)
+    response = client.get(f"/workflow/{state_id}/", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
 @pytest.fixture(autouse=True)
 def setup_environment():
     """Setup test environment variables."""
     with patch.dict(os.environ, {"API_KEY": VALID_API_KEY}):
         yield
 
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Give every test a fresh rate limit budget."""
+    get_rate_limiter().clear()
+    yield
+    get_rate_limiter().clear()
+
 def test_health_check():
     """Test health check endpoint."""
     response = client.get("/health")
@@ -65,6 +92,17 @@ def test_valid_api_key():
     assert "state_id" in data
     assert data["message"] == "Workflow started successfully"
 
+def test_workflow_start_is_queued():
+    """Test that starting a workflow returns before the workflow runs."""
+    headers = {"X-API-Key": VALID_API_KEY}
+    response = client.post("/workflow/start/", headers=headers, json=VALID_WORKFLOW_INPUT)
+    assert response.status_code in [200, 201]
+    assert response.json()["status"] == "pending"
+    
+    # The queued workflow eventually reaches a terminal status
+    state_data = wait_for_workflow(response.json()["state_id"], headers)
+    assert state_data["status"] in TERMINAL_STATUSES
+
 def test_invalid_workflow_input():
     """Test request with invalid workflow input."""
     headers = {"X-API-Key": VALID_API_KEY}
@@ -102,6 +140,180 @@ def test_workflow_state_retrieval():
     assert "data_store" in state_data
     assert "status" in state_data
 
+def test_workflow_stream():
+    """Test streaming workflow progress as Server-Sent Events."""
+    headers = {"X-API-Key": VALID_API_KEY}
+    create_response = client.post("/workflow/start/", headers=headers, json=VALID_WORKFLOW_INPUT)
+    assert create_response.status_code in [200, 201]
+    state_id = create_response.json()["state_id"]
+    
+    response = client.get(f"/workflow/{state_id}/stream", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: workflow_status" in response.text
+    assert "event: workflow_finished" in response.text
+
+def test_workflow_stream_after_run_finished():
+    """Test that a run finishing before the stream subscribes is reported with its final status."""
+    from api.endpoints import workflow_events
+    from core.database import save_workflow_state, update_workflow_state
+    headers = {"X-API-Key": VALID_API_KEY}
+    state_id = save_workflow_state(
+        input_data={"query": "finished meanwhile"},
+        state_data={"status": "running"},
+        messages=[],
+        workflow_type="sequential",
+        status="running"
+    )
+    
+    def finish_then_subscribe(state_id):
+        # The worker stores the outcome and closes the channel before the subscription
+        update_workflow_state(state_id, {"status": "failed", "error": "boom"}, None, "failed")
+        return None
+    
+    with patch.object(workflow_events, "subscribe", finish_then_subscribe):
+        response = client.get(f"/workflow/{state_id}/stream", headers=headers)
+    assert response.status_code == 200
+    finished = response.text.split("event: workflow_finished")[1]
+    assert '"status": "failed"' in finished
+    assert '"error": "boom"' in finished
+
+def test_workflow_stream_follows_other_worker():
+    """Test that a workflow running elsewhere is followed until its stored status is terminal."""
+    import threading
+    from api.endpoints import workflow_events
+    from core.database import save_workflow_state, update_workflow_state
+    headers = {"X-API-Key": VALID_API_KEY}
+    state_id = save_workflow_state(
+        input_data={"query": "other worker"},
+        state_data={"status": "running"},
+        messages=[],
+        workflow_type="sequential",
+        status="running"
+    )
+    finish = threading.Timer(0.3, update_workflow_state, (state_id, {"status": "completed"}, None, "completed"))
+    
+    with patch.object(workflow_events, "subscribe", lambda state_id: None), \
+            patch.object(settings, "STREAM_POLL_INTERVAL", 0.05):
+        finish.start()
+        response = client.get(f"/workflow/{state_id}/stream", headers=headers)
+    finish.join()
+    assert response.status_code == 200
+    running, completed = response.text.split('"status": "completed"', 1)
+    assert '"status": "running"' in running
+    assert "workflow_finished" not in running
+    assert "event: workflow_finished" in completed
+
+def test_batch_start_workflows():
+    """Test queueing several workflows in one request."""
+    headers = {"X-API-Key": VALID_API_KEY}
+    batch = [
+        {**VALID_WORKFLOW_INPUT, "input_data": {"query": f"batch query {i}"}}
+        for i in range(3)
+    ]
+    response = client.post("/workflows/batch", headers=headers, json=batch)
+    assert response.status_code == 200
+    state_ids = response.json()["state_ids"]
+    assert len(state_ids) == 3
+    assert state_ids == sorted(state_ids)
+    for i, state_id in enumerate(state_ids):
+        state = wait_for_workflow(state_id, headers)
+        assert state["data_store"]["input_data"] == {"query": f"batch query {i}"}
+    
+    response = client.post("/workflows/batch", headers=headers, json=[])
+    assert response.status_code == 400
+    response = client.post("/workflows/batch", headers=headers, json=[INVALID_WORKFLOW_INPUT])
+    assert response.status_code == 422
+
+def test_fetch_workflows():
+    """Test fetching selected fields of several workflows at once."""
+    headers = {"X-API-Key": VALID_API_KEY}
+    state_ids = [
+        client.post("/workflow/start/", headers=headers, json=VALID_WORKFLOW_INPUT).json()["state_id"]
+        for _ in range(2)
+    ]
+    
+    response = client.post(
+        "/workflows/fetch",
+        headers=headers,
+        json={"ids": [state_ids[1], 99999, state_ids[0]], "fields": ["status"], "data_store_keys": ["agents"]}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["id"] for item in result["items"]] == [state_ids[1], state_ids[0]]
+    assert result["missing"] == [99999]
+    assert set(result["items"][0]) == {"id", "status", "data_store"}
+    assert result["items"][0]["data_store"] == {"agents": VALID_WORKFLOW_INPUT["agents"]}
+    
+    response = client.post("/workflows/fetch", headers=headers, json={"ids": state_ids, "fields": ["messages"]})
+    assert response.status_code == 400
+
+def test_list_workflows():
+    """Test listing workflows with filters and cursor pagination."""
+    headers = {"X-API-Key": VALID_API_KEY}
+    state_ids = [
+        client.post("/workflow/start/", headers=headers, json=VALID_WORKFLOW_INPUT).json()["state_id"]
+        for _ in range(3)
+    ]
+    
+    agent = VALID_WORKFLOW_INPUT["agents"][0]
+    response = client.get("/workflows", headers=headers, params={"agent": agent, "limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"]
+    assert all(agent in item["agents"] for item in page["items"])
+    assert [item["id"] for item in page["items"]] == sorted(state_ids, reverse=True)[:2]
+    
+    response = client.get(
+        "/workflows",
+        headers=headers,
+        params={"agent": agent, "limit": 2, "cursor": page["next_cursor"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] == min(state_ids)
+    
+    response = client.get("/workflows", headers=headers, params={"status": "no-such-status"})
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+    
+    response = client.get("/workflows", headers=headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_resume_failed_workflow():
+    """Test that a resumed workflow skips the agents that finished before the failure."""
+    import core.graph_builder as graph_builder
+    headers = {"X-API-Key": VALID_API_KEY}
+    agents = settings.AVAILABLE_AGENTS[:2]
+    query = "resume after transient failure"
+    get_agent_prompt = graph_builder.get_agent_prompt
+    calls = []
+    failing = {"agent": agents[1]}
+    
+    def tracking_prompt(agent_name, **kwargs):
+        # Other tests' workflows may still be running on the shared worker pool
+        if kwargs.get("objective") == query:
+            calls.append(agent_name)
+            if agent_name == failing["agent"]:
+                raise RuntimeError("transient LLM error")
+        return get_agent_prompt(agent_name=agent_name, **kwargs)
+    
+    workflow_input = {"input_data": {"query": query}, "agents": agents, "workflow_type": "sequential"}
+    with patch.object(graph_builder, "get_agent_prompt", tracking_prompt):
+        state_id = client.post("/workflow/start/", headers=headers, json=workflow_input).json()["state_id"]
+        assert wait_for_workflow(state_id, headers)["status"] == "failed"
+        assert calls == agents
+        
+        calls.clear()
+        failing["agent"] = None
+        response = client.post(f"/workflow/{state_id}/resume", headers=headers)
+        assert response.status_code == 200
+        assert wait_for_workflow(state_id, headers)["status"] == "completed"
+        assert calls == agents[1:]
+    
+    response = client.post(f"/workflow/{state_id}/resume", headers=headers)
+    assert response.status_code == 409
+
 def test_nonexistent_workflow_state():
     """Test retrieval of non-existent workflow state."""
     headers = {"X-API-Key": VALID_API_KEY}
@@ -149,10 +361,8 @@ def test_error_handling():
     assert response.status_code in [200, 201]  # Should still return success
     data = response.json()
     
-    # Get the workflow state
-    state_response = client.get(f"/workflow/{data['state_id']}/", headers=headers)
-    assert state_response.status_code == 200
-    state_data = state_response.json()
+    # Wait for the queued workflow to finish
+    state_data = wait_for_workflow(data["state_id"], headers)
     
     # Check error handling
     assert state_data["status"] in ["failed", "error"]
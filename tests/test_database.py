@@ -0,0 +1,164 @@
+"""Test the SQLite connection profile of the persistence layer."""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from core.database import (
+    engine,
+    get_db,
+    save_workflow_state,
+    get_workflow_state,
+    update_workflow_status
+)
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="SQLite only")
+
+def test_sqlite_pragmas_applied():
+    """Test that reader connections use the tuned SQLite profile."""
+    with get_db() as db:
+        assert db.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert db.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+def test_reader_connections_are_read_only():
+    """Test that writes through a reader session are rejected."""
+    with get_db() as db:
+        with pytest.raises(OperationalError):
+            db.execute(text("DELETE FROM workflow_states WHERE id = -1"))
+
+def test_concurrent_writes_are_serialized():
+    """Test that concurrent writers queue instead of failing with database is locked."""
+    def write(i: int) -> int:
+        state_id = save_workflow_state(
+            input_data={"query": f"concurrent {i}"},
+            state_data={"status": "pending"},
+            messages=[],
+            workflow_type="sequential"
+        )
+        update_workflow_status(state_id, "completed")
+        return state_id
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        state_ids = list(pool.map(write, range(40)))
+
+    assert len(set(state_ids)) == 40
+    assert all(get_workflow_state(state_id)["status"] == "completed" for state_id in state_ids)
+
+def test_async_helpers_round_trip():
+    """Test the awaitable helpers used by the API handlers."""
+    from core import async_database
+
+    async def round_trip() -> dict:
+        state_id = await async_database.save_workflow_state(
+            input_data={"query": "async"},
+            state_data={"status": "pending"},
+            messages=[],
+            workflow_type="sequential"
+        )
+        assert await async_database.update_workflow_status(state_id, "running")
+        return await async_database.get_workflow_state(state_id)
+
+    state = asyncio.run(round_trip())
+    assert state["input_data"] == {"query": "async"}
+    assert state["status"] == "running"
+
+def test_payload_stored_as_single_encoded_json():
+    """Test that payload columns hold the JSON document itself, not a JSON string."""
+    state_id = save_workflow_state(
+        input_data={"query": "encoding"},
+        state_data={"status": "pending", "agents": ["yaat"]},
+        messages=["hello"],
+        workflow_type="sequential"
+    )
+    with get_db() as db:
+        row = db.execute(
+            text("SELECT json_type(input_data), json_type(state_data), json_type(messages) FROM workflow_states WHERE id = :id"),
+            {"id": state_id}
+        ).one()
+    assert tuple(row) == ("object", "object", "array")
+    assert get_workflow_state(state_id)["messages"] == ["hello"]
+
+def test_large_payload_stored_compressed():
+    """Test that payloads above the threshold are stored as compressed blobs and read back intact."""
+    messages = [f"message {i}: " + "lorem ipsum " * 50 for i in range(40)]
+    state_id = save_workflow_state(
+        input_data={"query": "compression"},
+        state_data={"status": "pending"},
+        messages=messages,
+        workflow_type="sequential"
+    )
+    with get_db() as db:
+        row = db.execute(
+            text("SELECT typeof(state_data), typeof(messages) FROM workflow_states WHERE id = :id"),
+            {"id": state_id}
+        ).one()
+    assert tuple(row) == ("text", "blob")
+    assert get_workflow_state(state_id)["messages"] == messages
+
+def test_workflow_events_rebuild_transcript():
+    """Test that appended events rebuild the full transcript, a range and a tail."""
+    from core.database import append_workflow_events, update_workflow_state
+
+    state_id = save_workflow_state(
+        input_data={"query": "events"},
+        state_data={"status": "pending"},
+        messages=[],
+        workflow_type="sequential"
+    )
+    assert append_workflow_events(state_id, [{"role": "human", "content": "m0"}]) == 1
+    assert append_workflow_events(state_id, [
+        {"node": "yaat", "role": "ai", "content": f"m{i}"} for i in range(1, 5)
+    ]) == 5
+    # Finishing the workflow leaves the transcript alone
+    assert update_workflow_state(state_id, {"status": "completed"}, None, "completed")
+
+    state = get_workflow_state(state_id)
+    assert state["messages"] == ["m0", "m1", "m2", "m3", "m4"]
+    assert state["message_count"] == 5
+    assert get_workflow_state(state_id, offset=1, limit=2)["messages"] == ["m1", "m2"]
+    assert get_workflow_state(state_id, tail=2)["messages"] == ["m3", "m4"]
+    assert get_workflow_state(state_id, offset=9)["messages"] == []
+
+def test_retention_archives_and_deletes_expired(tmp_path):
+    """Test that expired workflows are archived with their transcript and deleted."""
+    from datetime import datetime, timedelta
+    from core.database import append_workflow_events
+    from core.retention import run_retention, read_archive
+
+    state_id = save_workflow_state(
+        input_data={"query": "retention"},
+        state_data={"status": "stale"},
+        messages=[],
+        workflow_type="sequential",
+        status="stale",
+        agents=["yaat"]
+    )
+    append_workflow_events(state_id, [{"node": "yaat", "role": "ai", "content": "kept"}])
+
+    # Nothing has expired yet
+    assert run_retention(ttl_days={"stale": 1}, archive_dir=str(tmp_path))["deleted"] == 0
+
+    result = run_retention(
+        ttl_days={"stale": 1},
+        archive_dir=str(tmp_path),
+        now=datetime.utcnow() + timedelta(days=2)
+    )
+    assert result["deleted"] == result["archived"] >= 1
+    assert get_workflow_state(state_id) is None
+
+    record = next(r for r in read_archive(result["archive"]) if r["id"] == state_id)
+    assert record["agents"] == ["yaat"]
+    assert [event["content"] for event in record["events"]] == ["kept"]
+
+def test_save_state_records_agents():
+    """Test that states saved through core.state are listed under their agents."""
+    from core.database import fetch_workflow_states
+    from core.state import save_state, create_initial_state
+
+    state = create_initial_state({"query": "saved state"}, ["yaat", "dr_milgrim"], "sequential")
+    state_id = save_state({"query": "saved state"}, state, "sequential")
+    [item], _ = fetch_workflow_states([state_id], fields=["status", "agents"])
+    assert item["status"] == "completed"
+    assert sorted(item["agents"]) == ["dr_milgrim", "yaat"]
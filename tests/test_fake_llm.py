@@ -0,0 +1,63 @@
+"""Test the offline fake LLM backend."""
+import json
+import pytest
+from langchain_core.messages import HumanMessage, FunctionMessage
+
+from core.fake_llm import (
+    FakeFunctionCallingChatModel,
+    LatencyModel,
+    ResponseSource
+)
+
+SEARCH_FUNCTION = {
+    "name": "web_search",
+    "description": "Search the web for information.",
+    "parameters": {"type": "object", "properties": {"query": {"type": "string"}}}
+}
+
+def test_scripted_responses_cycle():
+    """Test that scripted responses are returned in order."""
+    llm = FakeFunctionCallingChatModel(source=ResponseSource(script=[
+        {"function_call": {"name": "web_search", "arguments": {"query": "ev market"}}},
+        {"content": "final answer"}
+    ]))
+    first = llm.invoke([HumanMessage(content="hi")])
+    assert first.additional_kwargs["function_call"]["name"] == "web_search"
+    assert json.loads(first.additional_kwargs["function_call"]["arguments"]) == {"query": "ev market"}
+    assert llm.invoke([HumanMessage(content="hi")]).content == "final answer"
+    assert "function_call" in llm.invoke([HumanMessage(content="hi")]).additional_kwargs
+
+def test_random_responses_are_seeded():
+    """Test that equal seeds give equal responses."""
+    messages = [HumanMessage(content="hi")]
+    first = ResponseSource(seed=7).next_response(messages, [SEARCH_FUNCTION], "fake")
+    second = ResponseSource(seed=7).next_response(messages, [SEARCH_FUNCTION], "fake")
+    assert first == second
+
+def test_random_responses_stop_calling_tools():
+    """Test that a random source answers once a tool result came back."""
+    source = ResponseSource(seed=1, tool_call_probability=1.0)
+    messages = [HumanMessage(content="hi")]
+    assert "function_call" in source.next_response(messages, [SEARCH_FUNCTION], "fake").additional_kwargs
+    
+    messages.append(FunctionMessage(name="web_search", content="results"))
+    assert source.next_response(messages, [SEARCH_FUNCTION], "fake").content
+
+def test_functions_bound_like_openai():
+    """Test that functions bound by the agent reach the fake model."""
+    llm = FakeFunctionCallingChatModel(source=ResponseSource(seed=3, tool_call_probability=1.0))
+    result = llm.bind(functions=[SEARCH_FUNCTION]).invoke([HumanMessage(content="hi")])
+    assert result.additional_kwargs["function_call"]["name"] == "web_search"
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "lognormal"])
+def test_latency_distributions(distribution):
+    """Test that latency samples are non-negative and centred on the mean."""
+    latency = LatencyModel(distribution=distribution, mean=0.5, stddev=0.1, seed=0)
+    samples = [latency.sample() for _ in range(2000)]
+    assert min(samples) >= 0
+    assert abs(sum(samples) / len(samples) - 0.5) < 0.05
+
+def test_unknown_latency_distribution():
+    """Test that unknown distributions are rejected."""
+    with pytest.raises(ValueError):
+        LatencyModel(distribution="gamma")
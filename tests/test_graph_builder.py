@@ -0,0 +1,120 @@
+"""Test the workflow graph builders."""
+import pytest
+
+from config import settings
+from core.database import save_workflow_state, get_workflow_state
+import core.graph_builder as graph_builder
+from core.graph_builder import (
+    merge_agent_deltas,
+    get_compiled_graph,
+    warm_graph_cache,
+    clear_graph_cache
+)
+from core.workflow import workflow_manager
+
+@pytest.fixture
+def graph_cache():
+    """Start and end with an empty compiled graph cache."""
+    clear_graph_cache()
+    yield graph_builder._graph_cache
+    clear_graph_cache()
+
+def run_workflow(workflow_type: str, agents: list) -> dict:
+    """Run a workflow to the end on the calling thread and return its stored state."""
+    input_data = {"query": f"{workflow_type} graph test"}
+    state_id = save_workflow_state(
+        input_data=input_data,
+        state_data={"status": "pending"},
+        messages=[],
+        workflow_type=workflow_type,
+        agents=agents
+    )
+    workflow_manager._run_job(state_id, input_data, agents, workflow_type)
+    return get_workflow_state(state_id)
+
+@pytest.mark.skipif(settings.LLM_BACKEND != "fake", reason="Needs the fake LLM backend")
+def test_hybrid_workflow_completes():
+    """Test that a hybrid workflow visits each agent once and ends."""
+    agents = settings.AVAILABLE_AGENTS[:2]
+    state = run_workflow("hybrid", agents)
+    assert state["status"] == "completed"
+    # The input message, then one answer per agent
+    assert state["message_count"] == 1 + len(agents)
+
+def test_merge_without_conflicts():
+    """Test that deltas touching different keys are all applied."""
+    merged = merge_agent_deltas(
+        {"input_data": {"query": "q"}, "status": "running"},
+        [
+            {"agent": "yaat", "data_store": {"summary": "s"}},
+            {"agent": "dr_milgrim", "data_store": {"analysis": "a"}}
+        ],
+        ["dr_milgrim", "yaat"]
+    )
+    assert merged["summary"] == "s" and merged["analysis"] == "a"
+    assert merged["status"] == "running"
+    assert merged["completed_agents"] == ["dr_milgrim", "yaat"]
+    assert merged["agent_results"] == {"yaat": {"summary": "s"}, "dr_milgrim": {"analysis": "a"}}
+    assert "merge_conflicts" not in merged
+
+def test_merge_conflicts_last_requested_agent_wins():
+    """Test that the agent listed last wins a conflicting key and a failure always wins."""
+    merged = merge_agent_deltas(
+        {"status": "running"},
+        [
+            {"agent": "yaat", "data_store": {"answer": "from yaat", "status": "completed"}},
+            {"agent": "professor_athena", "data_store": {"answer": "from athena", "status": "failed"}},
+            {"agent": "dr_milgrim", "data_store": {"answer": "from milgrim"}}
+        ],
+        ["professor_athena", "dr_milgrim", "yaat"]
+    )
+    assert merged["answer"] == "from yaat"
+    assert merged["status"] == "failed"
+    assert merged["merge_conflicts"] == {
+        "answer": ["professor_athena", "dr_milgrim", "yaat"],
+        "status": ["professor_athena", "yaat"]
+    }
+    assert merged["agent_results"]["dr_milgrim"] == {"answer": "from milgrim"}
+
+@pytest.mark.skipif(settings.LLM_BACKEND != "fake", reason="Needs the fake LLM backend")
+def test_parallel_workflow_merges_every_agent():
+    """Test that a parallel workflow runs every agent and merges their results."""
+    agents = settings.AVAILABLE_AGENTS
+    state = run_workflow("parallel", agents)
+    assert state["status"] == "completed"
+    assert state["message_count"] == 1 + len(agents)
+    assert state["state_data"]["completed_agents"] == agents
+    assert set(state["state_data"]["agent_results"]) == set(agents)
+
+def test_graph_cache_keyed_by_type_and_agents(graph_cache):
+    """Test that graphs are shared per workflow type and ordered agent list."""
+    agents = settings.AVAILABLE_AGENTS[:2]
+    graph = get_compiled_graph("sequential", agents)
+    assert get_compiled_graph("sequential", list(agents)) is graph
+    assert get_compiled_graph("parallel", agents) is not graph
+    assert get_compiled_graph("sequential", agents[::-1]) is not graph
+    assert list(graph_cache) == [
+        ("sequential", tuple(agents)),
+        ("parallel", tuple(agents)),
+        ("sequential", tuple(agents[::-1]))
+    ]
+    with pytest.raises(ValueError):
+        get_compiled_graph("circular", agents)
+
+def test_graph_cache_evicts_least_recently_used(graph_cache, monkeypatch):
+    """Test that the cache keeps GRAPH_CACHE_SIZE graphs, evicting the least recently used."""
+    monkeypatch.setattr(settings, "GRAPH_CACHE_SIZE", 2)
+    first, second, third = ([agent] for agent in settings.AVAILABLE_AGENTS[:3])
+    graph = get_compiled_graph("sequential", first)
+    get_compiled_graph("sequential", second)
+    # Using the first graph again makes the second the least recently used
+    assert get_compiled_graph("sequential", first) is graph
+    get_compiled_graph("sequential", third)
+    assert list(graph_cache) == [("sequential", tuple(first)), ("sequential", tuple(third))]
+
+def test_warm_graph_cache(graph_cache):
+    """Test that warmup compiles the default graph of every workflow type."""
+    assert warm_graph_cache() == len(settings.WORKFLOW_TYPES)
+    assert set(graph_cache) == {
+        (workflow_type, tuple(settings.AVAILABLE_AGENTS)) for workflow_type in settings.WORKFLOW_TYPES
+    }
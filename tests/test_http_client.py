@@ -0,0 +1,74 @@
+"""Test the shared integration HTTP client layer."""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+
+from core.http_client import HostLimitedTransport, AsyncHostLimitedTransport, HostLatencyStats
+
+def test_requests_limited_per_host():
+    """Test that concurrent requests to one host never exceed the per-host limit."""
+    active = {"a.example": 0, "b.example": 0}
+    peak = {"a.example": 0, "b.example": 0}
+    lock = threading.Lock()
+
+    def handler(request):
+        host = request.url.host
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return httpx.Response(200 if host == "a.example" else 503, text="ok")
+
+    stats = HostLatencyStats()
+    client = httpx.Client(transport=HostLimitedTransport(httpx.MockTransport(handler), 2, stats))
+    urls = ["https://a.example/hook"] * 8 + ["https://b.example/hook"] * 4
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        responses = list(pool.map(client.post, urls))
+
+    assert [response.text for response in responses] == ["ok"] * 12
+    assert peak == {"a.example": 2, "b.example": 2}
+    hosts = stats.to_dict()
+    assert (hosts["a.example"]["requests"], hosts["a.example"]["errors"]) == (8, 0)
+    assert (hosts["b.example"]["requests"], hosts["b.example"]["errors"]) == (4, 4)
+    assert hosts["a.example"]["p95_ms"] >= 20
+
+def test_slot_released_after_failure():
+    """Test that a transport error frees its host slot."""
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    client = httpx.Client(transport=HostLimitedTransport(httpx.MockTransport(handler), 1, HostLatencyStats()))
+    for _ in range(3):
+        try:
+            client.get("https://down.example/")
+        except httpx.ConnectError:
+            pass
+
+def test_slot_wait_bounded_by_pool_timeout():
+    """Test that a request waiting on a busy host gives up after its pool timeout."""
+    def handler(request):
+        return httpx.Response(200, text="ok")
+
+    # An unread streamed response keeps the host's only slot busy
+    client = httpx.Client(transport=HostLimitedTransport(httpx.MockTransport(handler), 1, HostLatencyStats()))
+    with client.stream("GET", "https://busy.example/"):
+        start = time.perf_counter()
+        with pytest.raises(httpx.PoolTimeout):
+            client.get("https://busy.example/", timeout=httpx.Timeout(5.0, pool=0.05))
+        assert time.perf_counter() - start < 1
+    assert client.get("https://busy.example/", timeout=httpx.Timeout(5.0, pool=0.05)).text == "ok"
+
+    async def run_async():
+        transport = AsyncHostLimitedTransport(httpx.MockTransport(handler), 1, HostLatencyStats())
+        async with httpx.AsyncClient(transport=transport) as async_client:
+            async with async_client.stream("GET", "https://busy.example/"):
+                with pytest.raises(httpx.PoolTimeout):
+                    await async_client.get("https://busy.example/", timeout=httpx.Timeout(5.0, pool=0.05))
+            return (await async_client.get("https://busy.example/")).text
+
+    assert asyncio.run(run_async()) == "ok"
@@ -0,0 +1,40 @@
+"""Test the shared LLM clients and agent executors."""
+import pytest
+
+from config import settings
+from core.langchain_setup import get_llm, clear_llm_registry
+from core.graph_builder import get_agent_executor
+from agents.profiles import get_agent_config, get_agent_tools
+
+pytestmark = pytest.mark.skipif(settings.LLM_BACKEND != "fake", reason="Needs the fake LLM backend")
+
+@pytest.fixture
+def registry():
+    """Start and end with an empty LLM client registry."""
+    clear_llm_registry()
+    yield
+    clear_llm_registry()
+
+def test_llm_clients_reused(registry):
+    """Test that equal settings share one client and distinct settings get their own."""
+    llm = get_llm(temperature=0.2, model_name="model-a")
+    assert get_llm(temperature=0.2, model_name="model-a") is llm
+    # Temperatures are keyed as floats
+    assert get_llm(temperature=0, model_name="model-a") is get_llm(temperature=0.0, model_name="model-a")
+
+    assert get_llm(temperature=0.7, model_name="model-a") is not llm
+    assert get_llm(temperature=0.2, model_name="model-b") is not llm
+    assert get_llm(temperature=0.2, model_name="model-a", cache=True) is not llm
+
+def test_agent_executors_reused():
+    """Test that executors are built once per agent, prompt and tool set."""
+    name = settings.AVAILABLE_AGENTS[0]
+    tools = get_agent_tools(name)
+    prompt = get_agent_config(name)["prompt"]
+    executor = get_agent_executor(name, tools, prompt)
+    assert get_agent_executor(name, tools, prompt) is executor
+
+    assert get_agent_executor(name, tools, prompt + " Be brief.") is not executor
+    assert get_agent_executor(name, tools[:-1], prompt) is not executor
+    other = settings.AVAILABLE_AGENTS[1]
+    assert get_agent_executor(other, get_agent_tools(other), get_agent_config(other)["prompt"]) is not executor
@@ -0,0 +1,69 @@
+"""Test the LLM response caches."""
+import time
+import pytest
+from langchain_core.outputs import ChatGeneration
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.language_models import FakeListChatModel
+
+from core.llm_cache import (
+    InMemoryLLMCache,
+    SQLiteLLMCache,
+    make_cache_key
+)
+
+LLM_STRING = "model_name=gpt-4,temperature=0.7"
+GENERATIONS = [ChatGeneration(message=AIMessage(content="cached answer"))]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    """Cache instance of each backend."""
+    if request.param == "memory":
+        return InMemoryLLMCache(max_entries=2, ttl=60)
+    return SQLiteLLMCache(path=str(tmp_path / "llm_cache.db"), max_entries=2, ttl=60)
+
+def test_cache_key_normalizes_whitespace():
+    """Test that prompts differing only in whitespace share a key."""
+    assert make_cache_key("Analyze  market\ntrends", LLM_STRING) == make_cache_key("Analyze market trends", LLM_STRING)
+    assert make_cache_key("Analyze market trends", LLM_STRING) != make_cache_key("Analyze market trends", "model_name=gpt-4,temperature=0.2")
+
+def test_chat_prompt_normalizes_whitespace(cache):
+    """Test that chat prompts differing only in whitespace hit the same entry."""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a research assistant."),
+        ("human", "{query}")
+    ])
+    llm = FakeListChatModel(responses=["first answer", "second answer"], cache=cache)
+    chain = prompt | llm
+    assert chain.invoke({"query": "Analyze market trends"}).content == "first answer"
+    # The reformatted query is answered from the cache instead of the model
+    assert chain.invoke({"query": "Analyze\n\tmarket  trends\n"}).content == "first answer"
+    assert chain.invoke({"query": "Analyze market risks"}).content == "second answer"
+    assert cache.stats.to_dict()["hits"] == 1
+
+def test_cache_hit_and_miss(cache):
+    """Test lookups before and after an update."""
+    assert cache.lookup("query", LLM_STRING) is None
+    cache.update("query", LLM_STRING, GENERATIONS)
+    cached = cache.lookup("query", LLM_STRING)
+    assert cached is not None
+    assert cached[0].message.content == "cached answer"
+    
+    stats = cache.stats.to_dict()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_cache_evicts_oldest_entry(cache):
+    """Test that the cache stays within max_entries."""
+    for query in ["first", "second", "third"]:
+        cache.update(query, LLM_STRING, GENERATIONS)
+        time.sleep(0.01)
+    assert cache.lookup("first", LLM_STRING) is None
+    assert cache.lookup("third", LLM_STRING) is not None
+
+def test_cache_entries_expire(cache):
+    """Test that entries older than the TTL are not returned."""
+    cache.ttl = 0.05
+    cache.update("query", LLM_STRING, GENERATIONS)
+    time.sleep(0.1)
+    assert cache.lookup("query", LLM_STRING) is None
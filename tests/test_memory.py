@@ -0,0 +1,74 @@
+"""Test the run-scoped agent memory and chat history."""
+import pytest
+from langchain_core.messages import HumanMessage, AIMessage
+
+import core.memory
+from core.memory import RunMemoryStore, ChatHistoryBuilder
+
+AGENT = "professor_athena"
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count one token per word so budgets do not depend on tiktoken."""
+    monkeypatch.setattr(core.memory, "count_tokens", lambda text, model_name=None: len(text.split()))
+
+def test_history_within_budget_kept_whole(word_tokens):
+    """Test that a history under the budget is rendered in full."""
+    builder = ChatHistoryBuilder(token_budget=100)
+    messages = [HumanMessage(content="what is new"), AIMessage(content="nothing much")]
+    assert builder.render(messages) == "human: what is new\nai: nothing much"
+    assert builder.token_count == 7
+
+def test_history_trimmed_to_budget(word_tokens):
+    """Test that the oldest messages are dropped and counted in the omitted marker."""
+    builder = ChatHistoryBuilder(token_budget=6)
+    messages = [HumanMessage(content=f"message {i}") for i in range(5)]
+    # Each line ("human: message i") is 3 tokens, so two fit
+    assert builder.render(messages) == "[3 earlier messages omitted]\nhuman: message 3\nhuman: message 4"
+    assert builder.token_count == 6
+
+    # New messages are appended and push more out
+    messages.append(AIMessage(content="reply"))
+    assert builder.render(messages) == "[4 earlier messages omitted]\nhuman: message 4\nai: reply"
+
+def test_history_keeps_latest_message_over_budget(word_tokens):
+    """Test that the latest message is kept even when it alone exceeds the budget."""
+    builder = ChatHistoryBuilder(token_budget=2)
+    rendered = builder.render([HumanMessage(content="short"), HumanMessage(content="a much longer message")])
+    assert rendered == "[1 earlier messages omitted]\nhuman: a much longer message"
+
+def test_history_restarts_on_shorter_transcript(word_tokens):
+    """Test that a different, shorter message list is rendered from scratch."""
+    builder = ChatHistoryBuilder(token_budget=6)
+    builder.render([HumanMessage(content=f"message {i}") for i in range(5)])
+    assert builder.render([HumanMessage(content="fresh start")]) == "human: fresh start"
+
+def test_memories_isolated_per_run():
+    """Test that each run and agent gets its own memory and history builder."""
+    store = RunMemoryStore()
+    memory = store.get(1, AGENT)
+    assert store.get(1, AGENT) is memory
+    assert store.get(2, AGENT) is not memory
+    assert store.get(1, "yaat") is not memory
+    assert store.history(1, AGENT) is store.history(1, AGENT)
+    assert store.history(2, AGENT) is not store.history(1, AGENT)
+
+    memory.save_context({"input": "question of run 1"}, {"output": "answer of run 1"})
+    other = store.get(2, AGENT).load_memory_variables({})[memory.memory_key]
+    assert "run 1" not in str(other)
+
+def test_release_drops_only_that_run():
+    """Test that releasing a run frees its entries and leaves other runs alone."""
+    store = RunMemoryStore()
+    memory = store.get(1, AGENT)
+    store.get(1, "yaat")
+    history = store.history(1, AGENT)
+    kept = store.get(2, AGENT)
+    assert len(store) == 3
+
+    store.release(1)
+    assert len(store) == 1
+    assert store.get(2, AGENT) is kept
+    # A run id seen again starts from scratch
+    assert store.get(1, AGENT) is not memory
+    assert store.history(1, AGENT) is not history
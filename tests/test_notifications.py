@@ -0,0 +1,109 @@
+"""Test the notification digests."""
+import pytest
+
+from core.database import get_db, get_write_db, WebhookOutbox
+from core.notifications import NotificationAggregator
+from core.webhooks import chunk_text, notion_rich_text
+
+def clear_outbox():
+    with get_write_db() as db:
+        db.query(WebhookOutbox).delete()
+        db.commit()
+
+@pytest.fixture
+def outbox():
+    """Read the deliveries queued by a test on an empty outbox."""
+    def rows(destination):
+        with get_db() as db:
+            return [row.payload for row in db.query(WebhookOutbox).filter(WebhookOutbox.destination == destination)]
+    clear_outbox()
+    yield rows
+    clear_outbox()
+
+def workflow_event(state_id, status="completed", messages=None):
+    return {
+        "state_id": state_id,
+        "status": status,
+        "summary": f"result {state_id}",
+        "messages": messages or [f"result {state_id}"],
+        "data_store": {"status": status}
+    }
+
+def test_chunk_text_respects_limit():
+    """Test that text is cut under the limit, at line breaks where possible."""
+    text = "\n".join("x" * 30 for _ in range(10))
+    chunks = chunk_text(text, limit=100)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 and chunk.endswith("\n") for chunk in chunks[:-1])
+    assert chunk_text("y" * 250, limit=100) == ["y" * 100, "y" * 100, "y" * 50]
+    assert all(len(item["text"]["content"]) <= 2000 for item in notion_rich_text("z" * 4500))
+
+def test_digest_sent_when_full(outbox):
+    """Test that buffered notifications go out as one Slack message once max_events is reached."""
+    aggregator = NotificationAggregator(window=3600, max_events=3)
+    for state_id in (1, 2):
+        aggregator.add("slack", workflow_event(state_id))
+    assert outbox("slack") == []
+    aggregator.add("slack", workflow_event(3, status="failed"))
+
+    [payload] = outbox("slack")
+    assert payload["text"].startswith("3 workflows finished (2 completed, 1 failed)")
+    assert "#3 failed: result 3" in payload["text"]
+    assert aggregator.pending() == 0
+
+def test_notion_digest_chunks_long_text(outbox):
+    """Test that a flushed Notion digest is one page with rich text under the property limit."""
+    aggregator = NotificationAggregator(window=3600, max_events=50)
+    aggregator.add("notion", workflow_event(1, messages=["a" * 3000]))
+    aggregator.add("notion", workflow_event(2))
+    assert aggregator.flush(force=True) == 1
+
+    [page] = outbox("notion")
+    assert page["properties"]["State ID"]["title"][0]["text"]["content"] == "1, 2"
+    rich_text = page["properties"]["Messages"]["rich_text"]
+    assert len(rich_text) > 1
+    assert all(len(item["text"]["content"]) <= 2000 for item in rich_text)
+
+def test_failed_digest_kept_for_retry(monkeypatch):
+    """Test that events of a failed digest are buffered again and sent by a later flush."""
+    import core.notifications as notifications
+    sent = []
+    results = iter([False, True, True])
+
+    def sender(events):
+        sent.append([event["state_id"] for event in events])
+        return next(results)
+
+    monkeypatch.setitem(notifications.DIGEST_SENDERS, "slack", sender)
+    aggregator = NotificationAggregator(window=3600, max_events=2)
+    aggregator.add("slack", workflow_event(1))
+    aggregator.add("slack", workflow_event(2))
+    assert sent == [[1, 2]]
+    assert aggregator.pending() == 2
+
+    # A full buffer is not retried before the window passes
+    aggregator.add("slack", workflow_event(3))
+    assert sent == [[1, 2]]
+
+    assert aggregator.flush(force=True) == 2
+    assert sent == [[1, 2], [1, 2], [3]]
+    assert aggregator.stats()["dropped"] == 0
+
+def test_failed_digest_dropped_when_forced_or_over_limit(monkeypatch):
+    """Test that failed events are counted as dropped on a forced flush and beyond the retained limit."""
+    import core.notifications as notifications
+    monkeypatch.setitem(notifications.DIGEST_SENDERS, "slack", lambda events: False)
+    monkeypatch.setattr(notifications, "MAX_RETAINED_DIGESTS", 1)
+    aggregator = NotificationAggregator(window=3600, max_events=2)
+    for state_id in (1, 2):
+        aggregator.add("slack", workflow_event(state_id))
+    aggregator.add("slack", workflow_event(3))
+    # Once the retry is due the failed digest plus event 3 exceed the one digest retained
+    aggregator._retry_at.clear()
+    aggregator.flush()
+    assert aggregator.pending() == 2
+    assert aggregator.stats()["dropped"] == 1
+
+    aggregator.flush(force=True)
+    assert aggregator.pending() == 0
+    assert aggregator.stats()["dropped"] == 3
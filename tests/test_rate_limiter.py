@@ -0,0 +1,54 @@
+"""Test the sliding-window rate limiters."""
+import pytest
+
+from api.rate_limiter import InMemoryRateLimiter, SQLiteRateLimiter
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    """Limiter of each backend allowing 3 requests per 10 seconds."""
+    if request.param == "memory":
+        return InMemoryRateLimiter(max_requests=3, window=10, max_clients=2)
+    return SQLiteRateLimiter(path=str(tmp_path / "rate_limit.db"), max_requests=3, window=10, max_clients=2)
+
+def test_limit_within_window(limiter):
+    """Test that requests over the limit are rejected with a retry delay."""
+    assert [limiter.hit("client", now=100.0)[0] for _ in range(4)] == [True, True, True, False]
+    # The 3 requests weigh 3 until just after the window ends at 110
+    assert limiter.hit("client", now=101.0) == (False, 10)
+    # Other clients have their own budget
+    assert limiter.hit("other", now=101.0) == (True, 0)
+    assert limiter.stats.to_dict()["rejected"] == 2
+
+def test_previous_window_slides_out(limiter):
+    """Test that the previous window's requests count in proportion to its overlap."""
+    for _ in range(3):
+        limiter.hit("client", now=105.0)
+    # Early in the next window the 3 requests weigh 2.7, leaving room for one more
+    assert limiter.hit("client", now=111.0)[0]
+    # Then 3 * (1 - elapsed / 10) + 1 < 3 once more than 3.33s of the window passed
+    assert limiter.hit("client", now=111.0) == (False, 3)
+    assert not limiter.hit("client", now=113.0)[0]
+    assert limiter.hit("client", now=114.0)[0]
+    # Later on they weigh 0.6
+    assert limiter.hit("client", now=118.0)[0]
+    # Two windows later the old requests no longer count
+    assert limiter.hit("client", now=131.0)[0]
+
+def test_least_recently_seen_clients_evicted():
+    """Test that the in-memory limiter tracks at most max_clients clients."""
+    limiter = InMemoryRateLimiter(max_requests=1, window=10, max_clients=2)
+    for client in ["a", "b", "c"]:
+        limiter.hit(client, now=100.0)
+    assert limiter.clients() == 2
+    # "a" was evicted, so it starts over
+    assert limiter.hit("a", now=100.0)[0]
+    assert not limiter.hit("c", now=100.0)[0]
+
+def test_sqlite_counters_shared_between_instances(tmp_path):
+    """Test that limiters on the same file, as in separate workers, share a budget."""
+    path = str(tmp_path / "rate_limit.db")
+    first = SQLiteRateLimiter(path=path, max_requests=2, window=10)
+    second = SQLiteRateLimiter(path=path, max_requests=2, window=10)
+    assert first.hit("client", now=100.0)[0]
+    assert second.hit("client", now=100.0)[0]
+    assert not first.hit("client", now=100.0)[0]
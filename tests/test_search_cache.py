@@ -0,0 +1,74 @@
+"""Test the search result cache."""
+from concurrent.futures import ThreadPoolExecutor
+import time
+import pytest
+
+from core.search_cache import SearchCache, make_search_key
+
+def counting_search(result="results", delay=0.0):
+    """Search stand-in counting its calls."""
+    calls = []
+
+    def search():
+        calls.append(1)
+        time.sleep(delay)
+        return result
+    return search, calls
+
+def test_search_key_normalizes_query():
+    """Test that queries differing in whitespace or case share a key."""
+    assert make_search_key("duckduckgo", "  Market\nTrends ") == make_search_key("duckduckgo", "market trends")
+    assert make_search_key("duckduckgo", "market trends") != make_search_key("serpapi", "market trends")
+
+def test_cached_result_reused_until_expired():
+    """Test hits within the TTL and a new search after it."""
+    cache = SearchCache(max_entries=10, ttl=60)
+    search, calls = counting_search()
+    assert cache.get_or_search("duckduckgo", "AI agents", search) == "results"
+    assert cache.get_or_search("duckduckgo", "ai  agents", search) == "results"
+    assert len(calls) == 1
+    assert cache.stats.to_dict()["hits"] == 1
+
+    cache.ttl = 0.05
+    time.sleep(0.1)
+    cache.get_or_search("duckduckgo", "AI agents", search)
+    assert len(calls) == 2
+
+def test_least_recently_used_evicted():
+    """Test that the cache keeps at most max_entries results."""
+    cache = SearchCache(max_entries=2, ttl=60)
+    search, calls = counting_search()
+    for query in ["first", "second", "first", "third"]:
+        cache.get_or_search("duckduckgo", query, search)
+    cache.get_or_search("duckduckgo", "first", search)
+    assert len(calls) == 3
+    cache.get_or_search("duckduckgo", "second", search)
+    assert len(calls) == 4
+
+def test_results_persist_on_disk(tmp_path):
+    """Test that a new cache on the same file reuses stored results."""
+    path = str(tmp_path / "search_cache.db")
+    search, calls = counting_search()
+    SearchCache(max_entries=10, ttl=60, path=path).get_or_search("serpapi", "query", search)
+    assert SearchCache(max_entries=10, ttl=60, path=path).get_or_search("serpapi", "query", search) == "results"
+    assert len(calls) == 1
+
+def test_concurrent_searches_deduplicated():
+    """Test that concurrent identical searches make a single upstream call."""
+    cache = SearchCache(max_entries=10, ttl=60)
+    search, calls = counting_search(delay=0.1)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get_or_search("duckduckgo", "same query", search), range(8)))
+    assert results == ["results"] * 8
+    assert len(calls) == 1
+    assert cache.to_dict()["deduplicated"] == 7
+
+def test_errors_not_cached():
+    """Test that a failed search is retried by the next caller."""
+    cache = SearchCache(max_entries=10, ttl=60)
+
+    def failing():
+        raise RuntimeError("rate limited")
+    with pytest.raises(RuntimeError):
+        cache.get_or_search("duckduckgo", "query", failing)
+    assert cache.get_or_search("duckduckgo", "query", lambda: "results") == "results"
@@ -0,0 +1,71 @@
+"""Test the webhook outbox and its dispatcher."""
+import asyncio
+from datetime import datetime
+import httpx
+import pytest
+
+from core.database import get_db, get_write_db, WebhookOutbox
+from core.webhooks import WebhookDispatcher, send_slack_notification, send_webhook, backoff_delay
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    """Run each test on an empty outbox."""
+    def clear():
+        with get_write_db() as db:
+            db.query(WebhookOutbox).delete()
+            db.commit()
+    clear()
+    yield
+    clear()
+
+def dispatch(responses):
+    """Run one dispatcher batch against a transport answering with the given status codes."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(responses.pop(0))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await WebhookDispatcher(client=client).dispatch_once()
+
+    return asyncio.run(run()), requests
+
+def outbox_row(outbox_filter):
+    with get_db() as db:
+        return db.query(WebhookOutbox).filter(outbox_filter).one_or_none()
+
+def test_webhook_delivered_and_removed():
+    """Test that a queued notification is posted and leaves the outbox."""
+    assert send_slack_notification("workflow 1 completed")
+    claimed, requests = dispatch([200])
+    assert claimed == 1
+    assert b"workflow 1 completed" in requests[0].content
+    assert outbox_row(WebhookOutbox.destination == "slack") is None
+
+def test_webhook_retried_then_failed():
+    """Test that server errors are retried with backoff and client errors are final."""
+    assert not send_webhook("unknown_event", {})
+    assert send_slack_notification("workflow 2 completed")
+
+    assert dispatch([503])[0] == 1
+    row = outbox_row(WebhookOutbox.destination == "slack")
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert row.next_attempt_at > datetime.utcnow()
+    # Backing off: not due yet
+    assert dispatch([])[0] == 0
+
+    with get_write_db() as db:
+        db.query(WebhookOutbox).update({"next_attempt_at": datetime.utcnow()})
+        db.commit()
+    assert dispatch([404])[0] == 1
+    row = outbox_row(WebhookOutbox.destination == "slack")
+    assert (row.status, row.attempts) == ("failed", 2)
+    assert row.last_error.startswith("HTTP 404")
+
+def test_backoff_grows_with_jitter():
+    """Test that retry delays double per attempt, jittered within the upper half."""
+    for attempts in (1, 2, 3):
+        delay = backoff_delay(attempts)
+        assert 2 ** attempts / 2 <= delay <= 2 ** attempts